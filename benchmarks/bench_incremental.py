@@ -0,0 +1,75 @@
+"""
+增量处理测试：修改已有博客中的一个段落后，对比全量重新处理和增量处理的耗时
+
+用法：python -m benchmarks.bench_incremental [--chars 3000] [--edits 1]
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from src.blog_generator import BlogGenerator
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+from benchmarks.bench_polish import build_text
+
+
+def edit(text: str, edits: int, round_index: int) -> str:
+    """
+    在前 edits 个正文段落末尾追加一句话
+    """
+    paragraphs = text.split("\n\n")
+    changed = 0
+    for i, paragraph in enumerate(paragraphs):
+        if changed >= edits:
+            break
+        if not paragraph.startswith("#"):
+            paragraphs[i] = f"{paragraph}第{round_index}次修改。"
+            changed += 1
+    return "\n\n".join(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量处理测试")
+    parser.add_argument("--chars", type=int, default=3000, help="博客字数")
+    parser.add_argument("--edits", type=int, default=1, help="每次修改的段落数")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="模拟生成速度")
+    parser.add_argument("--tts-seconds-per-char", type=float, default=0.002, help="模拟TTS每字符耗时（秒）")
+    args = parser.parse_args()
+    disable_caches()
+
+    text = build_text(args.chars)
+    factory = make_fake_synthesizer_factory(first_package_delay=0.1, seconds_per_char=args.tts_seconds_per_char,
+                                            chunk_delay=0)
+    rows = []
+    with StubLLMServer(first_token_delay=0.1, tokens_per_second=args.tokens_per_second) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        generator = BlogGenerator(TextProcessor(base_url=server.base_url, health_check="off"),
+                                  TTSService(synthesizer_factory=factory))
+        blog_file = os.path.join(tmp, "blog.md")
+        for round_index, incremental in enumerate([True, False, True], start=1):
+            # 第一轮建立增量清单，之后每轮修改段落后分别全量和增量处理
+            if round_index > 1:
+                text = edit(text, args.edits, round_index)
+            with open(blog_file, "w", encoding="utf-8") as f:
+                f.write(text)
+            started = time.time()
+            result = generator.process_existing_blog(blog_file, with_tts=True, incremental=incremental)
+            elapsed = time.time() - started
+            if round_index == 1:
+                rows.append(f"首次处理（建立清单）：耗时{elapsed:.2f}秒")
+            elif incremental:
+                stats = result["incremental"]
+                rows.append(f"修改{args.edits}段后增量处理：耗时{elapsed:.2f}秒，"
+                            f"重新润色{stats['polished']}段，重新合成{stats['synthesized']}段，共{stats['paragraphs']}段")
+            else:
+                rows.append(f"修改{args.edits}段后全量处理：耗时{elapsed:.2f}秒")
+
+    print("=" * 50)
+    for row in rows:
+        print(row)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
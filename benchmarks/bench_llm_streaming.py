@@ -0,0 +1,39 @@
+"""
+流式生成基准测试：对比阻塞调用的总耗时与流式调用的首token延迟
+
+用法：python -m benchmarks.bench_llm_streaming [--length long] [--tokens-per-second 50]
+"""
+import time
+import argparse
+from src.text_processing import TextProcessor, StreamStats
+from benchmarks.stubs import StubLLMServer, disable_caches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式生成基准测试")
+    parser.add_argument("--length", default="long", choices=["short", "medium", "long"], help="博客长度")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="模拟首token延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="模拟生成速度")
+    args = parser.parse_args()
+    disable_caches()
+
+    with StubLLMServer(first_token_delay=args.first_token_delay, tokens_per_second=args.tokens_per_second) as server:
+        processor = TextProcessor(base_url=server.base_url)
+
+        started = time.time()
+        blocking_text = processor.generate_blog_from_topic("AI 技术在医疗领域的应用", args.length)
+        blocking_time = time.time() - started
+
+        stats = StreamStats()
+        streamed_text = "".join(processor.stream_generate_blog_from_topic("AI 技术在医疗领域的应用", args.length, stats)).strip()
+
+    print("=" * 50)
+    print(f"博客长度：{args.length}，生成token数：{stats.completion_tokens}")
+    print(f"阻塞调用：{blocking_time * 1000:.0f}毫秒后才拿到第一个字")
+    print(f"流式调用：首token延迟{stats.time_to_first_token_ms:.0f}毫秒，生成速度{stats.tokens_per_second:.1f} tokens/s")
+    print(f"输出一致：{blocking_text == streamed_text}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+大纲模式基准测试：对比整篇生成与先生成大纲再并行生成各部分的端到端耗时
+
+用法：python -m benchmarks.bench_outline [--length long] [--tokens-per-second 50] [--sections 4]
+"""
+import os
+import time
+import argparse
+import tempfile
+import src.config as config
+import src.metrics as metrics
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+
+
+def run_mode(workflow: BlogWorkflow, job_config: dict, mode: str):
+    with metrics.recording() as recorder:
+        started = time.time()
+        result = workflow.run({**job_config, "mode": mode})
+        elapsed = time.time() - started
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    return elapsed, result, recorder.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大纲模式基准测试")
+    parser.add_argument("--length", default="long", choices=["short", "medium", "long"], help="博客长度")
+    parser.add_argument("--sections", type=int, default=config.OUTLINE_SECTIONS, help="大纲的正文章节数")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="模拟首token延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="模拟生成速度")
+    parser.add_argument("--with-tts", action="store_true", help="同时合成语音（默认只比较文本生成和润色）")
+    args = parser.parse_args()
+    disable_caches()
+    config.OUTLINE_SECTIONS = args.sections
+
+    job_config = {"topic": "AI 技术在医疗领域的应用", "length": args.length, "with_tts": args.with_tts,
+                  "polish_type": "blog"}
+    factory = make_fake_synthesizer_factory(first_package_delay=0.3, seconds_per_char=0.005, chunk_delay=0)
+
+    with StubLLMServer(first_token_delay=args.first_token_delay, tokens_per_second=args.tokens_per_second) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            workflow = BlogWorkflow(TextProcessor(base_url=server.base_url), TTSService(synthesizer_factory=factory),
+                                    checkpointer=False)
+            single_time, single, single_summary = run_mode(workflow, job_config, "sequential")
+            outline_time, outline, outline_summary = run_mode(workflow, job_config, "outline")
+        finally:
+            os.chdir(cwd)
+
+    print("=" * 50)
+    print(f"博客长度：{args.length}，大纲正文章节数：{outline['metadata']['outline_sections']}")
+    print(f"整篇生成：{single_time:.2f}秒，{len(single['original_text'])}字符，"
+          f"模型请求{single_summary['llm']['requests']}次")
+    print(f"大纲并行生成：{outline_time:.2f}秒，{len(outline['original_text'])}字符，"
+          f"模型请求{outline_summary['llm']['requests']}次")
+    print(f"加速比：{single_time / outline_time:.2f}x")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
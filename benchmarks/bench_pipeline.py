@@ -0,0 +1,66 @@
+"""
+流水线基准测试：对比逐步执行与段落流水线执行的端到端耗时
+
+用法：python -m benchmarks.bench_pipeline [--length long] [--tokens-per-second 50]
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+
+
+def run_mode(workflow: BlogWorkflow, config: dict, mode: str):
+    started = time.time()
+    result = workflow.run({**config, "mode": mode})
+    elapsed = time.time() - started
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    with open(result["blog_file"], encoding="utf-8") as f:
+        blog_content = f.read()
+    return elapsed, result, blog_content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线基准测试")
+    parser.add_argument("--length", default="long", choices=["short", "medium", "long"], help="博客长度")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="模拟首token延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="模拟生成速度")
+    parser.add_argument("--tts-first-package-delay", type=float, default=0.3, help="模拟TTS首包延迟（秒）")
+    parser.add_argument("--tts-seconds-per-char", type=float, default=0.005, help="模拟TTS每字符耗时（秒）")
+    args = parser.parse_args()
+    disable_caches()
+
+    config = {"topic": "AI 技术在医疗领域的应用", "length": args.length, "with_tts": True, "polish_type": "blog"}
+    factory = make_fake_synthesizer_factory(
+        first_package_delay=args.tts_first_package_delay,
+        seconds_per_char=args.tts_seconds_per_char,
+        chunk_delay=0,
+    )
+
+    with StubLLMServer(first_token_delay=args.first_token_delay, tokens_per_second=args.tokens_per_second) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            workflow = BlogWorkflow(TextProcessor(base_url=server.base_url), TTSService(synthesizer_factory=factory))
+            sequential_time, sequential, sequential_blog = run_mode(workflow, config, "sequential")
+            pipelined_time, pipelined, pipelined_blog = run_mode(workflow, config, "pipelined")
+        finally:
+            os.chdir(cwd)
+
+    print("=" * 50)
+    print(f"博客长度：{args.length}，段落数：{pipelined['metadata']['pipeline_paragraphs']}")
+    print(f"逐步执行：{sequential_time:.2f}秒")
+    print(f"流水线执行：{pipelined_time:.2f}秒（首段开始合成：{pipelined['metadata']['first_audio_submitted_ms']:.0f}毫秒）")
+    print(f"加速比：{sequential_time / pipelined_time:.2f}x")
+    print(f"润色结果一致：{sequential['polished_text'] == pipelined['polished_text']}")
+    print(f"博客文件一致：{sequential_blog == pipelined_blog}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
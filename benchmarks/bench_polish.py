@@ -0,0 +1,66 @@
+"""
+长文本润色测试：对比整篇一次润色和按段落分段并发润色的耗时、截断情况和输出完整度
+
+模拟服务按每token两个字符生成，整篇润色受 max_tokens=1000 限制，超过约2000字的文本会被截断。
+
+用法：python -m benchmarks.bench_polish [--chars 3000] [--tokens-per-second 400]
+"""
+import time
+import argparse
+import src.config as config
+import src.metrics as metrics
+from src.text_processing import TextProcessor
+from benchmarks.stubs import StubLLMServer, disable_caches, _STUB_SENTENCES
+
+
+def build_text(chars: int) -> str:
+    """
+    构造带二级标题的长文本，每节四个段落
+    """
+    parts = ["# 长文本润色测试"]
+    section = paragraph = 0
+    while sum(len(part) for part in parts) < chars:
+        if paragraph % 4 == 0:
+            section += 1
+            parts.append(f"## 第{section}节")
+        parts.append("".join(_STUB_SENTENCES[(paragraph + j) % len(_STUB_SENTENCES)] for j in range(6)))
+        paragraph += 1
+    return "\n\n".join(parts)
+
+
+def run(mode: str, base_url: str, text: str) -> str:
+    config.POLISH_MODE = mode
+    processor = TextProcessor(base_url=base_url, health_check="off")
+    with metrics.recording() as recorder:
+        started = time.time()
+        polished = processor.polish_text(text, "blog", topic="长文本润色测试")
+        elapsed = time.time() - started
+    llm = recorder.summary()["llm"]
+    completeness = len(polished) / len(text) * 100
+    return (f"{mode}：耗时{elapsed:.2f}秒，请求{llm['requests']}次，截断{llm['truncated']}次"
+            f"（截断率{llm['truncated'] / max(llm['requests'], 1) * 100:.0f}%），"
+            f"输出{len(polished)}/{len(text)}字（{completeness:.0f}%）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长文本润色测试")
+    parser.add_argument("--chars", type=int, default=3000, help="待润色文本的字数")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="模拟生成速度")
+    parser.add_argument("--first-token-delay", type=float, default=0.1, help="模拟首token延迟（秒）")
+    args = parser.parse_args()
+    disable_caches()
+
+    text = build_text(args.chars)
+    rows = []
+    with StubLLMServer(first_token_delay=args.first_token_delay, tokens_per_second=args.tokens_per_second) as server:
+        for mode in ("single", "sections"):
+            rows.append(run(mode, server.base_url, text))
+
+    print("=" * 50)
+    for row in rows:
+        print(row)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
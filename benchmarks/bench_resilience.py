@@ -0,0 +1,119 @@
+"""
+容错测试：向模拟后端注入故障，对比开启和关闭重试、熔断时的成功率和耗时，
+并统计模型服务不可用时每个失败的工作流任务实际发起的请求数
+
+用法：python -m benchmarks.bench_resilience [--requests 20] [--failure-rate 0.3]
+"""
+import os
+import time
+import argparse
+import tempfile
+import src.config as config
+import src.resilience as resilience
+from src.text_processing import TextProcessor, LLMGenerationError
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+
+
+def configure(retries: int, breaker_threshold: int):
+    config.LLM_MAX_RETRIES = retries
+    config.TTS_CHUNK_RETRIES = retries
+    config.LLM_RETRY_BACKOFF = config.TTS_RETRY_BACKOFF = 0.05
+    config.LLM_BREAKER_THRESHOLD = config.TTS_BREAKER_THRESHOLD = breaker_threshold
+    resilience.reset_backends()
+
+
+def llm_success_rate(base_url: str, requests: int) -> tuple:
+    processor = TextProcessor(base_url=base_url, health_check="off")
+    started = time.time()
+    succeeded = 0
+    for i in range(requests):
+        try:
+            processor.generate_blog_from_topic(f"容错测试 {i}", "short")
+            succeeded += 1
+        except LLMGenerationError:
+            pass
+    return succeeded, time.time() - started
+
+
+def failed_job_cost(base_url: str, jobs: int) -> dict:
+    """
+    执行若干工作流任务，统计失败任务的数量、执行过的节点以及发起的语音合成请求数
+    """
+    factory = make_fake_synthesizer_factory(first_package_delay=0.01, chunk_delay=0)
+    workflow = BlogWorkflow(TextProcessor(base_url=base_url, health_check="off"), TTSService(synthesizer_factory=factory),
+                            checkpointer=False)
+    cost = {"failed": 0, "nodes": {}, "tts": 0}
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for i in range(jobs):
+                result = workflow.run({"topic": f"容错测试 {i}", "length": "short", "with_tts": True, "polish_type": "blog"})
+                if result.get("error"):
+                    summary = result["metadata"]["metrics"]
+                    cost["failed"] += 1
+                    for name, node in summary["nodes"].items():
+                        cost["nodes"][name] = cost["nodes"].get(name, 0) + node["count"]
+                    cost["tts"] += summary["tts"]["requests"]
+        finally:
+            os.chdir(cwd)
+    return cost
+
+
+def tts_success_rate(failure_rate: float, requests: int) -> tuple:
+    factory = make_fake_synthesizer_factory(first_package_delay=0.01, failure_rate=failure_rate, chunk_delay=0)
+    service = TTSService(synthesizer_factory=factory, chunk_size=0)
+    started = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = service.batch_text_to_speech([f"第{i + 1}段测试文本。" for i in range(requests)], tmp)
+    return len(outputs), time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="容错测试")
+    parser.add_argument("--requests", type=int, default=20, help="每种情况的请求数")
+    parser.add_argument("--failure-rate", type=float, default=0.3, help="注入的失败概率")
+    parser.add_argument("--failure-status", type=int, default=503, help="注入失败时返回的状态码（如 429、503）")
+    parser.add_argument("--retries", type=int, default=3, help="开启重试时的最大重试次数")
+    args = parser.parse_args()
+    disable_caches()
+    rows = []
+
+    with StubLLMServer(first_token_delay=0.01, tokens_per_second=5000, failure_rate=args.failure_rate,
+                       failure_status=args.failure_status) as server:
+        for retries in (0, args.retries):
+            configure(retries, breaker_threshold=0)
+            succeeded, elapsed = llm_success_rate(server.base_url, args.requests)
+            rows.append(f"模型服务（失败率{args.failure_rate}，重试{retries}次）：成功{succeeded}/{args.requests}，耗时{elapsed:.2f}秒")
+
+    for retries in (0, args.retries):
+        configure(retries, breaker_threshold=0)
+        succeeded, elapsed = tts_success_rate(args.failure_rate, args.requests)
+        rows.append(f"语音合成（失败率{args.failure_rate}，重试{retries}次）：成功{succeeded}/{args.requests}，耗时{elapsed:.2f}秒")
+
+    # 服务完全不可用：关闭模拟服务后继续请求，对比有无熔断时的耗时
+    server = StubLLMServer().start()
+    base_url = server.base_url
+    server.stop()
+    for threshold in (0, 3):
+        configure(args.retries, breaker_threshold=threshold)
+        succeeded, elapsed = llm_success_rate(base_url, args.requests)
+        label = f"熔断阈值{threshold}" if threshold else "不熔断"
+        rows.append(f"模型服务不可用（{label}）：成功{succeeded}/{args.requests}，耗时{elapsed:.2f}秒")
+    # 生成失败的任务直接结束，不会再润色或合成语音
+    configure(0, breaker_threshold=0)
+    cost = failed_job_cost(base_url, args.requests)
+    nodes = "、".join(f"{name} {count}次" for name, count in cost["nodes"].items())
+    rows.append(f"模型服务不可用时的工作流任务：失败{cost['failed']}/{args.requests}，"
+                f"失败任务共执行节点：{nodes}，语音合成请求{cost['tts']}次")
+
+    print("=" * 50)
+    for row in rows:
+        print(row)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+请求调度测试：批量任务占满模型服务并发名额时，对比先到先得与按优先级、按任务公平调度时
+交互请求的等待时间和小批次任务的完成时间；并用多个进程验证 SCHEDULER_LOCK_DIR 的主机级并发上限
+
+用法：python -m benchmarks.bench_scheduler [--concurrency 2] [--big 24] [--small 4] [--interactive 3] [--processes 2]
+"""
+import time
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import src.config as config
+import src.metrics as metrics
+import src.resilience as resilience
+import src.scheduler as scheduler
+from src.text_processing import TextProcessor
+from benchmarks.stubs import StubLLMServer, disable_caches, _STUB_SENTENCES
+
+
+def _texts(prefix: str, count: int) -> list:
+    # 每个请求的文本都不同，避免被请求合并
+    return [f"{prefix}{i}。" + "".join(_STUB_SENTENCES[(i + j) % len(_STUB_SENTENCES)] for j in range(3)) for i in range(count)]
+
+
+def _configure(concurrency: int, lock_dir: str = ""):
+    config.LLM_MAX_CONCURRENCY = concurrency
+    config.SCHEDULER_LOCK_DIR = lock_dir
+    config.SINGLE_FLIGHT_ENABLED = False
+    resilience.reset_backends()
+
+
+def run_mixed(base_url: str, args, scheduled: bool) -> dict:
+    """
+    两个批量任务（一大一小）同时提交，随后交互用户逐个发起请求
+
+    scheduled 为 False 时所有请求使用相同的优先级和任务，即先到先得
+    """
+    _configure(args.concurrency)
+    processor = TextProcessor(base_url=base_url, health_check="off")
+    finished = {}
+
+    def submit(job: str, priority: str, text: str):
+        with scheduler.scheduling(priority if scheduled else "batch", job if scheduled else "all"):
+            processor.polish_text(text, "blog", use_cache=False)
+        finished[job] = time.time()
+
+    with metrics.recording() as recorder:
+        started = time.time()
+        work = [("big", text) for text in _texts("大批次", args.big)] + [("small", text) for text in _texts("小批次", args.small)]
+        with ThreadPoolExecutor(max_workers=len(work)) as executor:
+            futures = [executor.submit(metrics.bind(submit), job, "batch", text) for job, text in work]
+            time.sleep(0.3)
+            latencies = []
+            for text in _texts("交互", args.interactive):
+                request_started = time.time()
+                submit("interactive", "interactive", text)
+                latencies.append(time.time() - request_started)
+            for future in futures:
+                future.result()
+        elapsed = time.time() - started
+    return {
+        "interactive_avg": sum(latencies) / len(latencies),
+        "small_done": finished["small"] - started,
+        "elapsed": elapsed,
+        "queue": recorder.summary()["llm"]["queue"]
+    }
+
+
+def _worker(base_url: str, concurrency: int, lock_dir: str, requests: int, index: int):
+    disable_caches()
+    _configure(concurrency, lock_dir)
+    processor = TextProcessor(base_url=base_url, health_check="off")
+    with ThreadPoolExecutor(max_workers=requests) as executor:
+        list(executor.map(lambda text: processor.polish_text(text, "blog", use_cache=False),
+                          _texts(f"进程{index}-", requests)))
+
+
+def run_processes(server: StubLLMServer, args, lock_dir: str) -> dict:
+    """
+    多个进程同时请求，返回服务端观测到的最大并发请求数和耗时
+    """
+    server.max_active = 0
+    context = multiprocessing.get_context("spawn")
+    started = time.time()
+    processes = [context.Process(target=_worker, args=(server.base_url, args.concurrency, lock_dir, 6, i))
+                 for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return {"max_active": server.max_active, "elapsed": time.time() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求调度测试")
+    parser.add_argument("--concurrency", type=int, default=2, help="模型服务的并发上限（LLM_MAX_CONCURRENCY）")
+    parser.add_argument("--big", type=int, default=24, help="大批次任务的请求数")
+    parser.add_argument("--small", type=int, default=4, help="小批次任务的请求数")
+    parser.add_argument("--interactive", type=int, default=3, help="交互请求数")
+    parser.add_argument("--processes", type=int, default=2, help="跨进程测试的进程数，0 表示跳过")
+    args = parser.parse_args()
+    disable_caches()
+    rows = []
+
+    with StubLLMServer(first_token_delay=0.1, tokens_per_second=400) as server:
+        for scheduled in (False, True):
+            result = run_mixed(server.base_url, args, scheduled)
+            label = "按优先级和任务调度" if scheduled else "先到先得"
+            queue = "，".join(f"{p} 平均排队{q['avg_ms']}毫秒" for p, q in result["queue"].items())
+            rows.append(f"{label}：交互请求平均耗时{result['interactive_avg']:.2f}秒，"
+                        f"小批次完成于{result['small_done']:.2f}秒，全部完成{result['elapsed']:.2f}秒（{queue}）")
+
+        if args.processes:
+            with tempfile.TemporaryDirectory() as lock_dir:
+                for shared in (False, True):
+                    result = run_processes(server, args, lock_dir if shared else "")
+                    label = "共享主机级名额" if shared else "各进程独立限制"
+                    rows.append(f"{args.processes}个进程，每个进程并发上限{args.concurrency}（{label}）："
+                                f"服务端最大并发{result['max_active']}，耗时{result['elapsed']:.2f}秒")
+    _configure(0)
+
+    print("=" * 50)
+    for row in rows:
+        print(row)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
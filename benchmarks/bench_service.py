@@ -0,0 +1,147 @@
+"""
+HTTP 服务压测：使用本地模拟的模型服务和语音合成器启动博客生成服务，并发提交任务，
+统计任务端到端耗时（p50/p95）、吞吐量、首个文本增量延迟，并校验音频文件的 Range 请求
+
+安装了 uvicorn 时通过真实的 HTTP 端口访问服务，否则通过 httpx 的 ASGI 传输在进程内调用。
+
+用法：python -m benchmarks.bench_service [--jobs 20] [--max-jobs 4] [--length short]
+"""
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import httpx
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from langgraph.service import BlogService, create_app
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+from benchmarks.run_benchmarks import _percentile
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app):
+    """
+    在后台线程中用 uvicorn 启动服务，返回 (服务地址, 停止函数)；未安装 uvicorn 时返回 (None, None)
+    """
+    try:
+        import uvicorn
+    except ImportError:
+        return None, None
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+async def run_job(client: httpx.AsyncClient, topic: str, length: str) -> dict:
+    """
+    提交一个任务并订阅其 SSE 进度，直到任务结束
+    """
+    started = time.perf_counter()
+    response = await client.post("/jobs", json={"topic": topic, "length": length, "with_tts": True})
+    response.raise_for_status()
+    job = response.json()
+    first_delta = None
+    async with client.stream("GET", job["links"]["events"]) as events:
+        event = None
+        async for line in events.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+                if event == "delta" and first_delta is None:
+                    first_delta = time.perf_counter() - started
+    job = (await client.get(job["links"]["self"])).json()
+    return {
+        "job": job,
+        "latency_ms": (time.perf_counter() - started) * 1000,
+        "first_delta_ms": first_delta * 1000 if first_delta is not None else None
+    }
+
+
+async def check_range(client: httpx.AsyncClient, job: dict) -> str:
+    audio = job["links"]["audio"]
+    if not audio:
+        return "无音频文件"
+    full = await client.get(audio)
+    partial = await client.get(audio, headers={"Range": "bytes=100-1123"})
+    tail = await client.get(audio, headers={"Range": "bytes=-100"})
+    ok = (partial.status_code == 206 and partial.content == full.content[100:1124]
+          and tail.content == full.content[-100:])
+    return f"{'通过' if ok else '失败'}（完整{len(full.content)}字节，Content-Range: {partial.headers.get('content-range')}）"
+
+
+async def load_test(app, base_url: str, jobs: int, length: str) -> dict:
+    transport = None if base_url else httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(base_url=base_url or "http://service", transport=transport, timeout=None) as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(*[run_job(client, f"压测主题 {i}", length) for i in range(jobs)])
+        elapsed = time.perf_counter() - started
+        health = (await client.get("/health")).json()
+        range_check = await check_range(client, results[0]["job"])
+
+    latencies = [r["latency_ms"] for r in results]
+    first_deltas = [r["first_delta_ms"] for r in results if r["first_delta_ms"] is not None]
+    return {
+        "jobs": jobs,
+        "failed": sum(1 for r in results if r["job"]["status"] != "succeeded"),
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "first_delta_p50_ms": round(_percentile(first_deltas, 50), 1) if first_deltas else None,
+        "jobs_per_minute": round(jobs / elapsed * 60, 2),
+        "health": health,
+        "range": range_check
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 服务压测")
+    parser.add_argument("--jobs", type=int, default=20, help="并发提交的任务数")
+    parser.add_argument("--max-jobs", type=int, default=4, help="服务同时执行的任务数")
+    parser.add_argument("--length", default="short", choices=["short", "medium", "long"], help="博客长度")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="模拟生成速度")
+    args = parser.parse_args()
+    disable_caches()
+
+    factory = make_fake_synthesizer_factory(first_package_delay=0.1, chunk_delay=0)
+    with StubLLMServer(first_token_delay=0.1, tokens_per_second=args.tokens_per_second) as llm, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs("results", exist_ok=True)
+        workflow = BlogWorkflow(TextProcessor(base_url=llm.base_url), TTSService(synthesizer_factory=factory),
+                                checkpointer=False)
+        app = create_app(BlogService(workflow, max_jobs=args.max_jobs))
+        base_url, stop = serve(app)
+        try:
+            report = asyncio.run(load_test(app, base_url, args.jobs, args.length))
+        finally:
+            if stop:
+                stop()
+
+    print("=" * 50)
+    print(f"传输方式：{'HTTP ' + base_url if base_url else '进程内 ASGI'}，任务数{args.jobs}，服务并发{args.max_jobs}")
+    print(f"任务耗时：p50 {report['p50_ms']}毫秒，p95 {report['p95_ms']}毫秒；首个文本增量 p50 {report['first_delta_p50_ms']}毫秒")
+    print(f"吞吐量：{report['jobs_per_minute']} 任务/分钟，失败{report['failed']}个")
+    print(f"Range 请求：{report['range']}")
+    print(f"服务状态：{json.dumps(report['health'], ensure_ascii=False)}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
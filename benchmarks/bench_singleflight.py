@@ -0,0 +1,61 @@
+"""
+请求合并测试：多个线程同时发起相同的润色请求和语音合成请求，对比开启和关闭 single-flight 时的
+后端调用次数和总耗时（模型回复缓存和音频缓存均关闭）
+
+用法：python -m benchmarks.bench_singleflight [--callers 8] [--distinct 2]
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import src.config as config
+import src.metrics as metrics
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches, _STUB_SENTENCES
+
+
+def burst(fn, inputs: list) -> float:
+    """
+    所有调用同时开始，返回全部完成的耗时
+    """
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=len(inputs)) as executor:
+        list(executor.map(metrics.bind(fn), inputs))
+    return time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求合并测试")
+    parser.add_argument("--callers", type=int, default=8, help="同时发起请求的调用方数量")
+    parser.add_argument("--distinct", type=int, default=2, help="其中不同请求的数量")
+    args = parser.parse_args()
+    disable_caches()
+
+    paragraphs = ["".join(_STUB_SENTENCES[(i + j) % len(_STUB_SENTENCES)] for j in range(4)) for i in range(args.distinct)]
+    inputs = [paragraphs[i % args.distinct] for i in range(args.callers)]
+    factory = make_fake_synthesizer_factory(first_package_delay=0.2, seconds_per_char=0.002, chunk_delay=0)
+    rows = []
+
+    with StubLLMServer(first_token_delay=0.2, tokens_per_second=200) as server:
+        processor = TextProcessor(base_url=server.base_url, health_check="off")
+        tts_service = TTSService(synthesizer_factory=factory)
+        for enabled in (False, True):
+            config.SINGLE_FLIGHT_ENABLED = enabled
+            with metrics.recording() as recorder:
+                polish_seconds = burst(lambda text: processor.polish_text(text, "blog"), inputs)
+                tts_seconds = burst(tts_service.synthesize_chunk, inputs)
+            summary = recorder.summary()
+            label = "开启合并" if enabled else "关闭合并"
+            rows.append(f"{label}：润色 {args.callers}次调用 → 模型请求{summary['llm']['requests']}次"
+                        f"（合并{summary['llm']['coalesced']}次），耗时{polish_seconds:.2f}秒；"
+                        f"合成 {args.callers}次调用 → 合成请求{summary['tts']['requests']}次"
+                        f"（合并{summary['tts']['coalesced']}次），耗时{tts_seconds:.2f}秒")
+
+    print("=" * 50)
+    for row in rows:
+        print(row)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+启动耗时基准测试：对比每个组件各自创建客户端与使用共享客户端注册表的初始化耗时
+
+用法：python -m benchmarks.bench_startup [--runs 5] [--models-delay 0.2]
+"""
+import os
+import time
+import argparse
+from benchmarks.stubs import StubLLMServer
+
+
+def build_standalone(base_url: str):
+    """
+    模拟改造前的行为：工作流和博客生成器各自创建客户端和缓存，且每个客户端创建时都检查连通性
+    """
+    import src.config as config
+    import src.text_processing as text_processing
+    from src.text_processing import TextProcessor
+    from src.tts_service import TTSService
+    from src.cache import LLMCache, AudioCache
+    from src.blog_generator import BlogGenerator
+    from langgraph.workflow import BlogWorkflow
+
+    def new_text_processor():
+        text_processing._checked_endpoints.clear()
+        return TextProcessor(base_url=base_url, health_check="eager",
+                             cache=LLMCache(config.LLM_CACHE_PATH, config.LLM_CACHE_TTL, config.LLM_CACHE_MAX_BYTES))
+
+    def new_tts_service():
+        return TTSService(cache=AudioCache(config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_BYTES))
+
+    workflow = BlogWorkflow(new_text_processor(), new_tts_service())
+    workflow.blog_generator = BlogGenerator(new_text_processor(), new_tts_service())
+    return workflow
+
+
+def build_shared():
+    """
+    使用共享客户端注册表创建工作流，连通性检查推迟到第一次请求
+    """
+    from langgraph.workflow import BlogWorkflow
+    return BlogWorkflow()
+
+
+def timed(fn, runs: int) -> list:
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每种方式创建工作流的次数")
+    parser.add_argument("--models-delay", type=float, default=0.2, help="模拟连通性检查的往返耗时（秒）")
+    args = parser.parse_args()
+
+    with StubLLMServer(models_delay=args.models_delay) as server:
+        os.environ["OPENAI_API_URL"] = server.base_url
+
+        # 先导入一次依赖，避免把模块导入耗时计入第一种方式
+        from src.clients import get_text_processor, reset_clients
+        import langgraph.workflow  # noqa: F401
+
+        standalone = timed(lambda: build_standalone(server.base_url), args.runs)
+        standalone_checks = server.models_request_count
+
+        reset_clients()
+        server.models_request_count = 0
+        shared = timed(build_shared, args.runs)
+        started = time.perf_counter()
+        get_text_processor().polish_text("连通性检查在第一次请求前执行。")
+        first_request = (time.perf_counter() - started) * 1000
+        shared_checks = server.models_request_count
+
+    print("=" * 50)
+    print(f"创建工作流{args.runs}次，模拟连通性检查耗时{args.models_delay * 1000:.0f}毫秒")
+    print(f"各自创建客户端：首次{standalone[0]:.0f}毫秒，平均{sum(standalone) / len(standalone):.0f}毫秒，"
+          f"连通性检查{standalone_checks}次")
+    print(f"共享客户端注册表：首次{shared[0]:.0f}毫秒，平均{sum(shared) / len(shared):.0f}毫秒，"
+          f"连通性检查{shared_checks}次")
+    print(f"共享客户端的第一次请求（含连通性检查）：{first_request:.0f}毫秒")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
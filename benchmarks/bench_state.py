@@ -0,0 +1,100 @@
+"""
+工作流状态基准测试：统计每个任务的检查点大小、检查点数量和峰值内存，
+可对比大文本内联保存与按引用保存（WORKFLOW_TEXT_REF_CHARS）
+
+用法：python -m benchmarks.bench_state [--jobs 4] [--length long] [--mode sequential] [--ref-chars 0 500]
+"""
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+import tracemalloc
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from langgraph.persistence import ThreadedSqliteSaver
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+
+
+def checkpoint_size(conn: sqlite3.Connection, thread_id: str) -> dict:
+    """
+    统计一个线程的检查点数量和序列化后的字节数（检查点本身加上节点写入）
+    """
+    count, checkpoint_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?",
+        (thread_id,)
+    ).fetchone()
+    write_bytes = conn.execute(
+        "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?", (thread_id,)
+    ).fetchone()[0]
+    return {"checkpoints": count, "bytes": checkpoint_bytes + write_bytes}
+
+
+def run_jobs(workflow: BlogWorkflow, conn: sqlite3.Connection, job_config: dict, jobs: int, label: str) -> dict:
+    checkpoints, sizes, peaks, seconds = [], [], [], []
+    for i in range(jobs):
+        thread_id = f"bench-{label}-{i}"
+        tracemalloc.start()
+        started = time.time()
+        result = workflow.run({**job_config, "topic": f"{job_config['topic']} {i}"}, thread_id=thread_id, resume=False)
+        seconds.append(time.time() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        size = checkpoint_size(conn, thread_id)
+        checkpoints.append(size["checkpoints"])
+        sizes.append(size["bytes"])
+    return {
+        "checkpoints": sum(checkpoints) / jobs,
+        "kb": sum(sizes) / jobs / 1024,
+        "peak_mb": sum(peaks) / jobs / 1024 / 1024,
+        "seconds": sum(seconds) / jobs,
+        "chars": len(result["polished_text"])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流状态基准测试")
+    parser.add_argument("--jobs", type=int, default=4, help="每种配置执行的任务数")
+    parser.add_argument("--length", default="long", choices=["short", "medium", "long"], help="博客长度")
+    parser.add_argument("--mode", default="sequential", choices=["sequential", "pipelined", "outline"], help="执行模式")
+    parser.add_argument("--with-tts", action="store_true", help="同时合成语音")
+    parser.add_argument("--ref-chars", type=int, nargs="+", default=[0, 500],
+                        help="依次测试的 WORKFLOW_TEXT_REF_CHARS 取值，0 表示文本全部内联保存")
+    args = parser.parse_args()
+    disable_caches()
+
+    job_config = {"topic": "AI 技术在医疗领域的应用", "length": args.length, "with_tts": args.with_tts,
+                  "polish_type": "blog", "mode": args.mode}
+    factory = make_fake_synthesizer_factory(first_package_delay=0.01, seconds_per_char=0.0001, chunk_delay=0)
+    rows = []
+
+    with StubLLMServer(first_token_delay=0.05, tokens_per_second=2000) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        conn = sqlite3.connect(os.path.join(tmp, "checkpoints.db"), check_same_thread=False)
+        try:
+            text_processor = TextProcessor(base_url=server.base_url)
+            tts_service = TTSService(synthesizer_factory=factory)
+            for ref_chars in args.ref_chars:
+                workflow = BlogWorkflow(text_processor, tts_service, checkpointer=ThreadedSqliteSaver(conn),
+                                        text_ref_chars=ref_chars)
+                rows.append((ref_chars, run_jobs(workflow, conn, job_config, args.jobs, f"ref{ref_chars}")))
+        finally:
+            conn.close()
+            os.chdir(cwd)
+
+    print("=" * 50)
+    print(f"博客长度：{args.length}，执行模式：{args.mode}，每种配置{args.jobs}个任务（数值为每个任务的平均值）")
+    for ref_chars, row in rows:
+        label = f"超过{ref_chars}字符按引用保存" if ref_chars else "文本内联保存"
+        print(f"{label}：检查点{row['checkpoints']:.0f}个，共{row['kb']:.1f}KB；峰值内存{row['peak_mb']:.2f}MB；"
+              f"耗时{row['seconds']:.2f}秒（润色后{row['chars']}字符）")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
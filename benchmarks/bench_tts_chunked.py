@@ -0,0 +1,96 @@
+"""
+分段并行合成基准测试：对比整段合成与分段并行合成的耗时和峰值内存，并校验输出文件的扩展名与实际格式一致
+
+用法：python -m benchmarks.bench_tts_chunked [--chars 1500] [--workers 4] [--chunk-size 300] [--format wav]
+"""
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+from src.tts_service import TTSService
+from src.audio_utils import detect_format
+from benchmarks.stubs import make_fake_synthesizer_factory, disable_caches
+
+# --format 对应的合成器输出格式
+FORMATS = {
+    "wav": "WAV_22050HZ_MONO_16BIT",
+    "mp3": "MP3_22050HZ_MONO_256KBPS",
+    "pcm": "PCM_22050HZ_MONO_16BIT"
+}
+
+SAMPLE_PARAGRAPH = (
+    "人工智能正在深刻改变医疗行业。从影像诊断到药物研发，算法正在帮助医生更快地做出判断！"
+    "这些变化会带来哪些新的挑战？我们需要在效率与安全之间找到平衡。\n\n"
+)
+
+
+def build_text(chars: int) -> str:
+    return (SAMPLE_PARAGRAPH * (chars // len(SAMPLE_PARAGRAPH) + 1))[:chars]
+
+
+def run_once(service: TTSService, text: str, output_file: str) -> dict:
+    """
+    合成一次，返回耗时、峰值内存和输出文件的实际格式
+    """
+    tracemalloc.start()
+    started = time.time()
+    success = service.text_to_speech(text, output_file, stream=False)
+    elapsed = time.time() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if not success:
+        return None
+    with open(output_file, "rb") as f:
+        detected = detect_format(f.read(16))
+    return {"seconds": elapsed, "peak_mb": peak / 1024 / 1024, "file": os.path.basename(output_file), "detected": detected,
+            "bytes": os.path.getsize(output_file)}
+
+
+def format_run(result) -> str:
+    if result is None:
+        return "失败"
+    return (f"{result['seconds']:.2f}秒，峰值内存{result['peak_mb']:.1f}MB，"
+            f"{result['file']}（文件头识别为 {result['detected']}，{result['bytes']}字节）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分段并行合成基准测试")
+    parser.add_argument("--chars", type=int, default=1500, help="文本长度（字符）")
+    parser.add_argument("--chunk-size", type=int, default=300, help="每段最大字符数")
+    parser.add_argument("--workers", type=int, default=4, help="并发合成线程数")
+    parser.add_argument("--first-package-delay", type=float, default=0.3, help="模拟首包延迟（秒）")
+    parser.add_argument("--seconds-per-char", type=float, default=0.002, help="模拟每字符合成耗时（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="模拟单次调用失败概率")
+    parser.add_argument("--format", default="wav", choices=list(FORMATS), help="合成器输出格式（pcm 保存时封装为 WAV）")
+    args = parser.parse_args()
+    disable_caches()
+
+    factory = make_fake_synthesizer_factory(
+        first_package_delay=args.first_package_delay,
+        seconds_per_char=args.seconds_per_char,
+        failure_rate=args.failure_rate,
+        chunk_delay=0,
+    )
+    text = build_text(args.chars)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_format = FORMATS[args.format]
+        single = TTSService(synthesizer_factory=factory, chunk_size=0, audio_format=audio_format)
+        chunked = TTSService(synthesizer_factory=factory, chunk_size=args.chunk_size, max_workers=args.workers,
+                             audio_format=audio_format)
+
+        single_run = run_once(single, text, os.path.join(tmp, f"single{single.extension}"))
+        chunked_run = run_once(chunked, text, os.path.join(tmp, f"chunked{chunked.extension}"))
+
+    print("=" * 50)
+    print(f"文本长度：{len(text)}字符，每段最多{args.chunk_size}字符，并发数{args.workers}，格式{audio_format}")
+    print(f"整段合成：{format_run(single_run)}")
+    print(f"分段并行合成：{format_run(chunked_run)}")
+    if single_run and chunked_run:
+        print(f"加速比：{single_run['seconds'] / chunked_run['seconds']:.2f}x")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+多进程批量执行测试：语音合成后包含纯 CPU 的后处理（模拟转码）时，对比单进程线程池与多个工作进程的吞吐量，
+并验证工作进程崩溃后自动重启、中断的任务重新执行
+
+用法：python -m benchmarks.bench_workers [--jobs 12] [--processes 1 2 4] [--cpu-ms-per-char 0.5]
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from langgraph.batch import BatchRunner
+from langgraph.workers import ProcessBatchRunner
+from benchmarks.stubs import StubLLMServer, FakeSpeechSynthesizer, disable_caches
+
+# 标题中包含该标记的任务第一次保存博客时让工作进程直接退出
+CRASH_TOPIC = "崩溃测试"
+
+
+class EncodingSynthesizer(FakeSpeechSynthesizer):
+    """
+    合成后占用与文本长度成正比的 CPU 时间，模拟转码等持有 GIL 的后处理
+    """
+    first_package_delay = 0.02
+    chunk_delay = 0
+    cpu_seconds_per_char = 0.0005
+
+    def _audio_for(self, text: str) -> bytes:
+        deadline = time.thread_time() + self.cpu_seconds_per_char * len(text)
+        while time.thread_time() < deadline:
+            pass
+        return super()._audio_for(text)
+
+
+class CrashingWorkflow(BlogWorkflow):
+    """
+    标题包含 CRASH_TOPIC 的任务在标记文件不存在时创建标记并结束进程，模拟执行中途崩溃
+    """
+    crash_marker = None
+
+    def save_blog(self, state):
+        if CRASH_TOPIC in state["config"]["topic"] and not os.path.exists(self.crash_marker):
+            open(self.crash_marker, "w").close()
+            os._exit(1)
+        return super().save_blog(state)
+
+
+def bench_workflow(base_url: str, cpu_seconds_per_char: float, crash_marker: str = None) -> BlogWorkflow:
+    """
+    创建使用模拟后端的工作流；作为 workflow_factory 在每个工作进程中调用
+    """
+    disable_caches()
+    factory = type("EncodingSynthesizer", (EncodingSynthesizer,), {"cpu_seconds_per_char": cpu_seconds_per_char})
+    text_processor = TextProcessor(base_url=base_url, health_check="off")
+    tts_service = TTSService(synthesizer_factory=factory)
+    if crash_marker:
+        workflow = type("CrashingWorkflow", (CrashingWorkflow,), {"crash_marker": crash_marker})
+        return workflow(text_processor, tts_service, checkpointer=False)
+    return BlogWorkflow(text_processor, tts_service, checkpointer=False)
+
+
+def _jobs(count: int, prefix: str) -> list:
+    return [{"topic": f"{prefix} {i}", "length": "medium", "with_tts": True, "polish_type": "blog",
+             "mode": "sequential"} for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程批量执行测试")
+    parser.add_argument("--jobs", type=int, default=12, help="每种配置执行的任务数")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4], help="依次测试的工作进程数")
+    parser.add_argument("--threads", type=int, default=4, help="单进程线程池和多进程两种方式同时执行的任务总数")
+    parser.add_argument("--cpu-ms-per-char", type=float, default=0.5, help="语音合成后每个字符占用的 CPU 毫秒数")
+    args = parser.parse_args()
+    disable_caches()
+    cpu = args.cpu_ms_per_char / 1000
+    rows = []
+
+    with StubLLMServer(first_token_delay=0.05, tokens_per_second=2000) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            runner = BatchRunner(args.threads, workflow=bench_workflow(server.base_url, cpu), resume=False)
+            report = runner.run(_jobs(args.jobs, "线程池"))
+            rows.append((f"单进程线程池（{args.threads}个任务并发）", report))
+
+            for processes in args.processes:
+                runner = ProcessBatchRunner(processes, max_jobs=max(1, args.threads // processes), resume=False,
+                                            workflow_factory=bench_workflow, factory_args=(server.base_url, cpu))
+                report = runner.run(_jobs(args.jobs, f"{processes}进程"))
+                rows.append((f"{processes}个工作进程（每个进程{runner.max_jobs}个任务并发）", report))
+
+            runner = ProcessBatchRunner(2, resume=False, workflow_factory=bench_workflow,
+                                        factory_args=(server.base_url, cpu, os.path.join(tmp, "crashed")))
+            report = runner.run(_jobs(3, "正常") + _jobs(1, CRASH_TOPIC))
+            rows.append(("2个工作进程，其中一个任务执行中崩溃", report))
+        finally:
+            os.chdir(cwd)
+
+    print("=" * 50)
+    print(f"CPU 核数：{os.cpu_count()}，每种配置{args.jobs}个任务，后处理每字符{args.cpu_ms_per_char}毫秒 CPU")
+    for label, report in rows:
+        line = (f"{label}：成功{report['succeeded']}/{report['total_jobs']}，耗时{report['elapsed_seconds']}秒，"
+                f"吞吐量{report['episodes_per_hour']}期/小时")
+        if "worker_restarts" in report:
+            line += f"（其中启动和预热{report['worker_startup_seconds']}秒），重启工作进程{report['worker_restarts']}次"
+        print(line)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
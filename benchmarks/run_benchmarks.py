@@ -0,0 +1,228 @@
+"""
+离线基准测试套件：使用本地模拟的模型服务和语音合成器，测量主要入口在不同博客长度下的性能
+
+每个场景在独立的子进程中执行，以便分别统计峰值内存；结果保存为JSON，可与之前的结果对比。
+
+用法：
+    python -m benchmarks.run_benchmarks [--runs 5] [--lengths short medium long] [--baseline 旧结果.json]
+    python -m benchmarks.run_benchmarks --compare 旧结果.json 新结果.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime
+from benchmarks.stubs import StubLLMServer, make_fake_synthesizer_factory, disable_caches
+
+SCENARIOS = ["generate_blog", "workflow", "batch_tts"]
+LENGTHS = ["short", "medium", "long"]
+
+# batch_tts 场景中不同长度对应的段落数
+BATCH_TTS_PARAGRAPHS = {"short": 3, "medium": 6, "long": 12}
+SAMPLE_PARAGRAPH = "人工智能正在深刻改变医疗行业。从影像诊断到药物研发，算法正在帮助医生更快地做出判断！我们需要在效率与安全之间找到平衡。"
+TOPIC = "AI 技术在医疗领域的应用"
+
+
+def _percentile(values: list, percent: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _peak_rss_mb() -> float:
+    # Linux 上 ru_maxrss 的单位为KB，macOS 上为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_scenario(scenario: str, length: str, runs: int, base_url: str, tts_options: dict) -> dict:
+    """
+    在子进程中执行一个场景，返回每次的耗时和失败次数
+    """
+    disable_caches()
+    from src.text_processing import TextProcessor
+    from src.tts_service import TTSService
+    from src.blog_generator import BlogGenerator
+    from langgraph.workflow import BlogWorkflow
+    import src.config as config
+
+    factory = make_fake_synthesizer_factory(**tts_options)
+    text_processor = TextProcessor(base_url=base_url)
+    tts_service = TTSService(synthesizer_factory=factory)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs(config.RESULTS_DIR, exist_ok=True)
+
+        if scenario == "generate_blog":
+            generator = BlogGenerator(text_processor, tts_service)
+
+            def run_once() -> bool:
+                result = generator.generate_blog(TOPIC, length, with_tts=True)
+                return bool(result.get("polished_text"))
+        elif scenario == "workflow":
+            workflow = BlogWorkflow(text_processor, tts_service)
+
+            def run_once() -> bool:
+                result = workflow.run({"topic": TOPIC, "length": length, "with_tts": True, "polish_type": "blog"})
+                return not result.get("error")
+        else:
+            paragraphs = [f"第{i + 1}段。{SAMPLE_PARAGRAPH}" for i in range(BATCH_TTS_PARAGRAPHS[length])]
+
+            def run_once() -> bool:
+                return len(tts_service.batch_text_to_speech(paragraphs, "output")) == len(paragraphs)
+
+        latencies = []
+        failures = 0
+        started = time.perf_counter()
+        for _ in range(runs):
+            run_started = time.perf_counter()
+            try:
+                ok = run_once()
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - run_started) * 1000)
+            failures += 0 if ok else 1
+        elapsed = time.perf_counter() - started
+
+    return {"latencies_ms": latencies, "failures": failures, "elapsed_seconds": elapsed, "peak_rss_mb": _peak_rss_mb()}
+
+
+def summarize(raw: dict) -> dict:
+    latencies = raw["latencies_ms"]
+    runs = len(latencies)
+    return {
+        "runs": runs,
+        "failures": raw["failures"],
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "mean_ms": round(sum(latencies) / runs, 1),
+        "throughput_per_minute": round(runs / raw["elapsed_seconds"] * 60, 2),
+        "peak_rss_mb": raw["peak_rss_mb"]
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(args) -> dict:
+    """
+    启动模拟服务并依次执行所有场景
+    """
+    tts_options = {
+        "first_package_delay": args.tts_first_package_delay,
+        "seconds_per_char": args.tts_seconds_per_char,
+        "bytes_per_char": args.tts_bytes_per_char,
+        "failure_rate": args.tts_failure_rate,
+        "chunk_delay": 0,
+    }
+    results = {}
+    # spawn 保证每个场景从干净的进程开始，峰值内存互不影响
+    context = multiprocessing.get_context("spawn")
+    with StubLLMServer(first_token_delay=args.first_token_delay, tokens_per_second=args.tokens_per_second,
+                       failure_rate=args.llm_failure_rate) as server:
+        for scenario in args.scenarios:
+            for length in args.lengths:
+                name = f"{scenario}/{length}"
+                print(f"正在运行 {name}（{args.runs}次）...")
+                with context.Pool(1) as pool:
+                    raw = pool.apply(_run_scenario, (scenario, length, args.runs, server.base_url, tts_options))
+                results[name] = summarize(raw)
+                print(f"  p50 {results[name]['p50_ms']}毫秒，p95 {results[name]['p95_ms']}毫秒，"
+                      f"峰值内存 {results[name]['peak_rss_mb']}MB，失败{results[name]['failures']}次")
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "llm": {"first_token_delay": args.first_token_delay, "tokens_per_second": args.tokens_per_second,
+                    "failure_rate": args.llm_failure_rate},
+            "tts": tts_options
+        },
+        "results": results
+    }
+
+
+def _change(old, new) -> str:
+    if old is None or new is None:
+        return "-"
+    if old == 0:
+        return "-" if new == 0 else "+inf"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(baseline: dict, current: dict):
+    """
+    逐个场景对比两次结果，耗时和内存增加、吞吐量下降即为退化
+    """
+    fields = [("p50_ms", "p50"), ("p95_ms", "p95"), ("throughput_per_minute", "吞吐量/分钟"), ("peak_rss_mb", "峰值内存MB")]
+    print("=" * 50)
+    print(f"基准：{baseline['meta'].get('created_at')}（{baseline['meta'].get('git_commit')}）")
+    print(f"当前：{current['meta'].get('created_at')}（{current['meta'].get('git_commit')}）")
+    print("=" * 50)
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        old = baseline["results"].get(name)
+        new = current["results"].get(name)
+        if old is None or new is None:
+            print(f"{name}：仅存在于{'当前' if old is None else '基准'}结果中")
+            continue
+        parts = [f"{label} {old[field]} → {new[field]}（{_change(old[field], new[field])}）" for field, label in fields]
+        print(f"{name}：" + "，".join(parts))
+    print("=" * 50)
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线基准测试套件")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="只对比两个已保存的结果文件")
+    parser.add_argument("--baseline", help="运行结束后与该结果文件对比")
+    parser.add_argument("--output", help="结果文件路径，默认 results/benchmarks/bench_时间戳.json")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景的执行次数")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS, help="要运行的场景")
+    parser.add_argument("--lengths", nargs="+", default=LENGTHS, choices=LENGTHS, help="博客长度")
+    parser.add_argument("--first-token-delay", type=float, default=0.1, help="模拟首token延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="模拟生成速度")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="模拟模型请求失败概率")
+    parser.add_argument("--tts-first-package-delay", type=float, default=0.1, help="模拟TTS首包延迟（秒）")
+    parser.add_argument("--tts-seconds-per-char", type=float, default=0.001, help="模拟TTS每字符耗时（秒）")
+    parser.add_argument("--tts-bytes-per-char", type=int, default=2048, help="模拟每字符音频字节数")
+    parser.add_argument("--tts-failure-rate", type=float, default=0.0, help="模拟TTS调用失败概率")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(_load(args.compare[0]), _load(args.compare[1]))
+        return
+
+    report = run_suite(args)
+    output = args.output or os.path.join("results", "benchmarks", f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存至: {output}")
+
+    if args.baseline:
+        compare(_load(args.baseline), report)
+
+
+if __name__ == "__main__":
+    main()
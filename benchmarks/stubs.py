@@ -0,0 +1,341 @@
+# 本地模拟后端，用于在不访问 Ollama / DashScope 的情况下测试和压测
+import time
+import uuid
+import random
+import threading
+import io
+import re
+import json
+import wave
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeSpeechSynthesizer:
+    """
+    模拟 dashscope.audio.tts_v2.SpeechSynthesizer 的本地实现
+
+    接口与真实合成器保持一致：未设置 callback 时 call 阻塞并返回完整音频；
+    设置 callback 时 call 立即返回 None，音频分片通过 callback.on_data 推送。
+    """
+
+    # 以下类属性可通过 make_fake_synthesizer_factory 覆盖
+    first_package_delay = 0.2  # 首包延迟（秒）
+    seconds_per_char = 0.0  # 每个字符额外的合成耗时（秒），模拟耗时随文本长度增长
+    chunk_size = 4096  # 每个音频分片的字节数
+    chunk_delay = 0.01  # 相邻分片之间的间隔（秒）
+    bytes_per_char = 2048  # 每个字符对应的音频字节数
+    failure_rate = 0.0  # 随机失败概率
+    audio_format = "mp3"  # 未通过 format 参数指定格式时的输出格式：mp3、wav 或 pcm
+    sample_rate = 22050  # wav / pcm 输出的采样率
+
+    def __init__(self, model, voice, callback=None, **kwargs):
+        self.model = model
+        self.voice = voice
+        self.callback = callback
+        self.kwargs = kwargs
+        self._request_id = None
+        self._first_package_delay_ms = None
+
+    def _format(self) -> tuple:
+        # 与真实合成器一样按 format 参数（dashscope AudioFormat）输出，DEFAULT 时使用类属性
+        audio_format = self.kwargs.get("format")
+        if audio_format is not None and audio_format.format in ("mp3", "wav", "pcm", "opus"):
+            return audio_format.format, audio_format.sample_rate
+        return self.audio_format, self.sample_rate
+
+    def _audio_for(self, text: str) -> bytes:
+        size = max(len(text), 1) * self.bytes_per_char
+        # 以文本内容为种子，相同文本产生相同音频，便于校验拼接顺序
+        pattern = text.encode("utf-8") or b"\x00"
+        audio = (pattern * (size // len(pattern) + 1))[:size]
+        audio_format, sample_rate = self._format()
+        if audio_format == "wav":
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(sample_rate)
+                w.writeframes(audio[:len(audio) // 2 * 2])
+            return buffer.getvalue()
+        if audio_format == "pcm":
+            return audio[:len(audio) // 2 * 2]
+        return audio
+
+    def _chunks(self, text: str):
+        audio = self._audio_for(text)
+        for i in range(0, len(audio), self.chunk_size):
+            yield audio[i:i + self.chunk_size]
+
+    def _run(self, text: str, emit):
+        started = time.time()
+        time.sleep(self.first_package_delay + self.seconds_per_char * len(text))
+        if random.random() < self.failure_rate:
+            raise RuntimeError("模拟合成失败")
+        for i, chunk in enumerate(self._chunks(text)):
+            if i == 0:
+                self._first_package_delay_ms = (time.time() - started) * 1000
+            else:
+                time.sleep(self.chunk_delay)
+            emit(chunk)
+
+    def call(self, text: str, timeout_millis=None):
+        self._request_id = uuid.uuid4().hex
+        if self.callback is None:
+            buffer = bytearray()
+            self._run(text, buffer.extend)
+            return bytes(buffer)
+
+        def worker():
+            try:
+                self._run(text, self.callback.on_data)
+            except Exception as e:
+                self.callback.on_error(str(e))
+            else:
+                self.callback.on_complete()
+            finally:
+                self.callback.on_close()
+
+        threading.Thread(target=worker, daemon=True).start()
+        return None
+
+    def get_last_request_id(self):
+        return self._request_id
+
+    def get_first_package_delay(self):
+        return self._first_package_delay_ms
+
+
+def disable_caches():
+    """
+    关闭模型回复缓存和音频缓存，保证基准测试每次都真正请求模拟后端
+
+    需要在创建 TextProcessor / TTSService 之前调用
+    """
+    import src.config as config
+    config.LLM_CACHE_ENABLED = False
+    config.TTS_CACHE_ENABLED = False
+
+
+def make_fake_synthesizer_factory(**overrides):
+    """
+    创建带自定义参数的模拟合成器工厂，可直接传给 TTSService(synthesizer_factory=...)
+
+    Args:
+        overrides: 覆盖 FakeSpeechSynthesizer 的类属性，如 first_package_delay、failure_rate
+
+    Returns:
+        FakeSpeechSynthesizer 的子类
+    """
+    return type("FakeSpeechSynthesizer", (FakeSpeechSynthesizer,), overrides)
+
+
+# 模拟博客正文使用的句子素材
+_STUB_SENTENCES = [
+    "人工智能正在深刻改变我们的生活方式。",
+    "从智能助手到自动驾驶，新技术层出不穷！",
+    "这些变化背后有哪些值得思考的问题？",
+    "我们需要在效率与安全之间找到平衡。",
+    "只有持续学习，才能跟上时代的步伐。",
+]
+
+# 不同长度要求对应的段落数
+_STUB_PARAGRAPHS = {"约300字": 2, "约500-800字": 4, "约1000字以上": 8}
+
+
+def stub_completion_text(messages: list) -> str:
+    """
+    根据请求内容生成确定性的模拟回复
+
+    润色请求原样返回待润色的文本（便于校验分段处理后拼接结果一致），
+    大纲请求返回 JSON 大纲，大纲中单个部分的请求返回两段正文，
+    生成请求按长度要求返回若干段落。
+    """
+    prompt = messages[-1]["content"] if messages else ""
+    match = re.search(r"原始文本：\n(.*)\n\n润色后的文本：", prompt, re.S)
+    if match:
+        return match.group(1).strip()
+
+    match = re.search(r"(\d+)个正文章节", prompt)
+    if match and "只输出JSON" in prompt:
+        topic_match = re.search(r"主题：(.*)", prompt)
+        topic = topic_match.group(1).strip() if topic_match else "模拟主题"
+        return json.dumps({
+            "title": topic,
+            "intro": _STUB_SENTENCES[0],
+            "sections": [{"heading": f"第{i + 1}部分", "points": _STUB_SENTENCES[i % len(_STUB_SENTENCES)]}
+                         for i in range(int(match.group(1)))],
+            "conclusion": _STUB_SENTENCES[-1]
+        }, ensure_ascii=False)
+
+    match = re.search(r"本部分：(.*)", prompt)
+    if match:
+        offset = sum(match.group(1).encode("utf-8")) % len(_STUB_SENTENCES)
+        return "\n\n".join(
+            "".join(_STUB_SENTENCES[(offset + i + j) % len(_STUB_SENTENCES)] for j in range(4)) for i in range(2)
+        )
+
+    paragraphs = 3
+    for hint, count in _STUB_PARAGRAPHS.items():
+        if hint in prompt:
+            paragraphs = count
+    topic_match = re.search(r"主题：(.*)", prompt)
+    topic = topic_match.group(1).strip() if topic_match else "模拟主题"
+
+    parts = [f"# {topic}"]
+    for i in range(paragraphs):
+        parts.append("".join(_STUB_SENTENCES[(i + j) % len(_STUB_SENTENCES)] for j in range(4)))
+    return "\n\n".join(parts)
+
+
+def _split_tokens(text: str, chars_per_token: int = 2) -> list:
+    return [text[i:i + chars_per_token] for i in range(0, len(text), chars_per_token)]
+
+
+class StubLLMServer:
+    """
+    本地 OpenAI 兼容模拟服务，支持 /v1/models 和 /v1/chat/completions（含 stream=True）
+
+    用法：
+        with StubLLMServer(first_token_delay=0.2, tokens_per_second=50) as server:
+            processor = TextProcessor(base_url=server.base_url)
+    """
+
+    def __init__(self, first_token_delay: float = 0.2, tokens_per_second: float = 100.0,
+                 failure_rate: float = 0.0, models_delay: float = 0.0, failure_status: int = 503,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.first_token_delay = first_token_delay
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        # 注入失败时返回的状态码，如 429（限流）或 503（服务不可用）
+        self.failure_status = failure_status
+        # /v1/models 的响应延迟，模拟连通性检查的往返耗时
+        self.models_delay = models_delay
+        self.models_request_count = 0
+        self.request_count = 0
+        # 同时处理中的生成请求数及其峰值，用于校验并发上限
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    with stub._lock:
+                        stub.models_request_count += 1
+                    time.sleep(stub.models_delay)
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    self._complete(request)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def _complete(self, request: dict):
+                if random.random() < stub.failure_rate:
+                    self._send_json(stub.failure_status, {"error": {"message": "模拟服务不可用", "type": "server_error"}})
+                    return
+
+                text = stub_completion_text(request.get("messages", []))
+                tokens = _split_tokens(text)
+                max_tokens = request.get("max_tokens")
+                finish_reason = "stop"
+                if max_tokens is not None and len(tokens) > max_tokens:
+                    tokens = tokens[:max_tokens]
+                    finish_reason = "length"
+                prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 2
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                         "total_tokens": prompt_tokens + len(tokens)}
+                model = request.get("model", "stub-model")
+                interval = 1.0 / stub.tokens_per_second if stub.tokens_per_second else 0
+
+                time.sleep(stub.first_token_delay)
+                if not request.get("stream"):
+                    time.sleep(interval * len(tokens))
+                    self._send_json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "finish_reason": finish_reason,
+                                     "message": {"role": "assistant", "content": "".join(tokens)}}],
+                        "usage": usage,
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+                def send_chunk(choices, chunk_usage=None):
+                    payload = {"id": completion_id, "object": "chat.completion.chunk",
+                               "created": int(time.time()), "model": model, "choices": choices}
+                    if chunk_usage is not None:
+                        payload["usage"] = chunk_usage
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                for i, token in enumerate(tokens):
+                    if i > 0:
+                        time.sleep(interval)
+                    send_chunk([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+                send_chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    send_chunk([], usage)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,331 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from src.clients import get_text_processor, get_tts_service
+import src.metrics as metrics
+import src.scheduler as scheduler
+from src.artifacts import new_job_id, write_json
+from .workflow import BlogWorkflow
+from .persistence import job_thread_id
+
+# BlogConfig 字段的默认值
+CONFIG_DEFAULTS = {
+    "length": "medium",
+    "with_tts": True,
+    "polish_type": "blog"
+}
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def load_jobs(path: str) -> list:
+    """
+    从文件读取批量任务配置
+
+    支持 JSON Lines（每行一个 BlogConfig 对象）、JSON 数组和带表头的 CSV 文件，
+    缺省字段使用 CONFIG_DEFAULTS 中的默认值。
+
+    Args:
+        path: 任务文件路径
+
+    Returns:
+        BlogConfig 字典列表
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    if path.endswith(".csv"):
+        rows = list(csv.DictReader(content.splitlines()))
+    elif content.lstrip().startswith("["):
+        rows = json.loads(content)
+    else:
+        rows = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    jobs = []
+    for i, row in enumerate(rows):
+        row = {k: v for k, v in row.items() if v not in (None, "")}
+        if not row.get("topic"):
+            raise ValueError(f"第{i + 1}个任务缺少 topic 字段")
+        job = {**CONFIG_DEFAULTS, **row}
+        job["with_tts"] = _parse_bool(job["with_tts"])
+        for key in ("stream", "use_cache"):
+            if key in job:
+                job[key] = _parse_bool(job[key])
+        if "deadline_seconds" in job:
+            job["deadline_seconds"] = float(job["deadline_seconds"])
+        jobs.append(job)
+    return jobs
+
+
+class BatchRunner:
+    """
+    批量博客生成：多个工作流并发执行，模型服务与语音合成服务分别限制并发请求数
+
+    任务的后端请求默认以 batch 优先级排队，同一进程中的交互请求优先；任务配置中的 priority 字段可覆盖。
+    同一批次中配置相同（线程ID相同）的任务只执行一次，其余的在报告中记为跳过。
+    """
+
+    def __init__(self, max_jobs: int = 4, llm_concurrency: int = 2, tts_concurrency: int = 2,
+                 workflow: BlogWorkflow = None, resume: bool = True, priority: str = "batch"):
+        self.max_jobs = max_jobs
+        self.priority = priority
+        self.llm_concurrency = llm_concurrency
+        self.tts_concurrency = tts_concurrency
+        # 每个任务使用由配置计算的固定线程ID，重新执行批次时跳过已完成的任务、从失败的节点继续
+        self.resume = resume
+        # 所有任务共用一个工作流实例，后端并发由客户端内部的信号量控制；未传入时第一次使用时创建
+        self._workflow = workflow
+        self._lock = threading.Lock()
+        self._finished = 0
+        # 最近一次批量执行的指标记录，可通过 save_metrics 导出
+        self.recorder = None
+
+    @property
+    def workflow(self) -> BlogWorkflow:
+        if self._workflow is None:
+            with self._lock:
+                if self._workflow is None:
+                    self._workflow = BlogWorkflow(
+                        get_text_processor(max_concurrency=self.llm_concurrency),
+                        get_tts_service(max_concurrency=self.tts_concurrency)
+                    )
+        return self._workflow
+
+    def _new_status(self, index: int, job: dict) -> dict:
+        return {
+            "index": index,
+            "topic": job["topic"],
+            "status": "running",
+            "started_at": datetime.now().isoformat()
+        }
+
+    def _finish_job(self, status: dict, started: float, result: dict = None, error: Exception = None) -> dict:
+        if error is not None:
+            status.update({"status": "failed", "error": str(error)})
+        elif result.get("error"):
+            status.update({"status": "failed", "error": result["error"]})
+        else:
+            checkpoint = result["metadata"].get("checkpoint")
+            status.update({
+                "status": "skipped" if checkpoint == "completed" else "succeeded",
+                "resumed": checkpoint == "resumed",
+                "job_id": result.get("job_id"),
+                "blog_file": result.get("blog_file"),
+                "audio_file": result.get("audio_file")
+            })
+        status["duration_seconds"] = round(time.time() - started, 3)
+        return status
+
+    def _report_progress(self, status: dict, total: int) -> dict:
+        with self._lock:
+            self._finished += 1
+            print(f"[{self._finished}/{total}] {status['status']}：{status['topic']}（{status['duration_seconds']}秒）")
+        return status
+
+    def execute(self, index: int, job: dict) -> dict:
+        """
+        在当前线程中执行一个任务，不打印进度
+
+        Args:
+            index: 任务在批次中的序号
+            job: BlogConfig 字典
+
+        Returns:
+            任务状态，格式与报告中的 jobs 条目相同
+        """
+        status = self._new_status(index, job)
+        started = time.time()
+        try:
+            with metrics.labels(job=index), scheduler.scheduling(self.priority, job_thread_id(job)):
+                result = self.workflow.run(job, job_thread_id(job), self.resume)
+        except Exception as e:
+            return self._finish_job(status, started, error=e)
+        return self._finish_job(status, started, result=result)
+
+    def _run_job(self, index: int, job: dict, total: int) -> dict:
+        return self._report_progress(self.execute(index, job), total)
+
+    async def _arun_job(self, semaphore: asyncio.Semaphore, index: int, job: dict, total: int) -> dict:
+        async with semaphore:
+            status = self._new_status(index, job)
+            started = time.time()
+            try:
+                with metrics.labels(job=index), scheduler.scheduling(self.priority, job_thread_id(job)):
+                    result = await self.workflow.arun(job, job_thread_id(job), self.resume)
+            except Exception as e:
+                return self._report_progress(self._finish_job(status, started, error=e), total)
+            return self._report_progress(self._finish_job(status, started, result=result), total)
+
+    def run(self, jobs: list) -> dict:
+        """
+        并发执行所有任务
+
+        Args:
+            jobs: BlogConfig 字典列表
+
+        Returns:
+            批量执行报告，包含每个任务的状态和总吞吐量
+        """
+        self._finished = 0
+        started = time.time()
+        started_at = datetime.now().isoformat()
+
+        unique, duplicates = self._split_duplicates(jobs)
+        with metrics.recording() as self.recorder:
+            run_job = metrics.bind(self._run_job)
+            with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+                futures = {i: executor.submit(run_job, i, job, len(jobs)) for i, job in unique}
+                results = {i: future.result() for i, future in futures.items()}
+
+        return self._build_report(jobs, self._with_duplicates(jobs, results, duplicates), started, started_at)
+
+    async def arun(self, jobs: list) -> dict:
+        """
+        在单个事件循环中并发执行所有任务，适合同时驱动大量任务
+
+        Args:
+            jobs: BlogConfig 字典列表
+
+        Returns:
+            批量执行报告，格式与 run 相同
+        """
+        self._finished = 0
+        started = time.time()
+        started_at = datetime.now().isoformat()
+
+        unique, duplicates = self._split_duplicates(jobs)
+        semaphore = asyncio.Semaphore(self.max_jobs)
+        with metrics.recording() as self.recorder:
+            statuses = await asyncio.gather(*[
+                self._arun_job(semaphore, i, job, len(jobs)) for i, job in unique
+            ])
+        results = {i: status for (i, _), status in zip(unique, statuses)}
+
+        return self._build_report(jobs, self._with_duplicates(jobs, results, duplicates), started, started_at)
+
+    def _split_duplicates(self, jobs: list) -> tuple:
+        """
+        线程ID相同（配置相同）的任务只执行第一个，避免多个任务共用一个检查点线程并发执行、写入同一个输出目录
+
+        Returns:
+            (需要执行的 [(序号, 任务)], {重复任务的序号: 第一个相同任务的序号})
+        """
+        first, unique, duplicates = {}, [], {}
+        for i, job in enumerate(jobs):
+            thread_id = job_thread_id(job)
+            if thread_id in first:
+                duplicates[i] = first[thread_id]
+            else:
+                first[thread_id] = i
+                unique.append((i, job))
+        return unique, duplicates
+
+    def _with_duplicates(self, jobs: list, results: dict, duplicates: dict) -> list:
+        """
+        按任务顺序返回所有任务的状态，重复的任务沿用第一个相同任务的结果，成功时记为跳过
+        """
+        statuses = []
+        for i, job in enumerate(jobs):
+            if i not in duplicates:
+                statuses.append(results[i])
+                continue
+            original = results[duplicates[i]]
+            status = self._new_status(i, job)
+            status.update({key: original[key] for key in ("error", "job_id", "blog_file", "audio_file") if key in original})
+            status.update({
+                "status": "failed" if original["status"] == "failed" else "skipped",
+                "duplicate_of": duplicates[i],
+                "duration_seconds": 0
+            })
+            statuses.append(self._report_progress(status, len(jobs)))
+        return statuses
+
+    def _cache_stats(self):
+        cache = self.workflow.text_processor.cache
+        return cache.stats() if cache else None
+
+    def _build_report(self, jobs: list, results: list, started: float, started_at: str) -> dict:
+        elapsed = time.time() - started
+        succeeded = sum(1 for r in results if r["status"] == "succeeded")
+        skipped = sum(1 for r in results if r["status"] == "skipped")
+        return {
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(),
+            "total_jobs": len(jobs),
+            "succeeded": succeeded,
+            "skipped": skipped,
+            "resumed": sum(1 for r in results if r.get("resumed")),
+            "failed": len(jobs) - succeeded - skipped,
+            "elapsed_seconds": round(elapsed, 3),
+            "episodes_per_hour": round(succeeded / elapsed * 3600, 2) if elapsed > 0 else None,
+            "max_jobs": self.max_jobs,
+            "llm_concurrency": self.llm_concurrency,
+            "tts_concurrency": self.tts_concurrency,
+            "llm_cache": self._cache_stats(),
+            "metrics": self.recorder.summary(),
+            "jobs": results
+        }
+
+
+def save_report(report: dict, output_dir: str = "results") -> str:
+    """
+    将批量执行报告保存为JSON文件
+
+    Returns:
+        报告文件路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report_file = os.path.join(output_dir, f"batch_report_{new_job_id()}.json")
+    write_json(report_file, report)
+    return report_file
+
+
+def save_metrics(recorder: metrics.MetricsRecorder, output_dir: str = "results") -> tuple:
+    """
+    将批量执行的指标记录保存为 JSON Lines 明细和 Prometheus 文本格式汇总
+
+    Returns:
+        (明细文件路径, 汇总文件路径)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = new_job_id()
+    jsonl_file = recorder.write_jsonl(os.path.join(output_dir, f"batch_metrics_{timestamp}.jsonl"))
+    prom_file = recorder.write_prometheus(os.path.join(output_dir, f"batch_metrics_{timestamp}.prom"))
+    return jsonl_file, prom_file
+
+
+def print_report(report: dict):
+    """
+    打印批量执行报告
+    """
+    print("=" * 50)
+    print("批量执行报告")
+    print("=" * 50)
+    for job in report["jobs"]:
+        line = f"#{job['index'] + 1} [{job['status']}] {job['topic']} - {job['duration_seconds']}秒"
+        if "duplicate_of" in job:
+            line += f" - 与 #{job['duplicate_of'] + 1} 相同，未重复执行"
+        if job.get("error"):
+            line += f" - {job['error']}"
+        print(line)
+    print("-" * 50)
+    print(f"任务总数：{report['total_jobs']}，成功：{report['succeeded']}（其中从检查点继续：{report['resumed']}），"
+          f"已完成跳过：{report['skipped']}，失败：{report['failed']}")
+    print(f"总耗时：{report['elapsed_seconds']}秒，吞吐量：{report['episodes_per_hour']} 期/小时")
+    if report.get("llm_cache"):
+        cache = report["llm_cache"]
+        print(f"模型回复缓存：命中{cache['hits']}次，未命中{cache['misses']}次")
+    if report.get("metrics"):
+        print("-" * 50)
+        for line in metrics.format_summary(report["metrics"]):
+            print(line)
+    print("=" * 50)
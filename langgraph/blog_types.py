@@ -1,5 +1,20 @@
 # 博客生成工作流的状态定义
-from typing import TypedDict, Optional, List
+#
+# 节点只返回发生变化的字段，metadata、sections 这类字典字段由 reducer 合并，不需要每个节点复制整个状态；
+# 需要整体替换时（如新一次运行开始）传入 langgraph.types.Overwrite。
+from typing import TypedDict, Optional, List, NotRequired, Annotated, Union
+
+
+def merge_dict(left: Optional[dict], right: Optional[dict]) -> dict:
+    """
+    合并字典字段：右侧的键覆盖左侧的同名键，其余键保留
+    """
+    return {**(left or {}), **(right or {})}
+
+
+# 文本字段的取值：文本本身，或超过 WORKFLOW_TEXT_REF_CHARS 时保存到任务输出目录后的引用
+# {"path": 文件路径, "sha256": 内容哈希, "chars": 字符数}，用 src.artifacts.resolve_text 读取
+TextValue = Union[str, dict]
 
 
 class BlogConfig(TypedDict):
@@ -10,6 +25,14 @@ class BlogConfig(TypedDict):
     length: str  # 博客长度，可选值：short, medium, long
     with_tts: bool  # 是否生成语音文件
     polish_type: str  # 润色类型，可选值：blog, article, story等
+    stream: NotRequired[bool]  # 是否流式生成，开启后节点会通过 stream writer 推送文本增量
+    mode: NotRequired[str]  # 执行模式：sequential（逐步执行）、pipelined（按段落流水线执行）或 outline（先生成大纲再并发生成各章节）；
+                            # 未指定时长篇博客使用 outline（OUTLINE_FOR_LONG），其余使用 sequential
+    use_cache: NotRequired[bool]  # 是否读取模型回复缓存，默认True；需要重新生成时设为False
+    deadline_seconds: NotRequired[float]  # 任务截止时间（秒），超时后不再发起新的请求或重试，默认读取 JOB_DEADLINE
+    thread_id: NotRequired[str]  # 检查点线程ID，相同ID的运行会从上一次中断或失败的节点继续
+    job_id: NotRequired[str]  # 任务ID，产物保存在 results/<任务ID>/ 中，未提供时自动生成
+    priority: NotRequired[str]  # 后端请求的排队优先级：interactive 或 batch，未提供时沿用调用方的设置
 
 
 class WorkflowState(TypedDict):
@@ -18,11 +41,14 @@ class WorkflowState(TypedDict):
     """
     # 输入
     config: BlogConfig  # 博客生成配置
-    original_text: Optional[str] = None  # 原始生成文本
+    job_id: str  # 任务ID，决定输出目录
+    original_text: Optional[TextValue] = None  # 原始生成文本
+    outline: Optional[dict] = None  # 大纲模式下的博客大纲
+    sections: Annotated[dict, merge_dict]  # 大纲模式下并行生成的各部分正文，{序号: 正文}，拼接后清空
     
     # 输出
-    polished_text: Optional[str] = None  # 润色后文本
+    polished_text: Optional[TextValue] = None  # 润色后文本
     blog_file: Optional[str] = None  # 博客文件路径
     audio_file: Optional[str] = None  # 音频文件路径（如果生成）
     error: Optional[str] = None  # 如果任何步骤失败，则为错误消息
-    metadata: dict = {}  # 关于工作流的附加元数据
+    metadata: Annotated[dict, merge_dict]  # 关于工作流的附加元数据，节点只返回新增的键
@@ -1,4 +1,5 @@
 from .workflow import BlogWorkflow
+import src.metrics as metrics
 
 
 def main():
@@ -42,6 +43,8 @@ def main():
     }
     polish_type = polish_map.get(polish_choice, "blog")
     
+    stream = input("\n是否实时显示生成过程？(y/n): ").lower() == "y"
+    
     # 准备工作流配置
     config = {
         "topic": topic,
@@ -56,7 +59,22 @@ def main():
     
     # 执行工作流
     workflow = BlogWorkflow()
-    result = workflow.run(config)
+    with metrics.recording() as recorder:
+        if stream:
+            # 流式执行：模型输出的文本增量实时打印
+            result = None
+            current_node = None
+            for event, data in workflow.stream(config):
+                if event == "delta":
+                    if data["node"] != current_node:
+                        current_node = data["node"]
+                        print(f"\n--- {current_node} ---")
+                    print(data["delta"], end="", flush=True)
+                else:
+                    result = data
+            print()
+        else:
+            result = workflow.run(config)
     
     print("\n" + "=" * 50)
     print("工作流执行完成！")
@@ -71,6 +89,8 @@ def main():
         if result.get("audio_file"):
             print(f"音频文件：{result['audio_file']}")
         print(f"执行时间：{result['metadata'].get('workflow_started_at')} - {result['metadata'].get('audio_generated_at', result['metadata'].get('saved_at'))}")
+        for line in metrics.format_summary(recorder.summary()):
+            print(line)
     
     print("\n感谢使用 LangGraph 博客生成与语音合成系统！")
 
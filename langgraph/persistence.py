@@ -0,0 +1,80 @@
+# 工作流检查点：每个任务的执行进度保存在 SQLite 中，失败或中断后可从最后完成的节点继续
+import os
+import asyncio
+import sqlite3
+import threading
+import src.config as config
+from src.cache import request_key
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # langgraph-checkpoint-sqlite 未安装时不启用检查点
+    SqliteSaver = None
+
+# 参与计算任务线程ID的配置字段，stream、use_cache 等执行选项不影响任务身份
+JOB_KEY_FIELDS = ("topic", "length", "with_tts", "polish_type", "mode")
+
+_lock = threading.Lock()
+_checkpointer = None
+
+
+if SqliteSaver is not None:
+    class ThreadedSqliteSaver(SqliteSaver):
+        """
+        在线程池中执行同步读写的 SqliteSaver，同一个实例同时支持 invoke 和 ainvoke
+
+        SqliteSaver 内部用锁串行化对连接的访问，检查点读写耗时远小于模型调用，
+        不需要为异步执行单独维护 aiosqlite 连接。
+        """
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def get_checkpointer():
+    """
+    返回进程内共享的检查点存储，路径为 config.WORKFLOW_CHECKPOINT_PATH
+
+    Returns:
+        检查点存储；未开启检查点或未安装 langgraph-checkpoint-sqlite 时返回None
+    """
+    global _checkpointer
+    if not config.WORKFLOW_CHECKPOINTS:
+        return None
+    if SqliteSaver is None:
+        print("未安装 langgraph-checkpoint-sqlite，工作流检查点已禁用")
+        return None
+    with _lock:
+        if _checkpointer is None:
+            directory = os.path.dirname(config.WORKFLOW_CHECKPOINT_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(config.WORKFLOW_CHECKPOINT_PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            _checkpointer = ThreadedSqliteSaver(conn)
+        return _checkpointer
+
+
+def job_thread_id(job: dict) -> str:
+    """
+    根据任务配置计算稳定的线程ID，重新执行同一批任务时能找到之前的检查点
+
+    任务中显式提供 thread_id 时直接使用。
+    """
+    if job.get("thread_id"):
+        return job["thread_id"]
+    return "job-" + request_key(**{k: job.get(k) for k in JOB_KEY_FIELDS})[:16]
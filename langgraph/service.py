@@ -0,0 +1,520 @@
+# 常驻 HTTP 服务：进程内保持一个已初始化的工作流，通过任务队列执行提交的博客生成任务
+#
+# 不依赖 Web 框架，create_app() 返回标准的 ASGI 应用，可用 uvicorn 等任意 ASGI 服务器运行：
+#     uvicorn langgraph.service:app --port 8000
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import mimetypes
+from datetime import datetime
+from urllib.parse import parse_qs
+import src.config as config
+import src.metrics as metrics
+import src.resilience as resilience
+import src.scheduler as scheduler
+from .workflow import BlogWorkflow
+from .persistence import job_thread_id
+
+# 文件分块发送的大小
+_CHUNK_SIZE = 64 * 1024
+# 提交任务的请求体上限，任务配置只有几个短字段
+_MAX_BODY = 64 * 1024
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})(?:/(events|blog|audio))?$")
+
+
+class QueueFull(RuntimeError):
+    """
+    等待执行的任务数达到上限
+    """
+
+
+class BodyTooLarge(RuntimeError):
+    """
+    请求体超过 _MAX_BODY
+    """
+
+
+class Job:
+    """
+    一个博客生成任务的状态、进度事件和部分文本
+    """
+
+    def __init__(self, config: dict):
+        self.id = uuid.uuid4().hex
+        self.config = config
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = {}
+        # 各节点已生成的文本，任务执行中即可查询
+        self.text = {}
+        self.events = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    async def publish(self, event: str, data: dict):
+        """
+        追加一个进度事件并唤醒等待中的订阅者
+        """
+        if event == "delta":
+            self.text[data["node"]] = self.text.get(data["node"], "") + data["delta"]
+        self.events.append((event, data))
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait_events(self, start: int) -> list:
+        """
+        返回从 start 开始的事件，暂无新事件时等待；任务结束后没有新事件时返回空列表
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: len(self.events) > start or self.done)
+        return self.events[start:]
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "config": self.config,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "text": self.text,
+            "result": self.result,
+            "links": {
+                "self": f"/jobs/{self.id}",
+                "events": f"/jobs/{self.id}/events",
+                "blog": f"/jobs/{self.id}/blog" if self.result.get("blog_file") else None,
+                "audio": f"/jobs/{self.id}/audio" if self.result.get("audio_file") else None
+            }
+        }
+
+
+class BlogService:
+    """
+    任务队列：提交的任务排队等待，最多 max_jobs 个同时执行
+
+    所有任务共用一个工作流实例（以及其中共享的模型和语音合成客户端），服务启动后不再重复
+    初始化客户端和检查连通性。配置相同且仍在排队或执行中的任务会合并为同一个任务。
+
+    Args:
+        workflow: BlogWorkflow 实例，未传入时创建默认实例
+        max_jobs: 同时执行的任务数，默认读取 config.SERVICE_MAX_JOBS
+        max_queue: 排队任务数上限，超出时拒绝提交，默认读取 config.SERVICE_MAX_QUEUE
+        max_finished: 保留的已结束任务数，超出时丢弃最早结束的任务
+    """
+
+    def __init__(self, workflow: BlogWorkflow = None, max_jobs: int = None, max_queue: int = None,
+                 max_finished: int = None):
+        self.workflow = workflow or BlogWorkflow()
+        self.max_jobs = max_jobs or config.SERVICE_MAX_JOBS
+        self.max_queue = max_queue or config.SERVICE_MAX_QUEUE
+        self.max_finished = max_finished or config.SERVICE_MAX_FINISHED
+        self.jobs = {}
+        self.running = 0
+        self.completed = 0
+        self.started_at = None
+        self._queue = None
+        self._workers = []
+
+    async def start(self):
+        """
+        启动工作协程，并在后台线程中完成模型服务的连通性检查
+        """
+        if self._workers:
+            return
+        self.started_at = time.time()
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_jobs)]
+        if self.workflow.text_processor.health_check != "off":
+            try:
+                await asyncio.to_thread(self.workflow.text_processor.check_connection)
+            except ConnectionError as e:
+                print(f"模型服务暂不可用，任务执行时将重新检查: {str(e)}")
+        print(f"博客生成服务已启动，并发任务数：{self.max_jobs}，排队上限：{self.max_queue}")
+
+    async def stop(self):
+        """
+        停止工作协程；已在线程中执行的工作流会运行到结束，未完成的任务可凭检查点在重新提交后继续
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, job_config: dict) -> tuple:
+        """
+        提交任务
+
+        Returns:
+            (任务, 是否为新任务)；已有配置相同的未结束任务时返回该任务
+
+        Raises:
+            QueueFull: 排队任务数达到上限
+        """
+        await self.start()
+        job_config = {**job_config, "thread_id": job_config.get("thread_id") or job_thread_id(job_config)}
+        for job in self.jobs.values():
+            if not job.done and job.config["thread_id"] == job_config["thread_id"]:
+                return job, False
+        if self.queue_depth >= self.max_queue:
+            raise QueueFull(f"排队任务数已达上限（{self.max_queue}）")
+
+        job = Job(job_config)
+        self.jobs[job.id] = job
+        await job.publish("status", {"status": job.status})
+        self._queue.put_nowait(job)
+        return job, True
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job):
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        self.running += 1
+        await job.publish("status", {"status": job.status})
+        loop = asyncio.get_running_loop()
+
+        def run() -> dict:
+            # 在工作线程中执行同步的流式工作流，进度事件转交给事件循环
+            final = None
+            with metrics.recording(job=job.id) as recorder, \
+                    resilience.deadline(job.config.get("deadline_seconds", config.JOB_DEADLINE)), \
+                    scheduler.scheduling(priority=job.config.get("priority"), job=job.id):
+                # 产物写入 results/<任务ID>/，与服务的任务ID一致
+                for event, data in self.workflow.stream({**job.config, "job_id": job.id}):
+                    if event == "delta":
+                        asyncio.run_coroutine_threadsafe(job.publish("delta", data), loop)
+                    else:
+                        final = data
+                        asyncio.run_coroutine_threadsafe(job.publish("node", _node_summary(data)), loop)
+            return {**(final or {}), "metrics": recorder.summary()}
+
+        try:
+            final = await asyncio.to_thread(run)
+            job.result = {
+                "blog_file": final.get("blog_file"),
+                "audio_file": final.get("audio_file"),
+                "metrics": final.get("metrics")
+            }
+            for node, field in (("generate_blog", "original_text"), ("polish_text", "polished_text")):
+                if final.get(field):
+                    job.text[node] = final[field]
+            job.error = final.get("error")
+        except Exception as e:
+            job.error = str(e)
+        job.status = "failed" if job.error else "succeeded"
+        job.finished_at = datetime.now().isoformat()
+        self.running -= 1
+        self.completed += 1
+        await job.publish("done", {"status": job.status, "error": job.error, "result": job.as_dict()["links"]})
+        self._evict_finished()
+
+    def _evict_finished(self):
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job.id]
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 3) if self.started_at else 0,
+            "workers": self.max_jobs,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "jobs": len(self.jobs)
+        }
+
+
+def _node_summary(state: dict) -> dict:
+    """
+    节点完成后推送给订阅者的状态摘要（不包含完整文本）
+    """
+    return {
+        "blog_file": state.get("blog_file"),
+        "audio_file": state.get("audio_file"),
+        "error": state.get("error"),
+        "original_chars": len(state.get("original_text") or ""),
+        "polished_chars": len(state.get("polished_text") or "")
+    }
+
+
+def parse_range(header: str, size: int):
+    """
+    解析单个 Range 请求头
+
+    Args:
+        header: 如 bytes=0-1023、bytes=1024-、bytes=-500
+        size: 文件大小
+
+    Returns:
+        (起始位置, 结束位置)（均包含）；未提供或格式无法识别时返回None
+
+    Raises:
+        ValueError: 范围超出文件大小，应返回416
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header or "")
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    start, end = match.groups()
+    if start == "":
+        # 后缀范围：最后 N 个字节
+        length = int(end)
+        if length == 0:
+            raise ValueError("范围为空")
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("范围超出文件大小")
+    return start, end
+
+
+async def _read_body(receive, limit: int = _MAX_BODY) -> bytes:
+    """
+    读取请求体，超过 limit 字节时立即停止读取并抛出 BodyTooLarge，不会把整个请求体留在内存中
+    """
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > limit:
+            raise BodyTooLarge(f"请求体超过 {limit} 字节")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def _send_json(send, status: int, payload, headers: list = None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode())] + (headers or [])
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_file(send, path: str, request_headers: dict, method: str):
+    """
+    发送文件，支持 Range 请求（音频播放器拖动进度条时使用）
+    """
+    size = os.path.getsize(path)
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if path.endswith(".md"):
+        content_type = "text/markdown"
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    headers = [(b"content-type", content_type.encode()), (b"accept-ranges", b"bytes")]
+
+    try:
+        byte_range = parse_range(request_headers.get("range"), size)
+    except ValueError:
+        await send({"type": "http.response.start", "status": 416,
+                    "headers": headers + [(b"content-range", f"bytes */{size}".encode())]})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    status = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        status = 206
+        start, end = byte_range
+        headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+    length = max(0, end - start + 1)
+    headers.append((b"content-length", str(length).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    if method == "HEAD" or length == 0:
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+    if remaining > 0:
+        # 文件在发送过程中被截断
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _send_events(send, job: Job, last_event_id: str = None):
+    """
+    以 Server-Sent Events 推送任务进度，先补发 Last-Event-ID 之后的历史事件，任务结束后关闭连接
+    """
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no")]
+    })
+    position = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    while True:
+        events = await job.wait_events(position)
+        if not events:
+            break
+        payload = "".join(
+            f"id: {position + i}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            for i, (event, data) in enumerate(events)
+        )
+        position += len(events)
+        await send({"type": "http.response.body", "body": payload.encode("utf-8"), "more_body": True})
+        if job.done and position >= len(job.events):
+            break
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _job_config(payload: dict) -> dict:
+    """
+    校验提交的任务配置，补全默认值
+
+    Raises:
+        ValueError: 配置不合法
+    """
+    if not isinstance(payload, dict) or not str(payload.get("topic") or "").strip():
+        raise ValueError("缺少 topic")
+    if payload.get("length", "medium") not in ("short", "medium", "long"):
+        raise ValueError("length 只能是 short、medium 或 long")
+    if payload.get("mode") not in (None, "sequential", "pipelined", "outline"):
+        raise ValueError("mode 只能是 sequential、pipelined 或 outline")
+    if payload.get("priority") not in (None, *scheduler.PRIORITIES):
+        raise ValueError(f"priority 只能是 {'或'.join(scheduler.PRIORITIES)}")
+    job_config = {
+        "topic": str(payload["topic"]).strip(),
+        "length": payload.get("length", "medium"),
+        "with_tts": bool(payload.get("with_tts", True)),
+        "polish_type": payload.get("polish_type", "blog")
+    }
+    for key in ("mode", "use_cache", "deadline_seconds", "thread_id", "priority"):
+        if payload.get(key) is not None:
+            job_config[key] = payload[key]
+    return job_config
+
+
+def create_app(service: BlogService = None):
+    """
+    创建 ASGI 应用
+
+    路由：
+        POST /jobs                  提交任务（JSON，字段与 BlogConfig 一致），返回 202 和任务信息；请求体超过 64 KiB 时返回 413
+        GET  /jobs                  任务列表
+        GET  /jobs/{id}             任务状态、已生成的部分文本和结果
+        GET  /jobs/{id}/events      以 SSE 推送进度和文本增量，支持 Last-Event-ID 断线续传
+        GET  /jobs/{id}/blog        博客 Markdown 文件
+        GET  /jobs/{id}/audio       音频文件，支持 Range 请求
+        GET  /health                服务状态、运行中和排队的任务数
+
+    Args:
+        service: BlogService 实例，未传入时创建默认实例
+    """
+    service = service or BlogService()
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await service.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await service.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        path = scope["path"].rstrip("/") or "/"
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+        if path == "/health" and method == "GET":
+            await _send_json(send, 200, service.health())
+            return
+
+        if path == "/jobs":
+            if method == "POST":
+                try:
+                    if int(headers.get("content-length") or 0) > _MAX_BODY:
+                        raise BodyTooLarge(f"请求体超过 {_MAX_BODY} 字节")
+                    job_config = _job_config(json.loads(await _read_body(receive) or b"{}"))
+                    job, created = await service.submit(job_config)
+                except BodyTooLarge as e:
+                    await _send_json(send, 413, {"error": str(e)})
+                    return
+                except (ValueError, TypeError) as e:
+                    await _send_json(send, 400, {"error": str(e)})
+                    return
+                except QueueFull as e:
+                    await _send_json(send, 429, {"error": str(e)}, [(b"retry-after", b"5")])
+                    return
+                await _send_json(send, 202 if created else 200, job.as_dict(), [(b"location", f"/jobs/{job.id}".encode())])
+                return
+            if method == "GET":
+                status = parse_qs(scope.get("query_string", b"").decode()).get("status", [None])[0]
+                jobs = [
+                    {k: v for k, v in job.as_dict().items() if k != "text"}
+                    for job in service.jobs.values() if status is None or job.status == status
+                ]
+                await _send_json(send, 200, {"jobs": jobs, "queue_depth": service.queue_depth, "running": service.running})
+                return
+            await _send_json(send, 405, {"error": "不支持的请求方法"})
+            return
+
+        match = _JOB_PATH.match(path)
+        job = service.jobs.get(match.group(1)) if match else None
+        if job is None:
+            await _send_json(send, 404, {"error": "未找到"})
+            return
+        if method not in ("GET", "HEAD"):
+            await _send_json(send, 405, {"error": "不支持的请求方法"})
+            return
+
+        resource = match.group(2)
+        if resource is None:
+            await _send_json(send, 200, job.as_dict())
+        elif resource == "events":
+            await _send_events(send, job, headers.get("last-event-id"))
+        else:
+            artifact = job.result.get(f"{resource}_file")
+            if not artifact or not os.path.exists(artifact):
+                await _send_json(send, 404, {"error": "文件尚未生成" if not job.done else "任务未生成该文件"})
+                return
+            await _send_file(send, artifact, headers, method)
+
+    app.service = service
+    return app
+
+
+def __getattr__(name: str):
+    # uvicorn langgraph.service:app 时才创建默认应用，导入模块本身不初始化客户端
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(name)
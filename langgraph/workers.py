@@ -0,0 +1,326 @@
+# 多进程批量执行：任务分发到一组工作进程，避开单进程中 GIL 对文本切分、音频拼接和文件读写等 CPU 工作的限制
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import deque
+from datetime import datetime
+import src.config as config
+import src.metrics as metrics
+from src.clients import get_text_processor, get_tts_service
+from .workflow import BlogWorkflow
+from .batch import BatchRunner
+
+# 主进程检查工作进程是否退出的间隔（秒）
+_POLL_SECONDS = 0.5
+
+
+def default_workflow(llm_concurrency: int, tts_concurrency: int) -> BlogWorkflow:
+    """
+    工作进程中默认的工作流：使用进程内共享的客户端
+    """
+    return BlogWorkflow(
+        get_text_processor(max_concurrency=llm_concurrency),
+        get_tts_service(max_concurrency=tts_concurrency)
+    )
+
+
+def _worker_main(slot: int, job_queue, result_conn, options: dict):
+    """
+    工作进程入口：预热客户端后启动 max_jobs 个线程从本进程的任务队列取任务，取到 None 时退出
+
+    结果通过本进程独占的管道发回主进程；工作进程在发送途中退出时只影响自己的管道，
+    不会像共享队列那样留下被占用的写锁、卡住其他工作进程
+    """
+    started = time.time()
+    send_lock = threading.Lock()
+
+    def send(message: tuple):
+        with send_lock:
+            result_conn.send(message)
+
+    if options["lock_dir"]:
+        config.SCHEDULER_LOCK_DIR = options["lock_dir"]
+    workflow = options["workflow_factory"](*options["factory_args"])
+    try:
+        # 预热：建立模型服务连接，之后的任务不再承担首次连接的开销
+        workflow.text_processor._ensure_connection()
+    except Exception as e:
+        print(f"工作进程 #{slot} 预热失败：{e}")
+    runner = BatchRunner(workflow=workflow, resume=options["resume"], priority=options["priority"])
+    send(("ready", slot, os.getpid(), round(time.time() - started, 3)))
+
+    def loop():
+        while True:
+            item = job_queue.get()
+            if item is None:
+                return
+            index, job = item
+            with metrics.recording(worker=slot) as recorder:
+                status = runner.execute(index, job)
+            cache = workflow.text_processor.cache
+            send(("done", slot, index, status, recorder.records, os.getpid(), cache.stats() if cache else None))
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(options["max_jobs"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class ProcessBatchRunner(BatchRunner):
+    """
+    多进程批量博客生成：任务在主进程的共享队列中排队，由主进程分发给有空闲名额的工作进程执行
+
+    每个工作进程启动时创建一次客户端和工作流并建立连接，之后同时执行 max_jobs 个任务；
+    任务状态和指标记录发回主进程汇总，报告格式与 BatchRunner 相同，配置相同的任务同样只执行一次。
+    主进程记录每个任务分发给了哪个工作进程：工作进程异常退出（崩溃、被系统终止）时自动重启，
+    分发给它的任务重新排队，最多重试 job_retries 次，之后记为失败；
+    工作进程未完成预热就退出时不再重启，分发给它的任务交给其他工作进程，没有可用的工作进程时剩余任务记为失败。
+
+    llm_concurrency 和 tts_concurrency 是每个工作进程的上限；需要整台主机共用
+    LLM_MAX_CONCURRENCY / *_RATE_LIMIT 时设置 SCHEDULER_LOCK_DIR，工作进程会继承该目录。
+
+    Args:
+        processes: 工作进程数，默认为 CPU 核数
+        max_jobs: 每个工作进程同时执行的任务数
+        workflow_factory: 在工作进程中创建工作流的函数，必须可以被 pickle（模块级函数），
+            默认使用 default_workflow
+        factory_args: 传给 workflow_factory 的参数，默认为 (llm_concurrency, tts_concurrency)
+        job_retries: 任务因工作进程崩溃而中断后重新执行的次数
+    """
+
+    def __init__(self, processes: int = None, max_jobs: int = 1, llm_concurrency: int = 2, tts_concurrency: int = 2,
+                 resume: bool = True, priority: str = "batch", workflow_factory=None, factory_args: tuple = None,
+                 job_retries: int = 1):
+        # 工作流只在工作进程中创建，主进程不使用 self.workflow
+        super().__init__(max_jobs, llm_concurrency, tts_concurrency, resume=resume, priority=priority)
+        self.processes = processes or os.cpu_count() or 1
+        self.workflow_factory = workflow_factory or default_workflow
+        self.factory_args = (llm_concurrency, tts_concurrency) if factory_args is None else factory_args
+        self.job_retries = job_retries
+        self.restarts = 0
+        # 最近一次执行中所有工作进程启动并完成预热的耗时
+        self.startup_seconds = None
+        self._caches = {}
+
+    def _options(self) -> dict:
+        return {
+            "workflow_factory": self.workflow_factory,
+            "factory_args": self.factory_args,
+            "max_jobs": self.max_jobs,
+            "resume": self.resume,
+            "priority": self.priority,
+            "lock_dir": config.SCHEDULER_LOCK_DIR
+        }
+
+    def _start_worker(self, slot: int):
+        # 每个工作进程使用自己的任务队列和结果管道，重启时丢弃旧的，主进程据此知道每个任务在哪个进程中
+        self._queues[slot] = self._context.Queue()
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_worker_main, args=(slot, self._queues[slot], writer, self._options()),
+                                        name=f"batch-worker-{slot}", daemon=True)
+        process.start()
+        # 主进程不保留写端，工作进程退出后读端能读到 EOF
+        writer.close()
+        self._close_reader(slot)
+        self._readers[slot] = reader
+        self._workers[slot] = process
+        self._inflight[slot] = set()
+        self._ready.discard(slot)
+
+    def _close_reader(self, slot: int):
+        reader = self._readers.pop(slot, None)
+        if reader is not None:
+            reader.close()
+
+    def _receive(self, timeout: float) -> list:
+        """
+        等待最多 timeout 秒，取出各工作进程已发回的全部消息；读到 EOF 的管道（工作进程已退出）不再等待
+        """
+        messages = []
+        slots = {reader: slot for slot, reader in self._readers.items()}
+        for reader in wait(list(slots), timeout):
+            try:
+                while reader.poll():
+                    messages.append(reader.recv())
+            except (EOFError, OSError):
+                self._close_reader(slots[reader])
+        return messages
+
+    def _dispatch(self, jobs: list):
+        """
+        把排队的任务分发给有空闲名额的工作进程
+        """
+        for slot in self._workers:
+            while self._pending and len(self._inflight[slot]) < self.max_jobs:
+                index = self._pending.popleft()
+                self._inflight[slot].add(index)
+                self._queues[slot].put((index, jobs[index]))
+
+    def _handle(self, message: tuple) -> int:
+        """
+        处理工作进程发回的消息
+
+        Returns:
+            本条消息完成的任务数
+        """
+        kind, slot = message[0], message[1]
+        if kind == "ready":
+            self._ready.add(slot)
+            if self.startup_seconds is None and len(self._ready) == len(self._workers):
+                self.startup_seconds = round(time.time() - self._started, 3)
+            print(f"工作进程 #{slot}（pid {message[2]}）已就绪，预热耗时{message[3]}秒")
+            return 0
+        _, _, index, status, records, pid, cache = message
+        if slot in self._inflight:
+            self._inflight[slot].discard(index)
+        if index in self._statuses:
+            # 任务已因工作进程退出记为失败，忽略迟到的结果
+            return 0
+        for record in records:
+            self.recorder.add(record)
+        if cache is not None:
+            self._caches[pid] = cache
+        self._statuses[index] = self._report_progress(status, self._total)
+        return 1
+
+    def _fail(self, index: int, job: dict, error: str) -> int:
+        status = self._new_status(index, job)
+        self._statuses[index] = self._report_progress(self._finish_job(status, time.time(), error=RuntimeError(error)),
+                                                      self._total)
+        return 1
+
+    def _check_workers(self, jobs: list) -> int:
+        """
+        处理退出的工作进程：重启已就绪的工作进程，分发给它的任务重新排队或记为失败
+
+        Returns:
+            本次检查中结束的任务数，包括先取出的完成消息和记为失败的任务
+        """
+        # 先取完管道中已到达的消息，避免把已经完成的任务当作中断
+        finished = sum(self._handle(message) for message in self._receive(0))
+
+        for slot, process in list(self._workers.items()):
+            if process.exitcode is None:
+                continue
+            interrupted = self._inflight.pop(slot)
+            ready = slot in self._ready
+            error = f"工作进程 #{slot}（pid {process.pid}）异常退出，退出码 {process.exitcode}"
+            if ready:
+                self.restarts += 1
+                print(f"{error}，重新启动")
+                self._start_worker(slot)
+            else:
+                print(f"{error}，未完成预热，不再重启")
+                del self._workers[slot]
+                del self._queues[slot]
+                self._close_reader(slot)
+
+            for index in sorted(interrupted):
+                if not ready:
+                    # 工作进程没有开始执行任务，不计入重试次数
+                    self._pending.append(index)
+                    continue
+                self._attempts[index] += 1
+                if self._attempts[index] <= self.job_retries:
+                    self._pending.append(index)
+                else:
+                    finished += self._fail(index, jobs[index], error)
+
+        if not self._workers:
+            while self._pending:
+                index = self._pending.popleft()
+                finished += self._fail(index, jobs[index], "没有可用的工作进程")
+        self._dispatch(jobs)
+        return finished
+
+    def run(self, jobs: list) -> dict:
+        """
+        在工作进程中执行所有任务
+
+        Args:
+            jobs: BlogConfig 字典列表
+
+        Returns:
+            批量执行报告，格式与 BatchRunner.run 相同，另外包含 processes、worker_startup_seconds 和 worker_restarts
+        """
+        self._finished = 0
+        self.restarts = 0
+        self.startup_seconds = None
+        self._caches = {}
+        started = self._started = time.time()
+        started_at = datetime.now().isoformat()
+
+        unique, duplicates = self._split_duplicates(jobs)
+        # spawn 启动的工作进程不继承主进程的线程和连接，各自创建客户端
+        self._context = multiprocessing.get_context("spawn")
+        self._workers, self._queues, self._readers, self._inflight, self._ready = {}, {}, {}, {}, set()
+        self._pending = deque(index for index, _ in unique)
+        self._statuses = {}
+        self._attempts = [0] * len(jobs)
+        self._total = len(jobs)
+
+        with metrics.recording() as self.recorder:
+            for slot in range(min(self.processes, len(unique))):
+                self._start_worker(slot)
+            try:
+                self._dispatch(jobs)
+                remaining = len(unique)
+                checked = time.time()
+                while remaining > 0:
+                    finished = sum(self._handle(message) for message in self._receive(_POLL_SECONDS))
+                    remaining -= finished
+                    if finished:
+                        self._dispatch(jobs)
+                    if time.time() - checked >= _POLL_SECONDS:
+                        remaining -= self._check_workers(jobs)
+                        checked = time.time()
+                for slot in self._workers:
+                    for _ in range(self.max_jobs):
+                        self._queues[slot].put(None)
+                for process in self._workers.values():
+                    process.join()
+            finally:
+                for process in self._workers.values():
+                    if process.is_alive():
+                        process.terminate()
+                for slot in list(self._readers):
+                    self._close_reader(slot)
+
+        return self._build_report(jobs, self._with_duplicates(jobs, self._statuses, duplicates), started, started_at)
+
+    async def arun(self, jobs: list) -> dict:
+        """
+        在线程池中执行 run，等待工作进程时不阻塞事件循环
+
+        Returns:
+            批量执行报告，格式与 run 相同
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, metrics.bind(self.run), jobs)
+
+    def _cache_stats(self):
+        # 各工作进程的缓存命中数分别累计，共用同一个缓存文件
+        if not self._caches:
+            return None
+        caches = list(self._caches.values())
+        hits = sum(c["hits"] for c in caches)
+        misses = sum(c["misses"] for c in caches)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            "entries": max(c["entries"] for c in caches),
+            "bytes": max(c["bytes"] for c in caches)
+        }
+
+    def _build_report(self, jobs: list, results: list, started: float, started_at: str) -> dict:
+        report = super()._build_report(jobs, results, started, started_at)
+        report.update({
+            "processes": self.processes,
+            "worker_startup_seconds": self.startup_seconds,
+            "worker_restarts": self.restarts
+        })
+        return report
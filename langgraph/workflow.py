@@ -1,9 +1,22 @@
 from langgraph.graph import StateGraph, END
-from src.text_processing import TextProcessor
+from langgraph.types import Send, Overwrite
+from langgraph.config import get_stream_writer
+from langchain_core.runnables import RunnableLambda
+from src.text_processing import TextProcessor, StreamStats
 from src.tts_service import TTSService
 from src.blog_generator import BlogGenerator
+from src.clients import get_text_processor, get_tts_service
+from src.pipeline import ParagraphPipeline
+from src.artifacts import JobOutput, new_job_id, write_text, resolve_text
+import src.metrics as metrics
+import src.resilience as resilience
+import src.scheduler as scheduler
+from src.config import JOB_DEADLINE, OUTLINE_FOR_LONG, WORKFLOW_TEXT_REF_CHARS
 from .blog_types import WorkflowState
+from .persistence import get_checkpointer
 from datetime import datetime
+import asyncio
+import uuid
 import os
 
 
@@ -12,10 +25,16 @@ class BlogWorkflow:
     博客生成工作流
     """
     
-    def __init__(self):
-        self.text_processor = TextProcessor()
-        self.tts_service = TTSService()
-        self.blog_generator = BlogGenerator()
+    def __init__(self, text_processor: TextProcessor = None, tts_service: TTSService = None, checkpointer=None,
+                 text_ref_chars: int = None):
+        # 未传入时使用进程内共享的客户端
+        self.text_processor = text_processor or get_text_processor()
+        self.tts_service = tts_service or get_tts_service()
+        self.blog_generator = BlogGenerator(self.text_processor, self.tts_service)
+        # 检查点存储，默认使用 config.WORKFLOW_CHECKPOINT_PATH；传入 False 表示不保存检查点
+        self.checkpointer = get_checkpointer() if checkpointer is None else checkpointer or None
+        # 超过该字符数的文本在状态中只保存引用，默认读取 config.WORKFLOW_TEXT_REF_CHARS，0 表示全部内联保存
+        self.text_ref_chars = WORKFLOW_TEXT_REF_CHARS if text_ref_chars is None else text_ref_chars
         self.workflow = self._build_workflow()
     
     def _build_workflow(self):
@@ -24,29 +43,78 @@ class BlogWorkflow:
         """
         workflow = StateGraph(WorkflowState)
         
-        # 添加节点
-        workflow.add_node("generate_blog", self.generate_blog)
-        workflow.add_node("polish_text", self.polish_text)
-        workflow.add_node("save_blog", self.save_blog)
-        workflow.add_node("generate_audio", self.generate_audio)
-        
-        # 添加边
-        workflow.add_edge("generate_blog", "polish_text")
-        workflow.add_edge("polish_text", "save_blog")
-        workflow.add_conditional_edges(
-            "save_blog",
-            self._should_generate_audio,
+        # 添加节点，每个节点同时提供同步和异步实现
+        workflow.add_node("generate_blog", self._node(self.generate_blog, self.agenerate_blog))
+        workflow.add_node("pipelined_generate", self._node(self.pipelined_generate))
+        workflow.add_node("generate_outline", self._node(self.generate_outline, self.agenerate_outline))
+        workflow.add_node("generate_section", self._node(self.generate_section, self.agenerate_section))
+        workflow.add_node("assemble_sections", self._node(self.assemble_sections))
+        workflow.add_node("polish_text", self._node(self.polish_text, self.apolish_text))
+        workflow.add_node("save_blog", self._node(self.save_blog))
+        workflow.add_node("generate_audio", self._node(self.generate_audio, self.agenerate_audio))
+        workflow.add_node("handle_failure", self.handle_failure)
+        
+        # 添加边：每个节点执行后检查 error，出错时直接进入 handle_failure 结束，不再调用后续的模型和语音合成
+        workflow.add_conditional_edges("generate_blog", self._unless_failed("polish_text"), ["polish_text", "handle_failure"])
+        workflow.add_conditional_edges("polish_text", self._unless_failed("save_blog"), ["save_blog", "handle_failure"])
+        workflow.add_conditional_edges("pipelined_generate", self._unless_failed("save_blog"), ["save_blog", "handle_failure"])
+        # 大纲模式：大纲生成后按章节并行展开（fan-out），全部完成后汇总拼接（fan-in）；大纲解析失败时退回整篇生成
+        workflow.add_conditional_edges("generate_outline", self._fan_out_sections, ["generate_section", "generate_blog"])
+        workflow.add_edge("generate_section", "assemble_sections")
+        workflow.add_conditional_edges("assemble_sections", self._unless_failed("polish_text"),
+                                       ["polish_text", "handle_failure"])
+        workflow.add_conditional_edges("save_blog", self._after_save, ["generate_audio", "handle_failure", END])
+        workflow.add_conditional_edges("generate_audio", self._unless_failed(END), [END, "handle_failure"])
+        workflow.add_edge("handle_failure", END)
+        
+        # 设置入口点：根据执行模式选择逐步执行或段落流水线
+        workflow.set_conditional_entry_point(
+            self._select_mode,
             {
-                True: "generate_audio",
-                False: END
+                "sequential": "generate_blog",
+                "pipelined": "pipelined_generate",
+                "outline": "generate_outline"
             }
         )
-        workflow.add_edge("generate_audio", END)
         
-        # 设置入口点
-        workflow.set_entry_point("generate_blog")
+        return workflow.compile(checkpointer=self.checkpointer)
+    
+    def _node(self, func, afunc=None) -> RunnableLambda:
+        """
+        将同步和异步实现包装为一个节点：invoke 时调用 func，ainvoke 时调用 afunc
+        
+        未提供 afunc 时，异步执行会把 func 放到线程池中运行，避免阻塞事件循环。
+        每次执行都会记录节点耗时，节点内的模型和语音合成请求也会带上节点名。
+        """
+        name = func.__name__
+        if afunc is None:
+            async def afunc(state: WorkflowState) -> WorkflowState:
+                return await asyncio.to_thread(func, state)
+        
+        def run(state: WorkflowState) -> WorkflowState:
+            with metrics.node_timer(name) as node:
+                result = func(state)
+                node["error"] = bool(result.get("error")) and not state.get("error")
+            return self._mark_failure(name, result) if node["error"] else result
+        
+        async def arun(state: WorkflowState) -> WorkflowState:
+            with metrics.node_timer(name) as node:
+                result = await afunc(state)
+                node["error"] = bool(result.get("error")) and not state.get("error")
+            return self._mark_failure(name, result) if node["error"] else result
         
-        return workflow.compile()
+        return RunnableLambda(run, afunc=arun, name=name)
+    
+    def _consume_stream(self, node: str, deltas, stats: StreamStats) -> str:
+        """
+        消费模型的流式输出，并通过 stream writer 把增量推送给 stream() 的调用方
+        """
+        writer = get_stream_writer()
+        parts = []
+        for delta in deltas:
+            parts.append(delta)
+            writer({"node": node, "delta": delta})
+        return "".join(parts).strip()
     
     def generate_blog(self, state: WorkflowState) -> WorkflowState:
         """
@@ -56,24 +124,156 @@ class BlogWorkflow:
             config = state["config"]
             print(f"正在根据主题 '{config['topic']}' 生成博客内容...")
             
-            # 生成原始博客内容
-            original_text = self.text_processor.generate_blog_from_topic(
-                config["topic"], config["length"]
-            )
+            metadata = {}
+            if config.get("stream"):
+                # 流式生成，增量实时推送给调用方
+                stats = StreamStats()
+                original_text = self._consume_stream(
+                    "generate_blog",
+                    self.text_processor.stream_generate_blog_from_topic(
+                        config["topic"], config["length"], stats, use_cache=config.get("use_cache", True)
+                    ),
+                    stats
+                )
+                metadata["generation_stats"] = stats.as_dict()
+            else:
+                # 生成原始博客内容
+                original_text = self.text_processor.generate_blog_from_topic(
+                    config["topic"], config["length"], use_cache=config.get("use_cache", True)
+                )
             
             return {
-                **state,
-                "original_text": original_text,
-                "metadata": {**state["metadata"], "generated_at": datetime.now().isoformat()}
+                "original_text": self._store_text(state, original_text),
+                "metadata": {**metadata, "generated_at": datetime.now().isoformat()}
             }
         
         except Exception as e:
             error_msg = f"博客生成失败: {str(e)}"
             print(error_msg)
+            return {"error": error_msg}
+    
+    async def agenerate_blog(self, state: WorkflowState) -> WorkflowState:
+        """
+        生成博客内容（异步）
+        """
+        config = state["config"]
+        if config.get("stream"):
+            # 流式生成沿用同步实现，在线程池中执行
+            return await asyncio.to_thread(self.generate_blog, state)
+        
+        try:
+            print(f"正在根据主题 '{config['topic']}' 生成博客内容...")
+            
+            original_text = await self.text_processor.agenerate_blog_from_topic(
+                config["topic"], config["length"], use_cache=config.get("use_cache", True)
+            )
+            
             return {
-                **state,
-                "error": error_msg
+                "original_text": self._store_text(state, original_text),
+                "metadata": {"generated_at": datetime.now().isoformat()}
             }
+        
+        except Exception as e:
+            error_msg = f"博客生成失败: {str(e)}"
+            print(error_msg)
+            return {"error": error_msg}
+    
+    def generate_outline(self, state: WorkflowState) -> WorkflowState:
+        """
+        生成博客大纲，大纲无法解析时不写入 outline，随后退回整篇生成
+        """
+        config = state["config"]
+        print(f"正在为主题 '{config['topic']}' 生成大纲...")
+        try:
+            outline = self.text_processor.generate_outline(
+                config["topic"], config["length"], use_cache=config.get("use_cache", True)
+            )
+        except Exception as e:
+            print(f"大纲生成失败，改为整篇生成: {str(e)}")
+            return {"outline": None}
+        return self._outline_result(state, outline)
+    
+    async def agenerate_outline(self, state: WorkflowState) -> WorkflowState:
+        """
+        生成博客大纲（异步）
+        """
+        config = state["config"]
+        print(f"正在为主题 '{config['topic']}' 生成大纲...")
+        try:
+            outline = await self.text_processor.agenerate_outline(
+                config["topic"], config["length"], use_cache=config.get("use_cache", True)
+            )
+        except Exception as e:
+            print(f"大纲生成失败，改为整篇生成: {str(e)}")
+            return {"outline": None}
+        return self._outline_result(state, outline)
+    
+    def _outline_result(self, state: WorkflowState, outline: dict) -> WorkflowState:
+        print(f"大纲已生成：{len(outline['sections'])}个正文章节，开始并行生成各部分...")
+        return {
+            "outline": outline,
+            "metadata": {"outline_at": datetime.now().isoformat(), "outline_sections": len(outline["sections"])}
+        }
+    
+    def _fan_out_sections(self, state: WorkflowState):
+        """
+        为大纲的每个部分（引言、正文章节、结论）发送一个并行执行的 generate_section 任务
+        """
+        if not state.get("outline"):
+            return "generate_blog"
+        parts = self.text_processor.outline_parts(state["outline"])
+        return [
+            Send("generate_section", {"config": state["config"], "outline": state["outline"], "index": i})
+            for i in range(len(parts))
+        ]
+    
+    def generate_section(self, task: dict) -> dict:
+        """
+        生成大纲中的一个部分，只写入 sections 中自己的序号；失败时写入None，由 assemble_sections 汇总报错
+        """
+        config = task["config"]
+        try:
+            text = self.text_processor.generate_outline_section(
+                config["topic"], task["outline"], task["index"], config["length"], use_cache=config.get("use_cache", True)
+            )
+        except Exception as e:
+            print(f"第{task['index'] + 1}部分生成失败: {str(e)}")
+            text = None
+        return {"sections": {str(task["index"]): text}}
+    
+    async def agenerate_section(self, task: dict) -> dict:
+        """
+        生成大纲中的一个部分（异步）
+        """
+        config = task["config"]
+        try:
+            text = await self.text_processor.agenerate_outline_section(
+                config["topic"], task["outline"], task["index"], config["length"], use_cache=config.get("use_cache", True)
+            )
+        except Exception as e:
+            print(f"第{task['index'] + 1}部分生成失败: {str(e)}")
+            text = None
+        return {"sections": {str(task["index"]): text}}
+    
+    def assemble_sections(self, state: WorkflowState) -> WorkflowState:
+        """
+        按大纲顺序拼接并行生成的各部分
+        """
+        outline = state["outline"]
+        parts = self.text_processor.outline_parts(outline)
+        texts = [state["sections"].get(str(i)) for i in range(len(parts))]
+        failed = [parts[i]["heading"] for i, text in enumerate(texts) if not text]
+        if failed:
+            error_msg = f"博客生成失败: {len(failed)}个部分未能生成（{'、'.join(failed)}）"
+            print(error_msg)
+            return {"error": error_msg}
+        
+        # 拼接完成后清空各部分正文，后续检查点不再重复保存
+        return {
+            "original_text": self._store_text(state, self.text_processor.assemble_outline(outline, texts)),
+            "sections": Overwrite({}),
+            "metadata": {"generated_at": datetime.now().isoformat()}
+        }
     
     def polish_text(self, state: WorkflowState) -> WorkflowState:
         """
@@ -83,24 +283,122 @@ class BlogWorkflow:
             config = state["config"]
             print("正在润色博客内容...")
             
-            # 润色博客内容
-            polished_text = self.text_processor.polish_text(
-                state["original_text"], config["polish_type"]
+            metadata = {}
+            section_stats = {}
+            if config.get("stream"):
+                stats = StreamStats()
+                polished_text = self._consume_stream(
+                    "polish_text",
+                    self.text_processor.stream_polish_text(
+                        resolve_text(state["original_text"]), config["polish_type"], stats, use_cache=config.get("use_cache", True),
+                        topic=config["topic"], section_stats=section_stats
+                    ),
+                    stats
+                )
+                metadata["polish_stats"] = stats.as_dict()
+            else:
+                # 润色博客内容；请求失败时抛出 LLMGenerationError，不会把原文当作润色结果继续保存和合成
+                polished_text = self.text_processor.polish_text(
+                    resolve_text(state["original_text"]), config["polish_type"], use_cache=config.get("use_cache", True),
+                    topic=config["topic"], stats=section_stats
+                )
+            
+            return {
+                "polished_text": self._store_text(state, polished_text),
+                "metadata": {**metadata, **self._section_metadata(section_stats), "polished_at": datetime.now().isoformat()}
+            }
+        
+        except Exception as e:
+            error_msg = f"文本润色失败: {str(e)}"
+            print(error_msg)
+            return {"error": error_msg}
+    
+    async def apolish_text(self, state: WorkflowState) -> WorkflowState:
+        """
+        润色博客内容（异步）
+        """
+        config = state["config"]
+        if config.get("stream"):
+            return await asyncio.to_thread(self.polish_text, state)
+        
+        try:
+            print("正在润色博客内容...")
+            
+            section_stats = {}
+            polished_text = await self.text_processor.apolish_text(
+                resolve_text(state["original_text"]), config["polish_type"], use_cache=config.get("use_cache", True),
+                topic=config["topic"], stats=section_stats
             )
             
             return {
-                **state,
-                "polished_text": polished_text,
-                "metadata": {**state["metadata"], "polished_at": datetime.now().isoformat()}
+                "polished_text": self._store_text(state, polished_text),
+                "metadata": {**self._section_metadata(section_stats), "polished_at": datetime.now().isoformat()}
             }
         
         except Exception as e:
             error_msg = f"文本润色失败: {str(e)}"
             print(error_msg)
+            return {"error": error_msg}
+    
+    @staticmethod
+    def _section_metadata(section_stats: dict) -> dict:
+        """
+        分段润色的统计写入任务结果；fallbacks 为回复不完整且无法再拆分、保留了原文的片段数
+        """
+        return {"polish_sections": section_stats} if section_stats else {}
+    
+    def pipelined_generate(self, state: WorkflowState) -> WorkflowState:
+        """
+        段落流水线：生成的文本每凑齐一段就提交润色，润色完成的段落立即开始语音合成
+        """
+        try:
+            config = state["config"]
+            print(f"正在以流水线模式根据主题 '{config['topic']}' 生成博客内容...")
+            
+            audio_file = self._output(state).path(f"audio{self.tts_service.extension}") if config["with_tts"] else None
+            
+            pipeline = ParagraphPipeline(
+                self.text_processor, self.tts_service, config["polish_type"], config["with_tts"],
+                use_cache=config.get("use_cache", True)
+            )
+            writer = get_stream_writer()
+            stats = StreamStats()
+            try:
+                deltas = self.text_processor.stream_generate_blog_from_topic(
+                    config["topic"], config["length"], stats, use_cache=config.get("use_cache", True)
+                )
+                for delta in deltas:
+                    pipeline.feed(delta)
+                    writer({"node": "pipelined_generate", "delta": delta})
+            except Exception:
+                pipeline.close()
+                raise
+            generated_at = datetime.now().isoformat()
+            
+            result = pipeline.finish(audio_file)
+            now = datetime.now().isoformat()
+            metadata = {
+                "generation_stats": stats.as_dict(),
+                "pipeline_paragraphs": result["paragraphs"],
+                "first_audio_submitted_ms": result["first_audio_submitted_ms"],
+                "generated_at": generated_at,
+                "polished_at": now
+            }
+            if audio_file:
+                print(f"语音合成成功，音频文件已保存至: {audio_file}")
+                metadata["audio_generated_at"] = now
+            
             return {
-                **state,
-                "error": error_msg
+                "original_text": self._store_text(state, result["original_text"]),
+                "polished_text": self._store_text(state, result["polished_text"]),
+                "audio_file": audio_file,
+                "metadata": metadata
             }
+        
+        except Exception as e:
+            error_msg = f"流水线执行失败: {str(e)}"
+            print(error_msg)
+            return {"error": error_msg}
     
     def save_blog(self, state: WorkflowState) -> WorkflowState:
         """
@@ -108,89 +406,311 @@ class BlogWorkflow:
         """
         try:
             config = state["config"]
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            blog_file = f"results/blog_{timestamp}.md"
-            
-            # 确保results目录存在
-            os.makedirs("results", exist_ok=True)
+            blog_file = self._output(state).path("blog.md")
             
-            # 保存博客文本
-            with open(blog_file, "w", encoding="utf-8") as f:
-                f.write(f"# {config['topic']}\n\n")
-                f.write(state["polished_text"])
+            # 保存博客文本（先写临时文件再重命名）
+            write_text(blog_file, f"# {config['topic']}\n\n{resolve_text(state['polished_text'])}")
             
             print(f"博客文本已保存至: {blog_file}")
             
             return {
-                **state,
                 "blog_file": blog_file,
-                "metadata": {**state["metadata"], "saved_at": datetime.now().isoformat()}
+                "metadata": {"saved_at": datetime.now().isoformat()}
             }
         
         except Exception as e:
             error_msg = f"保存博客失败: {str(e)}"
             print(error_msg)
-            return {
-                **state,
-                "error": error_msg
-            }
+            return {"error": error_msg}
     
     def generate_audio(self, state: WorkflowState) -> WorkflowState:
         """
         生成语音文件
         """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_file = f"results/audio_{timestamp}.mp3"
+            audio_file = self._output(state).path(f"audio{self.tts_service.extension}")
             
             print("正在生成语音文件...")
             
             # 生成语音文件
             success = self.tts_service.text_to_speech(
-                state["polished_text"], audio_file
+                resolve_text(state["polished_text"]), audio_file
             )
             
-            if success:
-                print(f"语音合成成功，音频文件已保存至: {audio_file}")
-                return {
-                    **state,
-                    "audio_file": audio_file,
-                    "metadata": {**state["metadata"], "audio_generated_at": datetime.now().isoformat()}
-                }
-            else:
-                error_msg = "语音合成失败"
-                print(error_msg)
-                return {
-                    **state,
-                    "error": error_msg
-                }
+            return self._audio_result(state, audio_file, success)
+        
+        except Exception as e:
+            error_msg = f"生成音频失败: {str(e)}"
+            print(error_msg)
+            return {"error": error_msg}
+    
+    async def agenerate_audio(self, state: WorkflowState) -> WorkflowState:
+        """
+        生成语音文件（异步）
+        """
+        try:
+            audio_file = self._output(state).path(f"audio{self.tts_service.extension}")
+            
+            print("正在生成语音文件...")
+            
+            success = await self.tts_service.atext_to_speech(
+                resolve_text(state["polished_text"]), audio_file
+            )
+            
+            return self._audio_result(state, audio_file, success)
         
         except Exception as e:
             error_msg = f"生成音频失败: {str(e)}"
             print(error_msg)
+            return {"error": error_msg}
+    
+    def _audio_result(self, state: WorkflowState, audio_file: str, success: bool) -> WorkflowState:
+        """
+        根据语音合成结果更新状态
+        """
+        if success:
+            print(f"语音合成成功，音频文件已保存至: {audio_file}")
             return {
-                **state,
-                "error": error_msg
+                "audio_file": audio_file,
+                "metadata": {"audio_generated_at": datetime.now().isoformat()}
             }
+        else:
+            error_msg = "语音合成失败"
+            print(error_msg)
+            return {"error": error_msg}
+    
+    @staticmethod
+    def _mark_failure(name: str, result: dict) -> dict:
+        """
+        在出错节点的返回值中记录节点名
+        """
+        return {**result, "metadata": {**result.get("metadata", {}), "failed_node": name}}
+    
+    def _unless_failed(self, next_node: str):
+        """
+        返回条件边的路由函数：状态中有错误时进入 handle_failure，否则进入 next_node
+        """
+        def route(state: WorkflowState) -> str:
+            return "handle_failure" if state.get("error") else next_node
+        return route
+    
+    def _after_save(self, state: WorkflowState) -> str:
+        """
+        保存博客后的路由：出错时结束，需要时生成音频
+        """
+        if state.get("error"):
+            return "handle_failure"
+        return "generate_audio" if self._should_generate_audio(state) else END
+    
+    def handle_failure(self, state: WorkflowState) -> WorkflowState:
+        """
+        终止节点：记录失败时间，跳过剩余的生成、润色和语音合成
+        """
+        print(f"工作流在 {state['metadata'].get('failed_node', '未知节点')} 失败，已跳过后续步骤: {state['error']}")
+        return {"metadata": {"failed_at": datetime.now().isoformat()}}
     
     def _should_generate_audio(self, state: WorkflowState) -> bool:
         """
         判断是否需要生成音频
         """
-        return state["config"]["with_tts"] and state["polished_text"] is not None
+        # 流水线模式下音频已在生成过程中合成完毕
+        return state["config"]["with_tts"] and state["polished_text"] is not None and not state.get("audio_file")
     
-    def run(self, config: dict) -> WorkflowState:
+    def _select_mode(self, state: WorkflowState) -> str:
         """
-        运行工作流
+        选择执行模式，未指定时长篇博客使用大纲模式
         """
-        # 确保results目录存在
-        os.makedirs("results", exist_ok=True)
-        
-        # 执行工作流
-        initial_state: WorkflowState = {
+        config = state["config"]
+        if config.get("mode"):
+            return config["mode"]
+        return "outline" if OUTLINE_FOR_LONG and config["length"] == "long" else "sequential"
+    
+    def _initial_state(self, config: dict) -> WorkflowState:
+        """
+        构造工作流初始状态
+        """
+        # 显式清空各阶段结果，在已有检查点的线程上重新执行时不会沿用上一次的输出
+        return {
             "config": config,
-            "metadata": {"workflow_started_at": datetime.now().isoformat()}
+            "job_id": config.get("job_id") or new_job_id(),
+            "original_text": None,
+            "outline": None,
+            "sections": Overwrite({}),
+            "polished_text": None,
+            "blog_file": None,
+            "audio_file": None,
+            "error": None,
+            "metadata": Overwrite({"workflow_started_at": datetime.now().isoformat()})
         }
+    
+    def _artifacts_exist(self, state: WorkflowState) -> bool:
+        """
+        判断已完成任务的产物文件是否都还在
+        """
+        files = [state.get("blog_file")]
+        if state["config"]["with_tts"]:
+            files.append(state.get("audio_file"))
+        # 按引用保存的文本也必须还在，否则无法返回完整结果
+        files += [value["path"] for value in (state.get("original_text"), state.get("polished_text"))
+                  if isinstance(value, dict)]
+        return all(f and os.path.exists(f) for f in files)
+    
+    def _resume_point(self, config: dict, thread_id: str = None, resume: bool = True):
+        """
+        根据检查点决定从哪里开始执行
         
-        result = self.workflow.invoke(initial_state)
+        Returns:
+            (输入, 运行配置, 检查点状态)：
+            状态为 new 时从头执行；resumed 时输入为None，从最后一个成功的检查点继续；
+            completed 时任务已完成且产物文件都在，输入为最终状态，不需要再执行；
+            配置 use_cache=False 时要求重新生成，不使用检查点，总是从头执行
+        """
+        initial_state = self._initial_state(config)
+        if self.checkpointer is None:
+            return initial_state, None, "new"
+        
+        run_config = {"configurable": {"thread_id": thread_id or config.get("thread_id") or uuid.uuid4().hex}}
+        if not resume or not config.get("use_cache", True):
+            return initial_state, run_config, "new"
+        
+        snapshot = self.workflow.get_state(run_config)
+        if not snapshot.values or not snapshot.values.get("job_id"):
+            # 没有检查点，或是早于任务输出目录的旧检查点
+            return initial_state, run_config, "new"
+        if not snapshot.values.get("error"):
+            if snapshot.next:
+                # 任务被中断：从中断处继续
+                return None, run_config, "resumed"
+            if self._artifacts_exist(snapshot.values):
+                return snapshot.values, run_config, "completed"
+            return initial_state, run_config, "new"
+        
+        # 节点失败时会把错误写入状态，回到最近一个没有错误且还有待执行节点的检查点重新执行
+        for past in self.workflow.get_state_history(run_config):
+            if past.values and past.next and not past.values.get("error"):
+                return None, past.config, "resumed"
+        return initial_state, run_config, "new"
+    
+    def _output(self, state: WorkflowState) -> JobOutput:
+        """
+        返回任务的输出目录 results/<任务ID>/，同一任务从检查点继续时仍写入同一目录
+        """
+        return JobOutput(state["job_id"])
+    
+    def _store_text(self, state: WorkflowState, text: str):
+        """
+        返回写入状态的文本：超过 text_ref_chars 时保存到任务输出目录，状态中只记录引用
+        """
+        if not self.text_ref_chars or text is None or len(text) <= self.text_ref_chars:
+            return text
+        return self._output(state).store_text(text)
+    
+    def _resolve(self, state: WorkflowState) -> WorkflowState:
+        """
+        将状态中按引用保存的文本读回，返回给调用方的状态总是包含完整文本
+        """
+        texts = {key: resolve_text(state[key]) for key in ("original_text", "polished_text")
+                 if isinstance(state.get(key), dict)}
+        return {**state, **texts} if texts else state
+    
+    def _write_manifest(self, state: WorkflowState, run_config: dict = None, recorder: metrics.MetricsRecorder = None):
+        """
+        在任务输出目录中写入清单：任务配置、产物的大小和哈希、各节点耗时和执行结果
+        """
+        metadata = state.get("metadata", {})
+        timings = {key: value for key, value in metadata.items() if key.endswith("_at")}
+        if recorder is not None:
+            timings["nodes_ms"] = {name: node["total_ms"] for name, node in recorder.summary()["nodes"].items()}
+        self._output(state).write_manifest(
+            state["config"],
+            {"blog": state.get("blog_file"), "audio": state.get("audio_file")},
+            timings,
+            status="failed" if state.get("error") else "succeeded",
+            error=state.get("error"),
+            failed_node=metadata.get("failed_node"),
+            polish_sections=metadata.get("polish_sections"),
+            thread_id=run_config["configurable"]["thread_id"] if run_config is not None else None
+        )
+    
+    def _finish_run(self, result: WorkflowState, run_config: dict, status: str,
+                    recorder: metrics.MetricsRecorder = None) -> WorkflowState:
+        """
+        将线程ID、检查点状态和本次运行的指标汇总写入 metadata，执行过的任务同时写入任务清单
+        """
+        metadata = {**result.get("metadata", {}), "checkpoint": status}
+        if run_config is not None:
+            metadata["thread_id"] = run_config["configurable"]["thread_id"]
+        if recorder is not None:
+            metadata["metrics"] = recorder.summary()
+        result = {**self._resolve(result), "metadata": metadata}
+        if status != "completed":
+            self._write_manifest(result, run_config, recorder)
         return result
+    
+    def run(self, config: dict, thread_id: str = None, resume: bool = True) -> WorkflowState:
+        """
+        运行工作流
+        
+        Args:
+            config: 博客生成配置
+            thread_id: 检查点线程ID，默认读取 config["thread_id"]，都未提供时每次运行使用新的线程
+            resume: 同一线程已有检查点时是否从中断或失败的节点继续，False 表示从头执行
+        """
+        # 执行工作流
+        inputs, run_config, status = self._resume_point(config, thread_id, resume)
+        if status == "completed":
+            print(f"任务已完成，跳过执行：{config['topic']}")
+            return self._finish_run(inputs, run_config, status)
+        if status == "resumed":
+            print(f"从检查点继续执行：{config['topic']}")
+        
+        with metrics.recording(topic=config["topic"]) as recorder, \
+                resilience.deadline(config.get("deadline_seconds", JOB_DEADLINE)), \
+                scheduler.scheduling(priority=config.get("priority")):
+            result = self.workflow.invoke(inputs, run_config)
+        return self._finish_run(result, run_config, status, recorder)
+    
+    async def arun(self, config: dict, thread_id: str = None, resume: bool = True) -> WorkflowState:
+        """
+        异步运行工作流，模型调用使用异步客户端，同一事件循环可同时驱动大量任务
+        """
+        inputs, run_config, status = await asyncio.to_thread(self._resume_point, config, thread_id, resume)
+        if status == "completed":
+            print(f"任务已完成，跳过执行：{config['topic']}")
+            return self._finish_run(inputs, run_config, status)
+        if status == "resumed":
+            print(f"从检查点继续执行：{config['topic']}")
+        
+        with metrics.recording(topic=config["topic"]) as recorder, \
+                resilience.deadline(config.get("deadline_seconds", JOB_DEADLINE)), \
+                scheduler.scheduling(priority=config.get("priority")):
+            result = await self.workflow.ainvoke(inputs, run_config)
+        return self._finish_run(result, run_config, status, recorder)
+    
+    def stream(self, config: dict):
+        """
+        流式运行工作流，生成和润色的文本增量会在模型输出时立即产出
+        
+        Args:
+            config: 博客生成配置，stream 选项会被强制开启
+        
+        Yields:
+            (事件类型, 数据) 元组：
+            ("delta", {"node": 节点名, "delta": 文本增量}) 模型生成的文本增量；
+            ("state", 状态) 每个节点执行完成后的完整工作流状态（按引用保存的文本已读回），最后一个即为最终结果
+        """
+        inputs, run_config, status = self._resume_point({**config, "stream": True})
+        if status == "completed":
+            yield "state", self._finish_run(inputs, run_config, status)
+            return
+        
+        final = None
+        for mode, chunk in self.workflow.stream(inputs, run_config, stream_mode=["custom", "values"]):
+            if mode == "custom":
+                yield "delta", chunk
+            else:
+                final = chunk
+                yield "state", self._resolve(chunk)
+        if final is not None:
+            # 调用方开启了指标记录时（如 HTTP 服务），清单中同时记录各节点耗时
+            self._write_manifest(final, run_config, metrics.current_recorder())
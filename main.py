@@ -1,4 +1,7 @@
+import os
 from src.blog_generator import BlogGenerator
+from src.text_processing import LLMGenerationError
+from src.bulk import BlogDirectoryProcessor, print_bulk_report
 import src.config as config
 
 def display_menu():
@@ -12,7 +15,8 @@ def display_menu():
     print("2. 仅生成博客文本（不生成语音）")
     print("3. 对已有文本进行润色和语音生成")
     print("4. 处理已有的博客文件")
-    print("5. 退出程序")
+    print("5. 批量处理目录中的博客文件")
+    print("6. 退出程序")
     print("=" * 50)
 
 def get_valid_choice(prompt: str, min_val: int, max_val: int) -> int:
@@ -69,7 +73,7 @@ def main():
         display_menu()
         
         # 获取用户选择
-        choice = get_valid_choice("请输入选择：", 1, 5)
+        choice = get_valid_choice("请输入选择：", 1, 6)
         
         if choice == 1:
             # 1. 根据主题生成完整博客（带语音）
@@ -77,7 +81,11 @@ def main():
             length = get_blog_length()
             
             print("=" * 50)
-            result = blog_generator.generate_blog(topic, length, with_tts=True)
+            try:
+                result = blog_generator.generate_blog(topic, length, with_tts=True)
+            except LLMGenerationError as e:
+                print(f"博客生成失败：{e}")
+                continue
             print("=" * 50)
             print("博客生成完成！")
             print(f"主题：{result['topic']}")
@@ -91,7 +99,11 @@ def main():
             length = get_blog_length()
             
             print("=" * 50)
-            result = blog_generator.generate_blog(topic, length, with_tts=False)
+            try:
+                result = blog_generator.generate_blog(topic, length, with_tts=False)
+            except LLMGenerationError as e:
+                print(f"博客生成失败：{e}")
+                continue
             print("=" * 50)
             print("博客文本生成完成！")
             print(f"主题：{result['topic']}")
@@ -160,12 +172,37 @@ def main():
                 print(f"润色后文件：{result['polished_file']}")
                 if result['audio_file']:
                     print(f"音频文件：{result['audio_file']}")
+                if result.get('incremental'):
+                    stats = result['incremental']
+                    print(f"增量处理：共{stats['paragraphs']}段，重新润色{stats['polished']}段，重新合成{stats['synthesized']}段")
             else:
                 print(f"处理失败：{result.get('error', '未知错误')}")
             print("=" * 50)
             
         elif choice == 5:
-            # 5. 退出程序
+            # 5. 批量处理目录中的博客文件
+            directory = input("请输入博客目录：")
+            if not os.path.isdir(directory):
+                print(f"错误：目录 '{directory}' 不存在")
+                continue
+            
+            print("是否生成语音文件？")
+            print("1. 是")
+            print("2. 否")
+            with_tts = get_valid_choice("请输入选择：", 1, 2) == 1
+            
+            print("请选择处理方式：")
+            print("1. 处理一次目录中新增和修改过的文件")
+            print("2. 持续监视目录（按 Ctrl+C 停止）")
+            watch = get_valid_choice("请输入选择：", 1, 2) == 2
+            
+            print("=" * 50)
+            processor = BlogDirectoryProcessor(directory, blog_generator, with_tts)
+            report = processor.watch() if watch else processor.run_once()
+            print_bulk_report(report)
+        
+        elif choice == 6:
+            # 6. 退出程序
             print("感谢使用 AI 博客生成与语音合成系统！")
             break
         
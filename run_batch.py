@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+批量执行LangGraph工作流，从任务文件读取多个博客配置并发生成
+"""
+
+import asyncio
+import argparse
+import src.config as config
+from langgraph.batch import BatchRunner, load_jobs, save_report, save_metrics, print_report
+from langgraph.workers import ProcessBatchRunner
+from src.scheduler import PRIORITIES
+
+
+def main():
+    """
+    主函数
+    """
+    parser = argparse.ArgumentParser(description="批量生成博客和语音")
+    parser.add_argument("jobs_file", help="任务文件（JSON Lines / JSON 数组 / CSV），字段与 BlogConfig 一致")
+    parser.add_argument("--max-jobs", type=int, default=4, help="同时执行的工作流数量")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="模型服务的最大并发请求数")
+    parser.add_argument("--tts-concurrency", type=int, default=2, help="语音合成服务的最大并发请求数")
+    parser.add_argument("--mode", choices=["sequential", "pipelined", "outline"], help="覆盖所有任务的执行模式")
+    parser.add_argument("--no-cache", action="store_true", help="不读取模型回复缓存，重新生成所有内容")
+    parser.add_argument("--no-resume", action="store_true", help="忽略检查点，所有任务从头执行")
+    parser.add_argument("--priority", default="batch", choices=list(PRIORITIES),
+                        help="后端请求的排队优先级，默认 batch（让行交互请求）；任务中的 priority 字段优先")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用 asyncio 在单个事件循环中驱动所有任务（适合大量并发任务）")
+    parser.add_argument("--processes", type=int, default=config.BATCH_PROCESSES,
+                        help="工作进程数，大于0时任务分发到多个进程执行，--max-jobs 和并发限制按每个进程计算；0 表示在当前进程中执行")
+    args = parser.parse_args()
+    if args.processes and args.use_async:
+        parser.error("--processes 和 --async 不能同时使用")
+
+    jobs = load_jobs(args.jobs_file)
+    if args.mode:
+        jobs = [{**job, "mode": args.mode} for job in jobs]
+    if args.no_cache:
+        jobs = [{**job, "use_cache": False} for job in jobs]
+
+    print("=" * 50)
+    per_process = f"，工作进程：{args.processes}（以下为每个进程）" if args.processes else ""
+    print(f"共 {len(jobs)} 个任务{per_process}，并发工作流：{args.max_jobs}，"
+          f"模型并发：{args.llm_concurrency}，语音合成并发：{args.tts_concurrency}")
+    print("=" * 50)
+
+    if args.processes:
+        runner = ProcessBatchRunner(args.processes, args.max_jobs, args.llm_concurrency, args.tts_concurrency,
+                                    resume=not args.no_resume, priority=args.priority)
+    else:
+        runner = BatchRunner(args.max_jobs, args.llm_concurrency, args.tts_concurrency, resume=not args.no_resume,
+                             priority=args.priority)
+    report = asyncio.run(runner.arun(jobs)) if args.use_async else runner.run(jobs)
+
+    print_report(report)
+    print(f"报告已保存至: {save_report(report)}")
+    jsonl_file, prom_file = save_metrics(runner.recorder)
+    print(f"指标明细已保存至: {jsonl_file}，汇总指标已保存至: {prom_file}")
+
+
+if __name__ == "__main__":
+    main()
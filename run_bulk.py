@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+批量处理目录中的博客文件：扫描一次，或持续监视目录并处理新增和修改过的 Markdown 文件
+"""
+
+import argparse
+from src.bulk import BlogDirectoryProcessor, print_bulk_report
+
+
+def main():
+    """
+    主函数
+    """
+    parser = argparse.ArgumentParser(description="批量润色目录中的博客并生成语音")
+    parser.add_argument("directory", help="博客目录（处理其中的 .md 文件，*_polished.md 除外）")
+    parser.add_argument("--watch", action="store_true", help="持续监视目录，按 Ctrl+C 停止")
+    parser.add_argument("--interval", type=float, help="监视模式的轮询间隔（秒），默认读取 BULK_POLL_INTERVAL")
+    parser.add_argument("--workers", type=int, help="同时处理的文件数，默认读取 BULK_WORKERS")
+    parser.add_argument("--no-tts", action="store_true", help="只润色，不生成语音")
+    args = parser.parse_args()
+
+    processor = BlogDirectoryProcessor(args.directory, with_tts=not args.no_tts, max_workers=args.workers)
+    report = processor.watch(args.interval) if args.watch else processor.run_once()
+    print_bulk_report(report)
+
+
+if __name__ == "__main__":
+    main()
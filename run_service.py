@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+以常驻 HTTP 服务运行博客生成工作流，客户端通过 /jobs 提交任务并查询进度
+
+需要安装 ASGI 服务器：pip install uvicorn
+"""
+
+import argparse
+import src.config as config
+from langgraph.service import BlogService, create_app
+
+
+def main():
+    """
+    主函数
+    """
+    parser = argparse.ArgumentParser(description="博客生成 HTTP 服务")
+    parser.add_argument("--host", default=config.SERVICE_HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT, help="监听端口")
+    parser.add_argument("--max-jobs", type=int, default=config.SERVICE_MAX_JOBS, help="同时执行的任务数")
+    parser.add_argument("--max-queue", type=int, default=config.SERVICE_MAX_QUEUE, help="排队任务数上限")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("未安装 uvicorn，请先执行 pip install uvicorn，或使用其他 ASGI 服务器加载 langgraph.service:app")
+        return
+
+    app = create_app(BlogService(max_jobs=args.max_jobs, max_queue=args.max_queue))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
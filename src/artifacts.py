@@ -0,0 +1,164 @@
+# 任务产物：每个任务使用唯一的任务ID和独立的输出目录，所有文件先写临时文件再重命名
+#
+# 输出目录为 results/<任务ID>/，其中的 manifest.json 记录任务配置、各产物的大小和哈希以及各阶段耗时。
+# 读取方（下游消费者、HTTP 服务）只会看到完整的文件，同一秒内开始的任务也不会互相覆盖。
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime
+from contextlib import contextmanager
+import src.config as config
+
+MANIFEST_NAME = "manifest.json"
+
+
+def new_job_id() -> str:
+    """
+    生成任务ID：时间戳加随机后缀，按名称排序即按创建时间排序
+    """
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def file_digest(path: str) -> str:
+    """
+    计算文件内容的 sha256
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _tmp_path(path: str) -> str:
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+def atomic_write(path: str, write):
+    """
+    调用 write(临时文件路径) 写入内容，成功后重命名为 path；失败时删除临时文件，path 保持原样
+    """
+    tmp = _tmp_path(path)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: str = None):
+    """
+    打开一个临时文件用于写入，正常退出时重命名为 path，发生异常时删除临时文件
+
+    适合边生成边写入的场景：写入过程中 path 要么不存在，要么仍是上一次的完整内容。
+    """
+    tmp = _tmp_path(path)
+    try:
+        with open(tmp, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_text(path: str, text: str):
+    """
+    原子写入文本文件
+    """
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def resolve_text(value):
+    """
+    返回文本内容：value 为 JobOutput.store_text 返回的引用时读取引用的文件，否则原样返回
+
+    Raises:
+        FileNotFoundError: 引用的文件已被删除
+    """
+    if not isinstance(value, dict):
+        return value
+    with open(value["path"], "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def write_json(path: str, data):
+    """
+    原子写入 JSON 文件
+    """
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class JobOutput:
+    """
+    一个任务的输出目录
+
+    Args:
+        job_id: 任务ID，未传入时生成新的ID；同一任务多次执行（如从检查点继续）时传入相同的ID
+        root: 输出根目录，默认读取 config.RESULTS_DIR
+    """
+
+    def __init__(self, job_id: str = None, root: str = None):
+        self.job_id = job_id or new_job_id()
+        self.directory = os.path.join(root or config.RESULTS_DIR, self.job_id)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        """
+        返回输出目录中的文件路径
+        """
+        return os.path.join(self.directory, name)
+
+    def store_text(self, text: str) -> dict:
+        """
+        将大段文本保存到输出目录的 texts/<sha256>.txt 中，返回可代替文本放入工作流状态的引用
+
+        文件名即内容哈希，同一内容只写一次，检查点中较早的引用不会被后来的内容覆盖。
+
+        Returns:
+            {"path": 文件路径, "sha256": 内容哈希, "chars": 字符数}，用 resolve_text 读回文本
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self.path(os.path.join("texts", f"{digest}.txt"))
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_text(path, text)
+        return {"path": path, "sha256": digest, "chars": len(text)}
+
+    def write_manifest(self, job_config: dict, files: dict, timings: dict = None, **extra) -> str:
+        """
+        写入任务清单
+
+        Args:
+            job_config: 任务配置
+            files: {产物名称: 文件路径}，不存在的文件不会记录
+            timings: 各阶段耗时
+            extra: 其他字段，如 status、error
+
+        Returns:
+            清单文件路径
+        """
+        artifacts = {}
+        for name, path in files.items():
+            if path and os.path.exists(path):
+                artifacts[name] = {
+                    "path": path,
+                    "bytes": os.path.getsize(path),
+                    "sha256": file_digest(path)
+                }
+        manifest = {
+            "job_id": self.job_id,
+            "config": job_config,
+            "artifacts": artifacts,
+            "timings": timings or {},
+            **extra,
+            "written_at": datetime.now().isoformat()
+        }
+        path = self.path(MANIFEST_NAME)
+        write_json(path, manifest)
+        return path
@@ -0,0 +1,207 @@
+# 音频拼接工具：按顺序将多段合成结果写入同一个文件
+import io
+import os
+import uuid
+import wave
+
+# 合成器输出格式（dashscope AudioFormat 的 format 字段）对应的文件扩展名，PCM 输出会封装为 WAV 文件
+_EXTENSIONS = {"mp3": ".mp3", "wav": ".wav", "pcm": ".wav", "opus": ".ogg"}
+
+
+def file_extension(audio_format) -> str:
+    """
+    返回合成结果保存为文件时应使用的扩展名
+
+    Args:
+        audio_format: dashscope 的 AudioFormat，DEFAULT 对应服务端默认的 MP3 输出
+    """
+    return _EXTENSIONS.get(audio_format.format, ".mp3")
+
+
+def detect_format(data: bytes) -> str:
+    """
+    根据文件头判断音频格式
+
+    Args:
+        data: 音频数据（至少包含文件头）
+
+    Returns:
+        wav、mp3 或 raw
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return "raw"
+
+
+def strip_id3(data: bytes, keep_header: bool = False) -> bytes:
+    """
+    去掉MP3数据开头的ID3v2标签和结尾的ID3v1标签，便于逐段拼接
+
+    Args:
+        data: MP3数据
+        keep_header: 是否保留开头的ID3v2标签（拼接时第一个片段保留）
+    """
+    if not keep_header and data[:3] == b"ID3" and len(data) >= 10:
+        # ID3v2 标签长度为 4 个 7bit 字节（syncsafe integer）
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+# MPEG Layer III 的比特率表（kbps），按比特率索引取值
+_MP3_BITRATES = {
+    "mpeg1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "mpeg2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+
+def audio_duration(data: bytes, audio_format=None):
+    """
+    估算音频时长（秒）
+
+    WAV 按采样帧数精确计算；MP3 按第一帧的比特率估算（假定为固定码率）；
+    PCM 需要通过 audio_format 提供采样率（按单声道16bit计算）；无法识别的格式返回None。
+
+    Args:
+        data: 完整的音频数据
+        audio_format: 合成器输出格式（可选）
+    """
+    fmt = detect_format(data)
+    if fmt == "raw" and audio_format is not None and audio_format.format == "pcm":
+        return len(data) / (2 * audio_format.sample_rate)
+    if fmt == "wav":
+        try:
+            with wave.open(io.BytesIO(data), "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError):
+            return None
+    if fmt == "mp3":
+        frames = strip_id3(data)
+        if len(frames) < 4 or frames[0] != 0xFF or frames[1] & 0xE0 != 0xE0:
+            return None
+        version = (frames[1] >> 3) & 0x03
+        layer = (frames[1] >> 1) & 0x03
+        index = frames[2] >> 4
+        if layer != 1 or version == 1 or not 0 < index < 15:
+            return None
+        kbps = _MP3_BITRATES["mpeg1" if version == 3 else "mpeg2"][index]
+        return len(frames) * 8 / (kbps * 1000)
+    return None
+
+
+class AudioStitcher:
+    """
+    顺序拼接音频片段并写入文件
+
+    WAV 片段只保留第一个片段的参数并合并采样数据；MP3 片段去掉多余的标签后直接拼接；
+    PCM 片段边写入边封装为 WAV 文件；其他格式（如 Ogg Opus）按字节拼接。
+    每个片段写入后即可释放，内存占用与片段数量无关。
+    拼接过程中写入临时文件，正常关闭后才重命名为 output_file；中途出错时删除临时文件。
+
+    Args:
+        output_file: 输出文件路径
+        audio_format: 片段的格式（dashscope AudioFormat），未提供或为 DEFAULT 时根据第一个片段的文件头判断
+    """
+
+    def __init__(self, output_file: str, audio_format=None):
+        self.output_file = output_file
+        self.format = None
+        self.sample_rate = None
+        if audio_format is not None and audio_format.format in _EXTENSIONS:
+            self.format = audio_format.format
+            self.sample_rate = audio_format.sample_rate
+        self.segments = 0
+        self.bytes_written = 0
+        self._tmp = f"{output_file}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self._tmp, "wb")
+        self._wav = None
+
+    def append(self, data: bytes):
+        """
+        追加一个音频片段
+        """
+        if self.format is None:
+            self.format = detect_format(data)
+
+        if self.format in ("wav", "pcm"):
+            if detect_format(data) == "wav":
+                with wave.open(io.BytesIO(data), "rb") as segment:
+                    params = segment.getparams()
+                    frames = segment.readframes(segment.getnframes())
+            else:
+                # 不带文件头的 PCM 数据：单声道16bit
+                params = (1, 2, self.sample_rate or 22050, 0, "NONE", "not compressed")
+                frames = data
+            self._write_frames(params, frames)
+        else:
+            if self.format == "mp3":
+                data = strip_id3(data, keep_header=self.segments == 0)
+            self._file.write(data)
+            self.bytes_written += len(data)
+
+        self.segments += 1
+
+    def _write_frames(self, params, frames: bytes):
+        if self._wav is None:
+            self._wav = wave.open(self._file, "wb")
+            self._wav.setparams(params)
+        elif (params[0], params[1], params[2]) != (self._wav.getnchannels(), self._wav.getsampwidth(),
+                                                   self._wav.getframerate()):
+            raise ValueError(f"音频片段参数不一致：{params[:3]}，文件为 "
+                             f"{(self._wav.getnchannels(), self._wav.getsampwidth(), self._wav.getframerate())}")
+        self._wav.writeframes(frames)
+        self.bytes_written += len(frames)
+
+    def write(self, data: bytes):
+        """
+        追加流式合成的一个音频分片
+
+        分片不是完整的音频文件：PCM 分片封装进 WAV 文件，其他格式按原样写入
+        """
+        if self.format == "pcm":
+            self._write_frames((1, 2, self.sample_rate, 0, "NONE", "not compressed"), data)
+        else:
+            self._file.write(data)
+            self.bytes_written += len(data)
+        self._file.flush()
+
+    def close(self):
+        """
+        完成写入并关闭文件（WAV 会在此时回填文件头中的长度），然后重命名为 output_file
+        """
+        try:
+            if self._wav is not None:
+                self._wav.close()
+            self._file.close()
+            os.replace(self._tmp, self.output_file)
+        finally:
+            self.discard()
+
+    def discard(self):
+        """
+        放弃写入，删除临时文件，output_file 保持原样
+        """
+        if not self._file.closed:
+            if self._wav is not None:
+                try:
+                    self._wav.close()
+                except (OSError, wave.Error):
+                    pass
+            self._file.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
@@ -1,15 +1,64 @@
 import os
-from datetime import datetime
-from src.text_processing import TextProcessor
+import time
+from src.text_processing import TextProcessor, LLMGenerationError
 from src.tts_service import TTSService
+from src.clients import get_text_processor, get_tts_service
+from src.incremental import IncrementalProcessor
+from src.artifacts import JobOutput, atomic_open, write_text
 import src.config as config
 
 class BlogGenerator:
-    def __init__(self):
-        self.text_processor = TextProcessor()
-        self.tts_service = TTSService()
+    def __init__(self, text_processor: TextProcessor = None, tts_service: TTSService = None):
+        # 未传入时使用进程内共享的客户端
+        self.text_processor = text_processor or get_text_processor()
+        self.tts_service = tts_service or get_tts_service()
     
-    def generate_blog(self, topic: str, length: str = "medium", with_tts: bool = True) -> dict:
+    def _stream_generate(self, topic: str, length: str, on_delta=None) -> str:
+        """
+        流式生成博客内容，每收到一段增量就交给 on_delta 处理
+        
+        Raises:
+            LLMGenerationError: 生成失败
+        """
+        parts = []
+        for delta in self.text_processor.stream_generate_blog_from_topic(topic, length):
+            parts.append(delta)
+            if on_delta:
+                on_delta("generate", delta)
+        return "".join(parts).strip()
+    
+    def _stream_polish_to_file(self, original_text: str, polish_type: str, blog_file: str, header: str = "", on_delta=None,
+                               topic: str = None) -> str:
+        """
+        流式润色文本，润色结果边生成边写入博客文件
+        """
+        parts = []
+        # 写入临时文件，润色完成后才出现在 blog_file，读取方不会看到写了一半的博客
+        with atomic_open(blog_file, "w", encoding="utf-8") as f:
+            f.write(header)
+            f.flush()
+            try:
+                for delta in self.text_processor.stream_polish_text(original_text, polish_type, topic=topic):
+                    # 跳过开头的空白，使文件内容与非流式模式一致
+                    if not parts:
+                        delta = delta.lstrip()
+                        if not delta:
+                            continue
+                    parts.append(delta)
+                    f.write(delta)
+                    f.flush()
+                    if on_delta:
+                        on_delta("polish", delta)
+            except Exception as e:
+                print(f"文本润色失败: {str(e)}")
+                # 与 polish_text 保持一致：润色失败时回退为原始文本
+                parts = [original_text]
+                f.seek(0)
+                f.truncate()
+                f.write(header + original_text)
+        return "".join(parts).strip()
+    
+    def generate_blog(self, topic: str, length: str = "medium", with_tts: bool = True, stream: bool = False, on_delta=None) -> dict:
         """
         根据主题生成完整的博客内容，包括文本润色和可选的语音合成
         
@@ -17,6 +66,8 @@ class BlogGenerator:
             topic: 博客主题
             length: 博客长度，可选值：short, medium, long
             with_tts: 是否生成语音文件
+            stream: 是否流式生成，开启后润色结果会边生成边写入博客文件
+            on_delta: 流式模式下接收文本增量的回调，签名为 on_delta(stage, delta)，stage 为 generate 或 polish
             
         Returns:
             包含博客信息的字典，格式：
@@ -25,40 +76,85 @@ class BlogGenerator:
                 "original_text": 原始生成文本,
                 "polished_text": 润色后文本,
                 "blog_file": 博客文件路径,
-                "audio_file": 音频文件路径（如果生成）
+                "audio_file": 音频文件路径（如果生成）,
+                "job_id": 任务ID，所有产物保存在 results/<任务ID>/ 中
             }
+        
+        Raises:
+            LLMGenerationError: 博客生成或润色失败，此时不会保存博客和合成语音
         """
+        output = JobOutput()
+        job_config = {"topic": topic, "length": length, "with_tts": with_tts, "stream": stream}
+        if stream:
+            return self._generate_blog_streaming(output, job_config, on_delta)
+        
         # 1. 根据主题生成原始博客内容
         print(f"正在根据主题 '{topic}' 生成博客内容...")
+        timings = {}
+        started = time.perf_counter()
         original_text = self.text_processor.generate_blog_from_topic(topic, length)
+        timings["generate_seconds"] = round(time.perf_counter() - started, 3)
         
         # 2. 对生成的内容进行润色
         print("正在润色博客内容...")
-        polished_text = self.text_processor.polish_text(original_text, "blog")
+        started = time.perf_counter()
+        polished_text = self.text_processor.polish_text(original_text, "blog", topic=topic)
+        timings["polish_seconds"] = round(time.perf_counter() - started, 3)
         
         # 3. 保存博客文本到文件
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        blog_file = f"{config.RESULTS_DIR}/blog_{timestamp}.md"
+        blog_file = output.path("blog.md")
+        write_text(blog_file, f"# {topic}\n\n{polished_text}")
+        
+        print(f"博客文本已保存至: {blog_file}")
         
-        with open(blog_file, "w", encoding="utf-8") as f:
-            f.write(f"# {topic}\n\n")
-            f.write(polished_text)
+        return self._finish_blog(output, job_config, original_text, polished_text, blog_file, timings)
+    
+    def _generate_blog_streaming(self, output: JobOutput, job_config: dict, on_delta=None) -> dict:
+        """
+        流式生成博客：生成与润色均以增量方式消费，润色结果边生成边写入文件
+        """
+        topic = job_config["topic"]
+        print(f"正在根据主题 '{topic}' 流式生成博客内容...")
+        timings = {}
+        started = time.perf_counter()
+        original_text = self._stream_generate(topic, job_config["length"], on_delta)
+        timings["generate_seconds"] = round(time.perf_counter() - started, 3)
+        
+        blog_file = output.path("blog.md")
+        
+        print("正在流式润色博客内容...")
+        started = time.perf_counter()
+        polished_text = self._stream_polish_to_file(original_text, "blog", blog_file, f"# {topic}\n\n", on_delta, topic)
+        timings["polish_seconds"] = round(time.perf_counter() - started, 3)
         
         print(f"博客文本已保存至: {blog_file}")
         
+        return self._finish_blog(output, job_config, original_text, polished_text, blog_file, timings)
+    
+    def _finish_blog(self, output: JobOutput, job_config: dict, original_text: str, polished_text: str, blog_file: str,
+                     timings: dict) -> dict:
+        """
+        生成语音文件（如果需要），写入任务清单并组装结果
+        """
         # 4. 生成语音文件（如果需要）
         audio_file = None
-        if with_tts:
+        if job_config["with_tts"]:
             print("正在生成语音文件...")
-            audio_file = f"{config.RESULTS_DIR}/audio_{timestamp}.wav"
-            self.tts_service.text_to_speech(polished_text, audio_file)
+            audio_file = output.path(f"audio{self.tts_service.extension}")
+            started = time.perf_counter()
+            if not self.tts_service.text_to_speech(polished_text, audio_file):
+                audio_file = None
+            timings["tts_seconds"] = round(time.perf_counter() - started, 3)
+        
+        output.write_manifest(job_config, {"blog": blog_file, "audio": audio_file}, timings)
         
         return {
-            "topic": topic,
+            "topic": job_config["topic"],
             "original_text": original_text,
             "polished_text": polished_text,
-            "blog_file": f"{config.RESULTS_DIR}/{blog_file}",
-            "audio_file": f"{config.RESULTS_DIR}/{audio_file}" if audio_file else None
+            "blog_file": blog_file,
+            "audio_file": audio_file,
+            "job_id": output.job_id
         }
     
     def polish_and_tts(self, original_text: str, polish_type: str = "blog", output_file: str = None) -> dict:
@@ -71,16 +167,25 @@ class BlogGenerator:
             output_file: 自定义输出文件名（可选）
             
         Returns:
-            包含处理结果的字典
+            包含处理结果的字典，润色失败时 success 为 False 并包含 error，不会合成语音
         """
         # 1. 文本润色
         print("正在润色文本...")
-        polished_text = self.text_processor.polish_text(original_text, polish_type)
+        try:
+            polished_text = self.text_processor.polish_text(original_text, polish_type)
+        except LLMGenerationError as e:
+            print(f"文本润色失败：{e}")
+            return {
+                "original_text": original_text,
+                "polished_text": None,
+                "audio_file": None,
+                "success": False,
+                "error": str(e)
+            }
         
-        # 2. 生成语音文件
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 2. 生成语音文件，未指定文件名时保存到新任务的输出目录
         if not output_file:
-            output_file = f"{config.RESULTS_DIR}/audio_{timestamp}.wav"
+            output_file = JobOutput().path(f"audio{self.tts_service.extension}")
         
         print("正在生成语音文件...")
         success = self.tts_service.text_to_speech(polished_text, output_file)
@@ -93,13 +198,14 @@ class BlogGenerator:
             "success": success
         }
     
-    def process_existing_blog(self, blog_file: str, with_tts: bool = True) -> dict:
+    def process_existing_blog(self, blog_file: str, with_tts: bool = True, incremental: bool = None) -> dict:
         """
         处理已有的博客文件，进行润色和可选的语音合成
         
         Args:
             blog_file: 已有博客文件路径
             with_tts: 是否生成语音文件
+            incremental: 是否增量处理（只重新润色和合成修改过的段落），默认读取 config.BLOG_INCREMENTAL
             
         Returns:
             包含处理结果的字典
@@ -120,16 +226,23 @@ class BlogGenerator:
                 topic = line[2:].strip()
                 break
         
-        # 3. 润色博客内容
-        print(f"正在润色博客 '{topic}'...")
-        polished_text = self.text_processor.polish_text(original_text, "blog")
-        
-        # 4. 保存润色后的博客
         base_name = os.path.splitext(f"{blog_file}")[0]
         polished_blog_file = f"{base_name}_polished.md"
+        if incremental is None:
+            incremental = config.BLOG_INCREMENTAL
+        if incremental:
+            return self._process_existing_blog_incremental(original_text, blog_file, base_name, topic, with_tts)
         
-        with open(f"{polished_blog_file}", "w", encoding="utf-8") as f:
-            f.write(polished_text)
+        # 3. 润色博客内容，失败时不保存润色文件，也不合成语音
+        print(f"正在润色博客 '{topic}'...")
+        try:
+            polished_text = self.text_processor.polish_text(original_text, "blog", topic=topic)
+        except LLMGenerationError as e:
+            print(f"博客润色失败：{e}")
+            return {"success": False, "error": str(e)}
+        
+        # 4. 保存润色后的博客
+        write_text(polished_blog_file, polished_text)
         
         print(f"润色后的博客已保存至: {polished_blog_file}")
         
@@ -137,7 +250,7 @@ class BlogGenerator:
         audio_file = None
         if with_tts:
             print("正在生成语音文件...")
-            audio_file = f"{base_name}.wav"
+            audio_file = f"{base_name}{self.tts_service.extension}"
             self.tts_service.text_to_speech(polished_text, audio_file)
         
         return {
@@ -148,6 +261,31 @@ class BlogGenerator:
             "success": True
         }
 
+    def _process_existing_blog_incremental(self, original_text: str, blog_file: str, base_name: str, topic: str,
+                                           with_tts: bool) -> dict:
+        """
+        增量处理已有博客：段落哈希、润色结果和音频片段记录在 <文件名>_polished.json 和 <文件名>_segments/ 中，
+        只有新增或修改过的段落会重新润色和合成
+        """
+        print(f"正在增量处理博客 '{topic}'...")
+        processor = IncrementalProcessor(self.text_processor, self.tts_service, "blog", with_tts)
+        result = processor.process(original_text, base_name, topic)
+        
+        polished_blog_file = f"{base_name}_polished.md"
+        write_text(polished_blog_file, result["polished_text"])
+        print(f"润色后的博客已保存至: {polished_blog_file}")
+        if result["audio_file"]:
+            print(f"语音文件已保存至: {result['audio_file']}")
+        
+        return {
+            "topic": topic,
+            "original_file": f"{blog_file}",
+            "polished_file": polished_blog_file,
+            "audio_file": result["audio_file"],
+            "incremental": result["stats"],
+            "success": True
+        }
+
 
 if __name__ == "__main__":
     # 初始化博客生成器
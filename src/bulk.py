@@ -0,0 +1,243 @@
+# 目录批量处理：扫描或持续监视一个目录，把新增和修改过的 Markdown 博客交给 process_existing_blog
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import src.config as config
+import src.metrics as metrics
+import src.scheduler as scheduler
+from src.blog_generator import BlogGenerator
+from src.artifacts import file_digest, write_json
+
+MANIFEST_NAME = ".processed_blogs.json"
+
+
+def is_blog_source(name: str) -> bool:
+    """
+    判断目录中的文件是否为待处理的博客：.md 文件，排除隐藏文件和润色输出（*_polished.md）
+    """
+    return name.endswith(".md") and not name.startswith(".") and not name.endswith("_polished.md")
+
+
+class BlogDirectoryProcessor:
+    """
+    批量处理目录中的博客文件
+
+    已处理文件的修改时间、大小和内容哈希记录在目录下的清单文件中，重启后内容未变化的文件不会重复处理；
+    修改时间变化但内容相同的文件只更新清单。文件通过有界线程池交给 BlogGenerator.process_existing_blog，
+    线程池满时扫描到的文件在队列中等待。
+
+    Args:
+        directory: 博客目录
+        blog_generator: BlogGenerator 实例，未传入时创建默认实例
+        with_tts: 是否生成语音文件
+        max_workers: 同时处理的文件数，默认读取 config.BULK_WORKERS
+        settle_seconds: 修改时间距今不足该秒数的文件视为仍在写入，留到下次扫描
+    """
+
+    def __init__(self, directory: str, blog_generator=None, with_tts: bool = True, max_workers: int = None,
+                 settle_seconds: float = None):
+        self.directory = directory
+        self.blog_generator = blog_generator or BlogGenerator()
+        self.with_tts = with_tts
+        self.max_workers = max_workers or config.BULK_WORKERS
+        self.settle_seconds = config.BULK_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self.manifest_file = os.path.join(directory, MANIFEST_NAME)
+        self.manifest = self._load_manifest()
+        self._lock = threading.Lock()
+        # 本进程内处理失败的 (文件, 哈希)，内容不变时不再重试，避免监视模式下反复失败
+        self._failed = set()
+        self._pending = 0
+        self.max_queue_depth = 0
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            print(f"清单文件 {self.manifest_file} 无法读取，将重新处理所有文件")
+            return {}
+
+    def _save_manifest(self):
+        # 调用方持有 self._lock；原子写入，避免中断时留下损坏的清单
+        write_json(self.manifest_file, {"files": self.manifest})
+
+    def scan(self) -> list:
+        """
+        扫描目录，返回需要处理的文件
+
+        Returns:
+            [(文件名, 内容哈希)]，按修改时间排序
+        """
+        now = time.time()
+        changed = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not is_blog_source(entry.name):
+                    continue
+                stat = entry.stat()
+                if now - stat.st_mtime < self.settle_seconds:
+                    continue
+                record = self.manifest.get(entry.name)
+                if record and record.get("success") and record["mtime"] == stat.st_mtime and record["size"] == stat.st_size:
+                    continue
+                try:
+                    digest = file_digest(entry.path)
+                except FileNotFoundError:
+                    continue
+                if record and record.get("success") and record["sha256"] == digest:
+                    # 只是修改时间变了（如复制、touch），更新清单即可
+                    with self._lock:
+                        record.update({"mtime": stat.st_mtime, "size": stat.st_size})
+                        self._save_manifest()
+                    continue
+                if (entry.name, digest) in self._failed:
+                    continue
+                changed.append((stat.st_mtime, entry.name, digest))
+        return [(name, digest) for _, name, digest in sorted(changed)]
+
+    def _process_file(self, name: str, digest: str) -> dict:
+        path = os.path.join(self.directory, name)
+        stat = os.stat(path)
+        started = time.time()
+        try:
+            # 目录处理属于批量任务，交互请求优先；每个文件作为一个任务参与公平分配
+            with metrics.labels(file=name), scheduler.scheduling(priority="batch", job=name):
+                result = self.blog_generator.process_existing_blog(path, self.with_tts)
+            error = None if result.get("success") else result.get("error", "未知错误")
+        except Exception as e:
+            error = str(e)
+        record = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha256": digest,
+            "success": error is None,
+            "error": error,
+            "duration_seconds": round(time.time() - started, 3),
+            "processed_at": datetime.now().isoformat()
+        }
+        with self._lock:
+            self.manifest[name] = record
+            self._save_manifest()
+            if error is not None:
+                self._failed.add((name, digest))
+            self._pending -= 1
+        return {"file": name, **record}
+
+    def _report_progress(self, done: int, total: int, started: float, result: dict):
+        elapsed = time.time() - started
+        rate = done / elapsed * 60 if elapsed > 0 else 0
+        status = "成功" if result["success"] else f"失败：{result['error']}"
+        print(f"[{done}/{total}] {result['file']} {status}（{result['duration_seconds']}秒）")
+        print(f"[Metric] 目录批量处理：吞吐量{rate:.1f}文件/分钟，队列深度{self._pending}")
+
+    def process(self, files: list) -> list:
+        """
+        通过有界线程池处理文件，按完成顺序打印进度、吞吐量和队列深度
+
+        Args:
+            files: scan() 返回的 [(文件名, 内容哈希)]
+
+        Returns:
+            每个文件的处理结果
+        """
+        if not files:
+            return []
+        started = time.time()
+        with self._lock:
+            self._pending += len(files)
+            self.max_queue_depth = max(self.max_queue_depth, self._pending)
+
+        results = []
+        process_file = metrics.bind(self._process_file)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(process_file, name, digest) for name, digest in files]
+            for future in as_completed(futures):
+                results.append(future.result())
+                self._report_progress(len(results), len(files), started, results[-1])
+        return results
+
+    def run_once(self) -> dict:
+        """
+        扫描一次目录并处理所有新增和修改过的文件
+
+        Returns:
+            执行报告
+        """
+        started = time.time()
+        with metrics.recording() as recorder:
+            results = self.process(self.scan())
+        return self._build_report(results, started, recorder)
+
+    def watch(self, interval: float = None, stop_event: threading.Event = None, max_rounds: int = None) -> dict:
+        """
+        轮询监视目录，发现新增或修改的文件后立即处理，直到 stop_event 被设置、达到 max_rounds 轮或按下 Ctrl+C
+
+        Args:
+            interval: 轮询间隔（秒），默认读取 config.BULK_POLL_INTERVAL
+            stop_event: 用于从其他线程停止监视
+            max_rounds: 最多扫描的轮数，None 表示不限制
+
+        Returns:
+            整个监视期间的执行报告
+        """
+        interval = config.BULK_POLL_INTERVAL if interval is None else interval
+        stop_event = stop_event or threading.Event()
+        started = time.time()
+        results = []
+        rounds = 0
+        print(f"正在监视目录 {self.directory}（每{interval}秒扫描一次，按 Ctrl+C 停止）")
+        with metrics.recording() as recorder:
+            try:
+                while not stop_event.is_set():
+                    results.extend(self.process(self.scan()))
+                    rounds += 1
+                    if max_rounds is not None and rounds >= max_rounds:
+                        break
+                    stop_event.wait(interval)
+            except KeyboardInterrupt:
+                print("已停止监视")
+        return self._build_report(results, started, recorder)
+
+    def _build_report(self, results: list, started: float, recorder: metrics.MetricsRecorder) -> dict:
+        elapsed = time.time() - started
+        succeeded = sum(1 for r in results if r["success"])
+        return {
+            "directory": self.directory,
+            "files": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_minute": round(len(results) / elapsed * 60, 2) if elapsed > 0 else None,
+            "max_queue_depth": self.max_queue_depth,
+            "max_workers": self.max_workers,
+            "metrics": recorder.summary(),
+            "results": results
+        }
+
+
+def print_bulk_report(report: dict):
+    """
+    打印目录批量处理报告
+    """
+    print("=" * 50)
+    print(f"目录批量处理报告：{report['directory']}")
+    print("=" * 50)
+    for result in report["results"]:
+        line = f"[{'成功' if result['success'] else '失败'}] {result['file']} - {result['duration_seconds']}秒"
+        if result.get("error"):
+            line += f" - {result['error']}"
+        print(line)
+    print("-" * 50)
+    print(f"处理文件：{report['files']}，成功：{report['succeeded']}，失败：{report['failed']}")
+    print(f"总耗时：{report['elapsed_seconds']}秒，吞吐量：{report['files_per_minute']} 文件/分钟，"
+          f"最大队列深度：{report['max_queue_depth']}（并发数{report['max_workers']}）")
+    if report.get("metrics"):
+        print("-" * 50)
+        for line in metrics.format_summary(report["metrics"]):
+            print(line)
+    print("=" * 50)
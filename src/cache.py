@@ -0,0 +1,285 @@
+# 内容寻址缓存：相同请求直接复用之前的结果
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import sqlite3
+import threading
+import src.config as config
+from src.artifacts import atomic_write
+
+# 按配置创建的进程级共享缓存实例
+_shared_lock = threading.Lock()
+_shared_llm_cache = None
+_shared_audio_cache = None
+
+
+def request_key(**fields) -> str:
+    """
+    计算请求的内容哈希，字段顺序不影响结果
+
+    Args:
+        fields: 参与计算的请求字段，如 model、messages、temperature、max_tokens
+
+    Returns:
+        sha256 十六进制字符串
+    """
+    payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    基于 SQLite 的模型回复缓存
+
+    以 request_key(model, messages, temperature, max_tokens) 为键保存回复文本，
+    超过 ttl 秒的条目视为过期，总大小超过 max_bytes 时按最近访问时间淘汰最旧的条目。
+    """
+
+    def __init__(self, path: str, ttl: float = None, max_bytes: int = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        """
+        读取缓存，未命中或已过期时返回None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """
+        写入缓存，并在超出容量时淘汰最久未访问的条目
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            if self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            if self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        返回命中统计和当前缓存大小
+        """
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "entries": entries,
+            "bytes": total
+        }
+
+
+class AudioCache:
+    """
+    基于文件目录的音频缓存
+
+    每个条目保存为 <dir>/<键前两位>/<键>.audio，命中时通过硬链接（不支持时复制）输出到目标路径。
+    文件的修改时间作为最近访问时间，总大小超过 max_bytes 时删除最久未访问的文件。
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.audio")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".audio"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _lookup(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+            self.hits += 1
+        # 更新修改时间，作为 LRU 淘汰依据
+        os.utime(path)
+        return path
+
+    def get_bytes(self, key: str):
+        """
+        读取缓存的音频数据，未命中时返回None
+        """
+        path = self._lookup(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, key: str, output_file: str) -> bool:
+        """
+        将缓存的音频输出到 output_file，优先使用硬链接
+
+        Returns:
+            命中返回True，未命中返回False
+        """
+        path = self._lookup(key)
+        if path is None:
+            return False
+        def write(tmp: str):
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+
+        try:
+            # 先链接到临时文件再重命名，output_file 始终是完整的音频
+            atomic_write(output_file, write)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put_bytes(self, key: str, data: bytes):
+        """
+        写入音频数据
+        """
+        def write(tmp: str):
+            with open(tmp, "wb") as f:
+                f.write(data)
+
+        self._store(key, write)
+
+    def put_file(self, key: str, source_file: str):
+        """
+        将已生成的音频文件复制到缓存
+        """
+        self._store(key, lambda tmp: shutil.copyfile(source_file, tmp))
+
+    def _store(self, key: str, write):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再重命名，避免其他线程读到写了一半的条目
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        write(tmp)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total_bytes += size
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._total_bytes -= size
+
+    def stats(self) -> dict:
+        """
+        返回命中统计和当前缓存大小
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "bytes": self._total_bytes
+        }
+
+
+def shared_llm_cache() -> LLMCache:
+    """
+    返回按 config.LLM_CACHE_* 配置创建的共享缓存，进程内只打开一次数据库
+    """
+    global _shared_llm_cache
+    with _shared_lock:
+        if _shared_llm_cache is None:
+            _shared_llm_cache = LLMCache(config.LLM_CACHE_PATH, config.LLM_CACHE_TTL, config.LLM_CACHE_MAX_BYTES)
+        return _shared_llm_cache
+
+
+def shared_audio_cache() -> AudioCache:
+    """
+    返回按 config.TTS_CACHE_* 配置创建的共享缓存，进程内只扫描一次缓存目录
+    """
+    global _shared_audio_cache
+    with _shared_lock:
+        if _shared_audio_cache is None:
+            _shared_audio_cache = AudioCache(config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_BYTES)
+        return _shared_audio_cache
@@ -0,0 +1,53 @@
+# 客户端注册表：进程内共享延迟创建的 TextProcessor 和 TTSService，避免重复建立连接
+import threading
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+
+_lock = threading.Lock()
+_instances = {}
+
+
+def _get_or_create(cls, kwargs: dict):
+    key = (cls.__name__, tuple(sorted(kwargs.items())))
+    instance = _instances.get(key)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(key)
+            if instance is None:
+                instance = cls(**kwargs)
+                _instances[key] = instance
+    return instance
+
+
+def get_text_processor(**kwargs) -> TextProcessor:
+    """
+    获取共享的 TextProcessor，首次调用时创建
+
+    Args:
+        kwargs: 传给 TextProcessor 的参数，参数相同的调用返回同一个实例
+
+    Returns:
+        TextProcessor 实例
+    """
+    return _get_or_create(TextProcessor, kwargs)
+
+
+def get_tts_service(**kwargs) -> TTSService:
+    """
+    获取共享的 TTSService，首次调用时创建
+
+    Args:
+        kwargs: 传给 TTSService 的参数，参数相同的调用返回同一个实例
+
+    Returns:
+        TTSService 实例
+    """
+    return _get_or_create(TTSService, kwargs)
+
+
+def reset_clients():
+    """
+    清空注册表，之后的调用会重新创建实例
+    """
+    with _lock:
+        _instances.clear()
@@ -1,2 +1,121 @@
 # 配置文件
+import os
+from dotenv import load_dotenv
+
+# 先加载 .env，下面的 os.getenv 才能读到其中的配置
+load_dotenv()
+
 RESULTS_DIR = "results"
+
+# 语音合成配置
+# 流式合成：音频分片到达即写入磁盘，内存占用不随音频长度增长
+TTS_STREAMING = os.getenv("TTS_STREAMING", "false").lower() == "true"
+# 流式合成等待完成的超时时间（秒）
+TTS_STREAM_TIMEOUT = float(os.getenv("TTS_STREAM_TIMEOUT", "300"))
+
+# 分段并行合成：长文本按句子和段落切分后并发合成，再按顺序拼接
+TTS_CHUNKING = os.getenv("TTS_CHUNKING", "true").lower() == "true"
+# 每段最大字符数，超过该长度的文本才会分段
+TTS_CHUNK_SIZE = int(os.getenv("TTS_CHUNK_SIZE", "300"))
+# 并发合成的最大线程数
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", "4"))
+# 语音合成请求失败后的重试次数及初始退避时间（秒）
+TTS_CHUNK_RETRIES = int(os.getenv("TTS_CHUNK_RETRIES", "2"))
+TTS_RETRY_BACKOFF = float(os.getenv("TTS_RETRY_BACKOFF", "1.0"))
+
+# 流水线模式：生成、润色、语音合成按段落重叠执行
+# 并发润色段落的最大线程数
+PIPELINE_POLISH_WORKERS = int(os.getenv("PIPELINE_POLISH_WORKERS", "4"))
+
+# 模型回复缓存：相同的 (model, messages, temperature, max_tokens) 直接复用之前的结果
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+# 缓存有效期（秒），0 表示永不过期
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# 缓存总大小上限（字节），超出后淘汰最久未访问的条目，0 表示不限制
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# 音频缓存：相同的 (文本, 模型, 音色, 格式) 直接复用已合成的音频
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".cache/audio")
+# 缓存总大小上限（字节），超出后删除最久未访问的音频，0 表示不限制
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# 模型服务连通性检查：eager（创建客户端时立即检查）、lazy（首次请求前检查，同一服务地址只检查一次）、off（不检查）
+LLM_HEALTH_CHECK = os.getenv("LLM_HEALTH_CHECK", "lazy").lower()
+
+# 工作流检查点：每个节点完成后保存进度，失败或中断的任务重新执行时从最后完成的节点继续
+WORKFLOW_CHECKPOINTS = os.getenv("WORKFLOW_CHECKPOINTS", "true").lower() == "true"
+WORKFLOW_CHECKPOINT_PATH = os.getenv("WORKFLOW_CHECKPOINT_PATH", os.path.join(RESULTS_DIR, "checkpoints.sqlite"))
+
+# 后端容错：失败重试（指数退避+随机抖动）、限流和熔断，0 表示不限制/不熔断
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "10"))
+# 每秒最多请求数及最大并发请求数（整个进程共享）
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "0"))
+# 连续失败多少次后熔断，以及熔断持续时间（秒）
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+TTS_RETRY_MAX_DELAY = float(os.getenv("TTS_RETRY_MAX_DELAY", "10"))
+TTS_RATE_LIMIT = float(os.getenv("TTS_RATE_LIMIT", "0"))
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "0"))
+TTS_BREAKER_THRESHOLD = int(os.getenv("TTS_BREAKER_THRESHOLD", "5"))
+TTS_BREAKER_RESET = float(os.getenv("TTS_BREAKER_RESET", "30"))
+
+# 单个任务的截止时间（秒），超时后不再发起新的请求或重试，0 表示不限制
+JOB_DEADLINE = float(os.getenv("JOB_DEADLINE", "0"))
+
+# 长文本分段润色：按 Markdown 标题和段落切分后并发润色，避免单次请求的输出被截断
+# auto（超过 POLISH_AUTO_CHARS 字符时分段）、sections（总是分段）、single（整篇一次润色）
+POLISH_MODE = os.getenv("POLISH_MODE", "auto").lower()
+# auto 模式的分段阈值：整篇润色的输出上限为1000 tokens，约1200字以内的文本（含 medium 长度的博客）仍整篇润色
+POLISH_AUTO_CHARS = int(os.getenv("POLISH_AUTO_CHARS", "1200"))
+POLISH_SECTION_CHARS = int(os.getenv("POLISH_SECTION_CHARS", "600"))
+POLISH_SECTION_WORKERS = int(os.getenv("POLISH_SECTION_WORKERS", "4"))
+POLISH_SECTION_MAX_TOKENS = int(os.getenv("POLISH_SECTION_MAX_TOKENS", "1000"))
+# 润色结果短于原文的该比例时视为不完整，拆分后重试
+POLISH_MIN_LENGTH_RATIO = float(os.getenv("POLISH_MIN_LENGTH_RATIO", "0.5"))
+
+# 处理已有博客文件时只重新润色和合成修改过的段落（段落哈希记录在 <文件名>_polished.json 中）；
+# 增量处理按段落润色，结果可能与整篇润色不同，默认关闭
+BLOG_INCREMENTAL = os.getenv("BLOG_INCREMENTAL", "false").lower() == "true"
+
+# 目录批量处理：同时处理的文件数、监视模式的轮询间隔（秒），修改时间距今不足 BULK_SETTLE_SECONDS 的文件视为仍在写入
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "2"))
+BULK_POLL_INTERVAL = float(os.getenv("BULK_POLL_INTERVAL", "5"))
+BULK_SETTLE_SECONDS = float(os.getenv("BULK_SETTLE_SECONDS", "1"))
+
+# 常驻 HTTP 服务（run_service.py）：监听地址、同时执行的任务数、排队上限和保留的已结束任务数
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_MAX_JOBS = int(os.getenv("SERVICE_MAX_JOBS", "2"))
+SERVICE_MAX_QUEUE = int(os.getenv("SERVICE_MAX_QUEUE", "100"))
+SERVICE_MAX_FINISHED = int(os.getenv("SERVICE_MAX_FINISHED", "1000"))
+
+# 合并同时发起的相同模型请求和语音合成请求，只调用一次后端
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# 语音合成输出格式：dashscope AudioFormat 的成员名（编码、采样率），如 MP3_22050HZ_MONO_256KBPS、WAV_24000HZ_MONO_16BIT、
+# PCM_24000HZ_MONO_16BIT（保存时封装为 WAV）、OGG_OPUS_24KHZ_MONO_32KBPS；音频文件扩展名与之对应
+TTS_AUDIO_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "MP3_22050HZ_MONO_256KBPS")
+
+# 大纲模式：先生成大纲（标题、引言、若干正文章节、结论），再并发生成各部分后按顺序拼接
+# 未指定执行模式时，长篇博客（length="long"）默认使用大纲模式
+OUTLINE_FOR_LONG = os.getenv("OUTLINE_FOR_LONG", "true").lower() == "true"
+OUTLINE_SECTIONS = int(os.getenv("OUTLINE_SECTIONS", "4"))
+OUTLINE_MAX_TOKENS = int(os.getenv("OUTLINE_MAX_TOKENS", "600"))
+OUTLINE_SECTION_MAX_TOKENS = int(os.getenv("OUTLINE_SECTION_MAX_TOKENS", "800"))
+
+# 工作流状态中超过该字符数的原始文本和润色文本保存到任务输出目录的 texts/ 中，状态和检查点只记录引用；0 表示全部内联保存
+WORKFLOW_TEXT_REF_CHARS = int(os.getenv("WORKFLOW_TEXT_REF_CHARS", "0"))
+
+# 后端请求调度：未指定时请求的优先级（interactive 优先于 batch；批量任务和目录处理使用 batch）
+SCHEDULER_DEFAULT_PRIORITY = os.getenv("SCHEDULER_DEFAULT_PRIORITY", "interactive")
+# 设置后 *_RATE_LIMIT 和 *_MAX_CONCURRENCY 在同一主机的多个进程之间共享（基于文件锁），为空时只在进程内生效
+SCHEDULER_LOCK_DIR = os.getenv("SCHEDULER_LOCK_DIR", "")
+
+# run_batch.py 的工作进程数：大于0时任务分发到多个进程执行，适合 CPU 占用较多的长文本和音频后处理；0 表示在单个进程中用线程池执行
+BATCH_PROCESSES = int(os.getenv("BATCH_PROCESSES", "0"))
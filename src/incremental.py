@@ -0,0 +1,212 @@
+# 增量处理：记录已有博客每个段落的哈希、润色结果和音频片段，文件修改后只重新处理变化的段落
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import src.config as config
+import src.metrics as metrics
+from src.cache import request_key
+from src.text_chunking import chunk_text, split_sections
+from src.audio_utils import AudioStitcher
+from src.artifacts import write_json
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(base_name: str) -> str:
+    """
+    增量清单文件路径，与 <base_name>_polished.md 放在一起
+    """
+    return f"{base_name}_polished.json"
+
+
+def segments_dir(base_name: str) -> str:
+    """
+    段落音频片段目录
+    """
+    return f"{base_name}_segments"
+
+
+def load_manifest(path: str) -> dict:
+    """
+    读取增量清单，文件不存在、损坏或版本不匹配时返回空清单
+    """
+    empty = {"version": MANIFEST_VERSION, "paragraphs": []}
+    if not os.path.exists(path):
+        return empty
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        print(f"增量清单 {path} 无法读取，将全部重新处理")
+        return empty
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty
+    return manifest
+
+
+class IncrementalProcessor:
+    """
+    已有博客的增量润色和语音合成
+
+    博客按标题和段落切分，每个段落以 (原文, 润色类型, 模型) 的哈希为键记录润色结果，
+    以润色结果的音频缓存键记录音频片段文件。再次处理时只润色内容变化的段落、只合成润色结果
+    变化的段落，其余段落直接复用，最终音频由各段落的音频片段按顺序拼接。
+    """
+
+    def __init__(self, text_processor, tts_service, polish_type: str = "blog", with_tts: bool = True,
+                 use_cache: bool = True):
+        self.text_processor = text_processor
+        self.tts_service = tts_service
+        self.polish_type = polish_type
+        self.with_tts = with_tts
+        self.use_cache = use_cache
+
+    def _polish_key(self, paragraph: str) -> str:
+        return request_key(text=paragraph, polish_type=self.polish_type, model=self.text_processor.model)
+
+    def _polish(self, section: dict, topic: str) -> str:
+        return self.text_processor.polish_section(
+            section["text"], self.polish_type, topic, section["headings"], use_cache=self.use_cache
+        )
+
+    def _synthesize(self, polished: str, segment_file: str) -> str:
+        """
+        合成一个段落的音频并保存为片段文件
+        """
+        size = self.tts_service.chunk_size or len(polished)
+        chunks = [self.tts_service.synthesize_chunk(chunk, self.use_cache) for chunk in chunk_text(polished, size)]
+
+        with AudioStitcher(segment_file, self.tts_service.audio_format) as stitcher:
+            for chunk in chunks:
+                stitcher.append(chunk)
+        return segment_file
+
+    def process(self, original_text: str, base_name: str, topic: str = None) -> dict:
+        """
+        增量处理博客文本
+
+        Args:
+            original_text: 博客原文
+            base_name: 输出文件的基础路径（不含扩展名）
+            topic: 文章主题
+
+        Returns:
+            {"polished_text": 润色后文本, "audio_file": 音频文件路径（未生成或失败时为None）,
+             "stats": {"paragraphs", "polished", "reused_polish", "synthesized", "reused_audio", "failed"}}
+        """
+        started = time.time()
+        path = manifest_path(base_name)
+        previous = load_manifest(path)
+        polished_by_key = {p["key"]: p["polished"] for p in previous["paragraphs"] if p.get("polished") is not None}
+        segment_dir = segments_dir(base_name)
+
+        sections = split_sections(original_text, max_chars=0)
+        stats = {"paragraphs": len(sections), "polished": 0, "reused_polish": 0, "synthesized": 0, "reused_audio": 0,
+                 "failed": 0}
+
+        polish_executor = ThreadPoolExecutor(max_workers=config.POLISH_SECTION_WORKERS)
+        tts_executor = ThreadPoolExecutor(max_workers=self.tts_service.max_workers) if self.with_tts else None
+        polish = metrics.bind(self._polish)
+        synthesize = metrics.bind(self._synthesize)
+        try:
+            # 1. 只润色新增或修改过的段落，标题原样保留
+            keys = [self._polish_key(section["text"]) for section in sections]
+            futures = []
+            for section, key in zip(sections, keys):
+                if not section["polish"] or key in polished_by_key:
+                    futures.append(None)
+                else:
+                    futures.append(polish_executor.submit(polish, section, topic))
+
+            # 2. 按顺序取润色结果，润色结果对应的音频片段不存在时立即提交合成
+            entries = []
+            audio = []
+            pending = {}
+            if self.with_tts:
+                os.makedirs(segment_dir, exist_ok=True)
+            for section, key, future in zip(sections, keys, futures):
+                entry = {"key": key, "polished": None, "audio": None}
+                if not section["polish"]:
+                    polished = section["text"]
+                elif future is None:
+                    polished = entry["polished"] = polished_by_key[key]
+                    stats["reused_polish"] += 1
+                else:
+                    try:
+                        polished = entry["polished"] = future.result()
+                        stats["polished"] += 1
+                    except Exception as e:
+                        # 润色失败的段落保留原文，且不写入清单，下次处理时重试
+                        print(f"段落润色失败，保留原文: {str(e)}")
+                        polished = section["text"]
+                        stats["failed"] += 1
+
+                if self.with_tts:
+                    audio_key = self.tts_service.audio_key(polished)
+                    segment_file = os.path.join(segment_dir, f"{audio_key[:32]}.audio")
+                    entry["audio"] = os.path.basename(segment_file)
+                    if segment_file in pending:
+                        # 内容相同的段落共用一次合成
+                        audio.append(pending[segment_file])
+                    elif os.path.exists(segment_file):
+                        stats["reused_audio"] += 1
+                        audio.append(segment_file)
+                    else:
+                        pending[segment_file] = tts_executor.submit(synthesize, polished, segment_file)
+                        audio.append(pending[segment_file])
+                        stats["synthesized"] += 1
+                entries.append(entry)
+
+            polished_text = "\n\n".join(entry["polished"] or section["text"] for entry, section in zip(entries, sections))
+
+            # 3. 按顺序拼接音频片段
+            audio_file = None
+            if self.with_tts:
+                audio_file = f"{base_name}{self.tts_service.extension}"
+                try:
+                    segment_files = [item if isinstance(item, str) else item.result() for item in audio]
+                    with AudioStitcher(audio_file, self.tts_service.audio_format) as stitcher:
+                        for segment_file in segment_files:
+                            with open(segment_file, "rb") as f:
+                                stitcher.append(f.read())
+                except Exception as e:
+                    print(f"语音合成失败: {str(e)}")
+                    audio_file = None
+                    # 合成失败的段落不记录音频片段，下次处理时重新合成
+                    for entry in entries:
+                        if entry["audio"] and not os.path.exists(os.path.join(segment_dir, entry["audio"])):
+                            entry["audio"] = None
+        finally:
+            polish_executor.shutdown(wait=False, cancel_futures=True)
+            if tts_executor is not None:
+                tts_executor.shutdown(wait=False, cancel_futures=True)
+
+        self._save_manifest(path, entries)
+        if self.with_tts and audio_file is not None:
+            self._remove_stale_segments(segment_dir, {entry["audio"] for entry in entries if entry["audio"]})
+
+        print('[Metric] 增量处理：共{}段，润色{}段（复用{}段），合成{}段（复用{}段），失败{}段，总耗时{:.0f}毫秒'.format(
+            stats["paragraphs"], stats["polished"], stats["reused_polish"], stats["synthesized"], stats["reused_audio"],
+            stats["failed"], (time.time() - started) * 1000))
+        return {"polished_text": polished_text, "audio_file": audio_file, "stats": stats}
+
+    def _save_manifest(self, path: str, entries: list):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "polish_type": self.polish_type,
+            "model": self.text_processor.model,
+            "paragraphs": entries
+        }
+        write_json(path, manifest)
+
+    def _remove_stale_segments(self, segment_dir: str, keep: set):
+        """
+        删除不再被任何段落引用的音频片段
+        """
+        for name in os.listdir(segment_dir):
+            if name.endswith(".audio") and name not in keep:
+                try:
+                    os.remove(os.path.join(segment_dir, name))
+                except FileNotFoundError:
+                    pass
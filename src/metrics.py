@@ -0,0 +1,320 @@
+# 运行指标采集：节点耗时、模型token用量、语音合成首包延迟和音频大小
+#
+# 指标记录器通过 contextvars 传递，调用链上任何位置都可以调用 record() 上报，
+# 未开启记录时 record() 直接返回，不产生额外开销。
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from src.artifacts import atomic_open
+
+_recorder = contextvars.ContextVar("metrics_recorder", default=None)
+_labels = contextvars.ContextVar("metrics_labels", default={})
+
+
+def _percentile(values: list, percent: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _sum(records: list, field: str):
+    return sum(r.get(field) or 0 for r in records)
+
+
+class MetricsRecorder:
+    """
+    线程安全的指标记录器，按时间顺序保存所有记录
+
+    记录类型（kind）：
+    - node：工作流节点，wall_ms 为节点耗时，error 表示该节点是否失败
+    - llm：模型请求，包含 prompt_tokens、completion_tokens、duration_ms、tokens_per_second、cached
+    - tts：语音合成请求，包含 first_package_delay_ms、bytes、audio_seconds、retries、cached
+    - retry：后端请求失败后的一次重试，backend 为 llm 或 tts
+    - breaker：熔断器状态变化
+    - coalesced：与进行中的相同请求合并、没有单独调用后端的一次调用，backend 为 llm 或 tts
+
+    指定 parent 时，记录会同时写入父记录器，便于在单次运行和整个批次两个层面汇总。
+    """
+
+    def __init__(self, parent: "MetricsRecorder" = None):
+        self.parent = parent
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self._records.append(record)
+        if self.parent is not None:
+            self.parent.add(record)
+
+    @property
+    def records(self) -> list:
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> dict:
+        """
+        汇总所有记录
+
+        Returns:
+            {"nodes": {节点名: 耗时统计}, "llm": 模型请求统计, "tts": 语音合成统计}
+        """
+        records = self.records
+        nodes = {}
+        for r in records:
+            if r["kind"] == "node":
+                nodes.setdefault(r["node"], []).append(r)
+
+        llm = [r for r in records if r["kind"] == "llm"]
+        llm_requests = [r for r in llm if not r.get("cached")]
+        speeds = [r["tokens_per_second"] for r in llm_requests if r.get("tokens_per_second")]
+
+        tts = [r for r in records if r["kind"] == "tts"]
+        tts_requests = [r for r in tts if not r.get("cached")]
+        delays = [r["first_package_delay_ms"] for r in tts_requests if r.get("first_package_delay_ms") is not None]
+        retries = [r for r in records if r["kind"] == "retry"]
+        coalesced = [r for r in records if r["kind"] == "coalesced"]
+        queued = [r for r in records if r["kind"] == "queue"]
+
+        return {
+            "nodes": {
+                name: {
+                    "count": len(items),
+                    "errors": sum(1 for r in items if r.get("error")),
+                    "total_ms": round(_sum(items, "wall_ms"), 1),
+                    "avg_ms": round(_sum(items, "wall_ms") / len(items), 1),
+                    "p95_ms": round(_percentile([r["wall_ms"] for r in items], 95), 1)
+                }
+                for name, items in nodes.items()
+            },
+            "llm": {
+                "requests": len(llm_requests),
+                "cached": len(llm) - len(llm_requests),
+                "prompt_tokens": _sum(llm_requests, "prompt_tokens"),
+                "completion_tokens": _sum(llm_requests, "completion_tokens"),
+                "truncated": sum(1 for r in llm_requests if r.get("finish_reason") == "length"),
+                "total_ms": round(_sum(llm_requests, "duration_ms"), 1),
+                "retries": sum(1 for r in retries if r["backend"] == "llm"),
+                "coalesced": sum(1 for r in coalesced if r["backend"] == "llm"),
+                "avg_tokens_per_second": round(sum(speeds) / len(speeds), 1) if speeds else None,
+                "queue": _queue_summary(queued, "llm")
+            },
+            "tts": {
+                "requests": len(tts_requests),
+                "cached": len(tts) - len(tts_requests),
+                "bytes": _sum(tts, "bytes"),
+                "audio_seconds": round(_sum(tts, "audio_seconds"), 2),
+                "retries": sum(1 for r in retries if r["backend"] == "tts"),
+                "coalesced": sum(1 for r in coalesced if r["backend"] == "tts"),
+                "avg_first_package_delay_ms": round(sum(delays) / len(delays), 1) if delays else None,
+                "p95_first_package_delay_ms": round(_percentile(delays, 95), 1) if delays else None,
+                "queue": _queue_summary(queued, "tts")
+            }
+        }
+
+    def write_jsonl(self, path: str) -> str:
+        """
+        将所有记录按行写入 JSON Lines 文件
+        """
+        with atomic_open(path, "w", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return path
+
+    def to_prometheus(self) -> str:
+        """
+        导出 Prometheus 文本格式的汇总指标
+        """
+        records = self.records
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        nodes = {}
+        for r in records:
+            if r["kind"] == "node":
+                nodes.setdefault(r["node"], []).append(r)
+        metric("blog_node_duration_seconds_sum", "counter", "节点累计耗时",
+               [({"node": n}, round(_sum(items, "wall_ms") / 1000, 6)) for n, items in nodes.items()])
+        metric("blog_node_duration_seconds_count", "counter", "节点执行次数",
+               [({"node": n}, len(items)) for n, items in nodes.items()])
+        metric("blog_node_errors_total", "counter", "节点失败次数",
+               [({"node": n}, sum(1 for r in items if r.get("error"))) for n, items in nodes.items()])
+
+        for kind in ("llm", "tts"):
+            items = [r for r in records if r["kind"] == kind]
+            metric(f"blog_{kind}_requests_total", "counter", "请求次数（cached 表示是否命中缓存）",
+                   [({"cached": str(c).lower()}, sum(1 for r in items if bool(r.get("cached")) == c)) for c in (False, True)])
+
+        llm = [r for r in records if r["kind"] == "llm"]
+        metric("blog_llm_prompt_tokens_total", "counter", "提示词token数", [({}, _sum(llm, "prompt_tokens"))])
+        metric("blog_llm_completion_tokens_total", "counter", "生成token数", [({}, _sum(llm, "completion_tokens"))])
+        metric("blog_llm_truncated_total", "counter", "因长度上限被截断的回复数",
+               [({}, sum(1 for r in llm if r.get("finish_reason") == "length"))])
+        metric("blog_llm_request_duration_seconds_sum", "counter", "模型请求累计耗时",
+               [({}, round(_sum([r for r in llm if not r.get("cached")], "duration_ms") / 1000, 6))])
+
+        tts = [r for r in records if r["kind"] == "tts"]
+        delays = [r["first_package_delay_ms"] for r in tts if r.get("first_package_delay_ms") is not None]
+        metric("blog_tts_audio_bytes_total", "counter", "合成音频字节数", [({}, _sum(tts, "bytes"))])
+        metric("blog_tts_audio_seconds_total", "counter", "合成音频时长（秒）", [({}, round(_sum(tts, "audio_seconds"), 3))])
+        retries = [r for r in records if r["kind"] == "retry"]
+        metric("blog_retries_total", "counter", "后端请求重试次数",
+               [({"backend": b}, sum(1 for r in retries if r["backend"] == b)) for b in ("llm", "tts")])
+        coalesced = [r for r in records if r["kind"] == "coalesced"]
+        metric("blog_coalesced_requests_total", "counter", "与进行中的相同请求合并的调用次数",
+               [({"backend": b}, sum(1 for r in coalesced if r["backend"] == b)) for b in ("llm", "tts")])
+        metric("blog_tts_first_package_delay_seconds_sum", "counter", "首包延迟累计值",
+               [({}, round(sum(delays) / 1000, 6))])
+        metric("blog_tts_first_package_delay_seconds_count", "counter", "首包延迟样本数", [({}, len(delays))])
+        queued = {}
+        for r in records:
+            if r["kind"] == "queue":
+                queued.setdefault((r["backend"], r["priority"]), []).append(r)
+        metric("blog_queue_wait_seconds_sum", "counter", "请求排队累计等待时间",
+               [({"backend": b, "priority": p}, round(_sum(items, "wait_ms") / 1000, 6)) for (b, p), items in queued.items()])
+        metric("blog_queue_wait_seconds_count", "counter", "排队的请求数",
+               [({"backend": b, "priority": p}, len(items)) for (b, p), items in queued.items()])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> str:
+        """
+        将 Prometheus 文本格式的指标写入文件（可供 node_exporter textfile collector 读取）
+        """
+        with atomic_open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        return path
+
+
+def _queue_summary(records: list, backend: str) -> dict:
+    """
+    按优先级汇总一个后端的排队等待时间
+    """
+    by_priority = {}
+    for r in records:
+        if r["backend"] == backend:
+            by_priority.setdefault(r["priority"], []).append(r["wait_ms"])
+    return {
+        priority: {
+            "count": len(waits),
+            "avg_ms": round(sum(waits) / len(waits), 1),
+            "p95_ms": round(_percentile(waits, 95), 1)
+        }
+        for priority, waits in by_priority.items()
+    }
+
+
+def current_recorder():
+    """
+    返回当前上下文中的记录器，未开启记录时返回None
+    """
+    return _recorder.get()
+
+
+@contextmanager
+def recording(**labels):
+    """
+    在当前上下文中开启指标记录
+
+    已有记录器时新记录器作为其子记录器，记录会同时汇总到外层（如整个批次）。
+
+    Args:
+        labels: 附加到每条记录上的标签，如 job、topic
+
+    Yields:
+        MetricsRecorder 实例
+    """
+    recorder = MetricsRecorder(parent=_recorder.get())
+    recorder_token = _recorder.set(recorder)
+    labels_token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield recorder
+    finally:
+        _labels.reset(labels_token)
+        _recorder.reset(recorder_token)
+
+
+@contextmanager
+def labels(**values):
+    """
+    为当前上下文中产生的记录追加标签
+    """
+    token = _labels.set({**_labels.get(), **values})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def record(kind: str, **fields):
+    """
+    上报一条记录，未开启记录时忽略
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return
+    recorder.add({"kind": kind, "ts": round(time.time(), 3), **_labels.get(), **fields})
+
+
+@contextmanager
+def node_timer(node: str):
+    """
+    记录工作流节点的耗时
+
+    Yields:
+        可写入额外字段的字典，如 {"error": True}
+    """
+    extra = {}
+    token = _labels.set({**_labels.get(), "node": node})
+    started = time.perf_counter()
+    try:
+        yield extra
+    except Exception:
+        extra["error"] = True
+        raise
+    finally:
+        _labels.reset(token)
+        record("node", node=node, wall_ms=round((time.perf_counter() - started) * 1000, 3), **extra)
+
+
+def bind(fn):
+    """
+    将 fn 绑定到当前上下文，提交到线程池执行时记录器和标签仍然有效
+
+    用法：executor.submit(metrics.bind(fn), *args)
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+def format_summary(summary: dict) -> list:
+    """
+    将汇总结果格式化为便于打印的文本行
+    """
+    lines = []
+    for name, node in summary["nodes"].items():
+        lines.append(f"节点 {name}：{node['count']}次，平均{node['avg_ms']}毫秒，P95 {node['p95_ms']}毫秒，失败{node['errors']}次")
+    llm = summary["llm"]
+    lines.append(f"模型请求：{llm['requests']}次（缓存命中{llm['cached']}次），"
+                 f"提示词{llm['prompt_tokens']} tokens，生成{llm['completion_tokens']} tokens，"
+                 f"平均速度{llm['avg_tokens_per_second']} tokens/s，重试{llm['retries']}次，截断{llm['truncated']}次，合并{llm['coalesced']}次")
+    tts = summary["tts"]
+    lines.append(f"语音合成：{tts['requests']}次（缓存命中{tts['cached']}次），音频{tts['bytes']}字节/{tts['audio_seconds']}秒，"
+                 f"平均首包延迟{tts['avg_first_package_delay_ms']}毫秒，重试{tts['retries']}次，合并{tts['coalesced']}次")
+    for backend, label in (("llm", "模型请求"), ("tts", "语音合成")):
+        for priority, queue in summary[backend].get("queue", {}).items():
+            lines.append(f"{label}排队（{priority}）：{queue['count']}次，平均{queue['avg_ms']}毫秒，P95 {queue['p95_ms']}毫秒")
+    return lines
@@ -0,0 +1,138 @@
+# 段落级流水线：生成的文本按段落依次进入润色和语音合成，三个阶段重叠执行
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+import src.config as config
+import src.metrics as metrics
+from src.text_chunking import chunk_text
+from src.audio_utils import AudioStitcher
+
+
+def _chain(future: Future, executor: ThreadPoolExecutor, fn) -> Future:
+    """
+    在 future 完成后把它的结果提交给 executor 执行 fn，返回后续任务的 future
+    """
+    chained = Future()
+    # 在提交时绑定上下文，后续任务的指标仍归属当前工作流
+    fn = metrics.bind(fn)
+
+    def on_done(f: Future):
+        if f.exception() is not None:
+            chained.set_exception(f.exception())
+            return
+        inner = executor.submit(fn, f.result())
+
+        def copy_result(i: Future):
+            if i.exception() is not None:
+                chained.set_exception(i.exception())
+            else:
+                chained.set_result(i.result())
+
+        inner.add_done_callback(copy_result)
+
+    future.add_done_callback(on_done)
+    return chained
+
+
+class ParagraphPipeline:
+    """
+    段落级流水线
+
+    调用 feed() 逐个送入模型生成的文本增量，每凑齐一个段落就提交润色；
+    每个段落润色完成后立即提交语音合成。finish() 等待所有段落完成，
+    按原文顺序返回润色结果，并把音频片段按顺序拼接到输出文件。
+
+    润色以段落为单位进行（不等全文生成完），润色结果与逐步执行模式对全文一次润色的结果不保证逐字相同；
+    输出文件的格式和段落顺序相同。需要与逐步执行模式完全一致的润色结果时使用 sequential 模式。
+    """
+
+    def __init__(self, text_processor, tts_service, polish_type: str = "blog", with_tts: bool = True,
+                 polish_workers: int = None, use_cache: bool = True):
+        self.text_processor = text_processor
+        self.tts_service = tts_service
+        self.polish_type = polish_type
+        self.with_tts = with_tts
+        self.use_cache = use_cache
+        self.polish_executor = ThreadPoolExecutor(max_workers=polish_workers or config.PIPELINE_POLISH_WORKERS)
+        self.tts_executor = ThreadPoolExecutor(max_workers=tts_service.max_workers) if with_tts else None
+        self.started_at = time.time()
+        self.first_audio_submitted_at = None
+        self._buffer = ""
+        self._original = []
+        self._polished = []
+        self._audio = []
+
+    def _polish(self, paragraph: str) -> str:
+        # 标题段落不需要润色，直接保留
+        if re.fullmatch(r"#+\s.*", paragraph):
+            return paragraph
+        return self.text_processor.polish_text(paragraph, self.polish_type, use_cache=self.use_cache)
+
+    def _synthesize(self, polished: str) -> list:
+        if self.first_audio_submitted_at is None:
+            self.first_audio_submitted_at = time.time()
+        size = self.tts_service.chunk_size or len(polished)
+        return [self.tts_service.synthesize_chunk(chunk, use_cache=self.use_cache) for chunk in chunk_text(polished, size)]
+
+    def _submit(self, paragraph: str):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            return
+        self._original.append(paragraph)
+        polished = self.polish_executor.submit(metrics.bind(self._polish), paragraph)
+        self._polished.append(polished)
+        if self.with_tts:
+            self._audio.append(_chain(polished, self.tts_executor, self._synthesize))
+
+    def feed(self, delta: str):
+        """
+        送入一段文本增量，凑齐的段落会立即提交润色
+        """
+        self._buffer += delta
+        while "\n\n" in self._buffer:
+            paragraph, self._buffer = self._buffer.split("\n\n", 1)
+            self._submit(paragraph)
+
+    def finish(self, audio_file: str = None) -> dict:
+        """
+        提交最后一个段落，等待所有段落完成并按顺序汇总
+
+        Args:
+            audio_file: 音频输出路径，with_tts 为 True 时必须提供
+
+        Returns:
+            {"original_text": 原始文本, "polished_text": 润色后文本, "audio_file": 音频文件路径, "paragraphs": 段落数,
+             "first_audio_submitted_ms": 第一个段落开始合成的时间（相对流水线启动，毫秒）}
+        """
+        self._submit(self._buffer)
+        self._buffer = ""
+        try:
+            polished_text = "\n\n".join(future.result() for future in self._polished)
+
+            if self.with_tts:
+                # 拼接失败时 AudioStitcher 会删除临时文件，不会留下拼接了一半的音频
+                with AudioStitcher(audio_file, self.tts_service.audio_format) as stitcher:
+                    for i, future in enumerate(self._audio):
+                        for segment in future.result():
+                            stitcher.append(segment)
+                        # 写入后释放该段落的音频
+                        self._audio[i] = None
+
+            return {
+                "original_text": "\n\n".join(self._original),
+                "polished_text": polished_text,
+                "audio_file": audio_file if self.with_tts else None,
+                "paragraphs": len(self._original),
+                "first_audio_submitted_ms": (self.first_audio_submitted_at - self.started_at) * 1000
+                if self.first_audio_submitted_at else None
+            }
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        取消未开始的任务并释放线程池
+        """
+        self.polish_executor.shutdown(wait=False, cancel_futures=True)
+        if self.tts_executor is not None:
+            self.tts_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,318 @@
+# 后端调用的容错层：指数退避重试、限流、熔断和任务截止时间
+#
+# 模型服务和语音合成服务各有一个进程内共享的 Backend，所有客户端实例的请求都经过它，
+# 因此限流和熔断状态对整个进程生效；限流、并发上限和优先级排队由 src/scheduler.py 实现。
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+import src.config as config
+import src.metrics as metrics
+from src.scheduler import Scheduler, QueueTimeout, TokenBucket
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    熔断器打开时直接拒绝请求
+    """
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    任务超过截止时间
+    """
+
+
+@contextmanager
+def deadline(seconds: float = None):
+    """
+    为当前上下文设置截止时间，嵌套使用时取更早的一个
+
+    Args:
+        seconds: 从现在起的剩余秒数，None 或 0 表示不设置
+    """
+    if not seconds:
+        yield
+        return
+    current = _deadline.get()
+    target = time.monotonic() + seconds
+    token = _deadline.set(target if current is None else min(current, target))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """
+    距截止时间的剩余秒数，未设置截止时间时返回None
+    """
+    target = _deadline.get()
+    return None if target is None else target - time.monotonic()
+
+
+def check_deadline():
+    """
+    已超过截止时间时抛出 DeadlineExceeded
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("任务已超过截止时间")
+
+
+def clamp_timeout(timeout: float = None):
+    """
+    用剩余时间收紧单次请求的超时时间
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, 0.001)
+    return left if timeout is None else min(timeout, left)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    判断错误是否值得重试：限流（429）、超时和服务端错误（5xx）可以重试，其他 4xx 和参数错误不重试
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded, ValueError, TypeError)):
+        return False
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return True
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败 failure_threshold 次后打开，reset_timeout 秒内的请求直接失败；
+    之后进入半开状态放行一个试探请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            print(f"[Metric] {self.name} 熔断器状态：{state}")
+            metrics.record("breaker", backend=self.name, state=state)
+
+    def allow(self) -> bool:
+        """
+        请求前调用，熔断器打开时抛出 CircuitOpenError
+
+        Returns:
+            本次请求是否为半开状态下的试探请求
+        """
+        if not self.failure_threshold:
+            return False
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} 服务暂时不可用（熔断中）")
+                self._set_state("half_open")
+            if self.state == "half_open":
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name} 服务暂时不可用（等待试探请求结果）")
+                self._probing = True
+                return True
+        return False
+
+    def release(self, probe: bool):
+        """
+        试探请求没有结果就结束（被取消、排队超时）时调用，下一个请求重新试探
+        """
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.failure_threshold and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+
+class Backend:
+    """
+    一个外部服务的调用入口：熔断检查 → 排队获取名额（优先级、限流、并发上限）→ 调用 → 失败时按指数退避加随机抖动重试
+
+    Args:
+        name: 服务名称，用于日志和指标
+        max_retries: 失败后的最大重试次数
+        backoff: 第一次重试前的基准等待时间（秒），之后每次翻倍
+        max_delay: 单次等待时间上限（秒）
+        rate: 每秒最多发出的请求数，0 表示不限制
+        max_concurrency: 同时进行的最大请求数，0 表示不限制
+        failure_threshold: 连续失败多少次后熔断，0 表示不熔断
+        reset_timeout: 熔断持续时间（秒）
+        lock_dir: 跨进程共享限流和并发上限的目录，None 表示只在进程内生效
+    """
+
+    def __init__(self, name: str, max_retries: int = 3, backoff: float = 0.5, max_delay: float = 10.0,
+                 rate: float = 0, max_concurrency: int = 0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 lock_dir: str = None):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.scheduler = Scheduler(name, rate, max_concurrency, lock_dir)
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+
+    def retry_delay(self, attempt: int) -> float:
+        """
+        第 attempt 次重试前的等待时间：指数退避 + 全抖动
+        """
+        return random.uniform(0, min(self.max_delay, self.backoff * (2 ** attempt)))
+
+    def _before_attempt(self) -> bool:
+        check_deadline()
+        return self.breaker.allow()
+
+    def _after_failure(self, error: Exception, attempt: int, retries: int):
+        """
+        记录失败并返回重试前的等待时间；不应重试时重新抛出异常
+        """
+        if is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            # 参数错误等说明服务本身可用
+            self.breaker.record_success()
+        if attempt >= retries or not is_retryable(error):
+            raise error
+        delay = self.retry_delay(attempt)
+        left = remaining()
+        if left is not None and delay >= left:
+            raise DeadlineExceeded(f"{self.name} 请求失败且剩余时间不足以重试: {error}") from error
+        print(f"{self.name} 请求失败（第{attempt + 1}次）: {str(error)}，{delay:.2f}秒后重试")
+        metrics.record("retry", backend=self.name, attempt=attempt + 1, error=str(error)[:200])
+        return delay
+
+    def call(self, fn, *args, retries: int = None, limiter=None, **kwargs):
+        """
+        调用 fn(*args, **kwargs)，按策略重试
+
+        Args:
+            retries: 覆盖默认重试次数，已产生副作用、不能重复执行的调用传入0
+            limiter: 调用方自己的并发限制（客户端的 max_concurrency 信号量），每次尝试在进入调度器排队之前获取，
+                避免占着调度名额等待它而挡住优先级更高的请求
+        """
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            probe = self._before_attempt()
+            try:
+                with limiter or nullcontext(), self.scheduler.slot(remaining()):
+                    result = fn(*args, **kwargs)
+            except QueueTimeout as e:
+                self.breaker.release(probe)
+                raise DeadlineExceeded(f"{self.name} 请求排队超过任务截止时间") from e
+            except Exception as e:
+                time.sleep(self._after_failure(e, attempt, retries))
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release(probe)
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, fn, *args, retries: int = None, limiter=None, **kwargs):
+        """
+        call 的异步版本，fn 返回协程；限流和重试等待不阻塞事件循环
+
+        Args:
+            limiter: 调用方自己的异步并发限制（asyncio.Semaphore），在进入调度器排队之前获取
+        """
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            probe = self._before_attempt()
+            try:
+                # 与同步调用共用一个调度器，排队等待不阻塞事件循环
+                async with limiter or nullcontext(), self.scheduler.aslot(remaining()):
+                    result = await fn(*args, **kwargs)
+            except QueueTimeout as e:
+                self.breaker.release(probe)
+                raise DeadlineExceeded(f"{self.name} 请求排队超过任务截止时间") from e
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(e, attempt, retries))
+                attempt += 1
+                continue
+            except BaseException:
+                # 被取消（CancelledError）的试探请求没有结果，不能让熔断器一直等待
+                self.breaker.release(probe)
+                raise
+            self.breaker.record_success()
+            return result
+
+
+_lock = threading.Lock()
+_backends = {}
+
+
+def _backend_settings(name: str) -> dict:
+    if name == "llm":
+        return {
+            "max_retries": config.LLM_MAX_RETRIES,
+            "backoff": config.LLM_RETRY_BACKOFF,
+            "max_delay": config.LLM_RETRY_MAX_DELAY,
+            "rate": config.LLM_RATE_LIMIT,
+            "max_concurrency": config.LLM_MAX_CONCURRENCY,
+            "failure_threshold": config.LLM_BREAKER_THRESHOLD,
+            "reset_timeout": config.LLM_BREAKER_RESET,
+            "lock_dir": config.SCHEDULER_LOCK_DIR or None
+        }
+    if name == "tts":
+        return {
+            "max_retries": config.TTS_CHUNK_RETRIES,
+            "backoff": config.TTS_RETRY_BACKOFF,
+            "max_delay": config.TTS_RETRY_MAX_DELAY,
+            "rate": config.TTS_RATE_LIMIT,
+            "max_concurrency": config.TTS_MAX_CONCURRENCY,
+            "failure_threshold": config.TTS_BREAKER_THRESHOLD,
+            "reset_timeout": config.TTS_BREAKER_RESET,
+            "lock_dir": config.SCHEDULER_LOCK_DIR or None
+        }
+    raise ValueError(f"未知的后端: {name}")
+
+
+def get_backend(name: str) -> Backend:
+    """
+    返回进程内共享的后端调用入口，按 config 中的 LLM_* / TTS_* 配置创建
+
+    Args:
+        name: llm 或 tts
+    """
+    with _lock:
+        if name not in _backends:
+            _backends[name] = Backend(name, **_backend_settings(name))
+        return _backends[name]
+
+
+def reset_backends():
+    """
+    清空已创建的后端（熔断和限流状态随之重置），下次调用 get_backend 时按当前配置重新创建
+    """
+    with _lock:
+        _backends.clear()
@@ -0,0 +1,440 @@
+# 后端请求调度：令牌桶限流、并发上限、优先级和任务间公平分配
+#
+# 每个后端（llm、tts）有一个 Scheduler，resilience.Backend 在每次请求前向它申请名额。
+# 请求的优先级和所属任务通过 contextvars 传递（见 scheduling）：交互请求（CLI、HTTP 服务）优先于批量任务，
+# 同一优先级内按任务轮流放行，一个大批次不会占满所有名额。
+# 配置 SCHEDULER_LOCK_DIR 后，并发上限、限流和优先级在同一主机的多个进程之间共享，状态保存在该目录下并用文件锁保护。
+import os
+import json
+import time
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
+import src.config as config
+import src.metrics as metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，不支持跨进程调度
+    fcntl = None
+
+# 优先级名称及其顺序，数值越小越先放行
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# 跨进程模式下重新检查共享状态的间隔（秒）
+_POLL_INTERVAL = 0.01
+
+_priority = contextvars.ContextVar("scheduler_priority", default=None)
+_job = contextvars.ContextVar("scheduler_job", default=None)
+
+
+class QueueTimeout(TimeoutError):
+    """
+    排队等待超过了给定的时间
+    """
+
+
+@contextmanager
+def scheduling(priority: str = None, job: str = None):
+    """
+    为当前上下文中的后端请求设置优先级和所属任务，未传入的值沿用外层的设置
+
+    Args:
+        priority: interactive 或 batch，默认读取 config.SCHEDULER_DEFAULT_PRIORITY
+        job: 任务标识，同一优先级内按任务轮流放行
+
+    Raises:
+        ValueError: 未知的优先级
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"未知的优先级: {priority}，可选值：{'、'.join(PRIORITIES)}")
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if job is not None:
+        tokens.append((_job, _job.set(str(job))))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_priority() -> str:
+    """
+    返回当前上下文中请求的优先级
+    """
+    return _priority.get() or config.SCHEDULER_DEFAULT_PRIORITY
+
+
+class TokenBucket:
+    """
+    令牌桶限流：平均每秒 rate 个请求，允许 burst 个请求的突发
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        预约一个令牌，返回需要等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def take(self) -> float:
+        """
+        尝试取一个令牌：成功时返回0；令牌不足时不扣除，返回还需等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class HostLimiter:
+    """
+    同一主机上多个进程共享的并发上限、令牌桶和优先级
+
+    状态保存在 <path>.json 中，每次读写都持有 <path>.lock 的排他文件锁；
+    各进程按PID记录进行中的请求数和排队数，已退出进程的记录会被清理，不会永久占用名额。
+
+    Args:
+        path: 状态文件路径前缀（不含扩展名）
+        rate: 整个主机每秒最多发出的请求数，0 表示不限制
+        max_concurrency: 整个主机同时进行的最大请求数，0 表示不限制
+    """
+
+    def __init__(self, path: str, rate: float = 0, max_concurrency: int = 0):
+        self.state_file = f"{path}.json"
+        self.lock_file = f"{path}.lock"
+        self.rate = rate
+        self.burst = max(1, int(rate)) if rate else 0
+        self.max_concurrency = max_concurrency
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _alive(pid: str) -> bool:
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            pass
+        return True
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_file, "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                for key in ("inflight", "waiting"):
+                    state[key] = {pid: value for pid, value in state.get(key, {}).items() if self._alive(pid)}
+                yield state
+                tmp = f"{self.state_file}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def try_acquire(self, rank: int, waiting: dict) -> float:
+        """
+        尝试获取一个主机级名额
+
+        Args:
+            rank: 请求的优先级顺序
+            waiting: 本进程各优先级（顺序值）的排队数量，包括本次请求
+
+        Returns:
+            成功时返回0，否则返回重试前应等待的秒数
+        """
+        pid = str(os.getpid())
+        with self._locked() as state:
+            state["waiting"][pid] = {str(r): n for r, n in waiting.items() if n}
+            # 其他进程有更高优先级的请求在排队时让行
+            for other, counts in state["waiting"].items():
+                if other != pid and any(int(r) < rank and n for r, n in counts.items()):
+                    return _POLL_INTERVAL
+            if self.max_concurrency and sum(state["inflight"].values()) >= self.max_concurrency:
+                return _POLL_INTERVAL
+            if self.rate:
+                now = time.time()
+                tokens = min(self.burst, state.get("tokens", self.burst) + (now - state.get("updated", now)) * self.rate)
+                state["tokens"], state["updated"] = tokens, now
+                if tokens < 1:
+                    return max(_POLL_INTERVAL, (1 - tokens) / self.rate)
+                state["tokens"] = tokens - 1
+            state["inflight"][pid] = state["inflight"].get(pid, 0) + 1
+            counts = dict(state["waiting"][pid])
+            counts[str(rank)] = counts.get(str(rank), 1) - 1
+            state["waiting"][pid] = {r: n for r, n in counts.items() if n}
+            return 0.0
+
+    def release(self, waiting: dict = None):
+        """
+        归还一个名额（waiting 为None时只更新排队数量），同时更新本进程的排队数量
+        """
+        pid = str(os.getpid())
+        with self._locked() as state:
+            if waiting is not None:
+                state["waiting"][pid] = {str(r): n for r, n in waiting.items() if n}
+            inflight = state["inflight"].get(pid, 0) - 1
+            if inflight > 0:
+                state["inflight"][pid] = inflight
+            else:
+                state["inflight"].pop(pid, None)
+
+    def update_waiting(self, waiting: dict):
+        """
+        只更新本进程的排队数量（排队的请求放弃等待时调用）
+        """
+        pid = str(os.getpid())
+        with self._locked() as state:
+            state["waiting"][pid] = {str(r): n for r, n in waiting.items() if n}
+
+
+class _Ticket:
+    __slots__ = ("priority", "rank", "job", "seq", "enqueued", "wakeup")
+
+    def __init__(self, priority: str, job: str, seq: int):
+        self.priority = priority
+        self.rank = PRIORITIES[priority]
+        self.job = job
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        # 异步等待的请求：(事件循环, asyncio.Event)，调度状态变化时从任意线程唤醒
+        self.wakeup = None
+
+
+class Scheduler:
+    """
+    一个后端的请求调度器
+
+    排队的请求按以下顺序放行：优先级高的先放行；同一优先级内，进行中请求最少、最久没有被放行的任务先放行；
+    同一任务内先到先得。放行还需要满足并发上限和令牌桶限流，没有任何限制时不排队。
+
+    Args:
+        name: 后端名称，用于指标
+        rate: 每秒最多发出的请求数，0 表示不限制
+        max_concurrency: 同时进行的最大请求数，0 表示不限制
+        lock_dir: 跨进程共享状态的目录，设置后 rate 和 max_concurrency 对整个主机生效
+    """
+
+    def __init__(self, name: str, rate: float = 0, max_concurrency: int = 0, lock_dir: str = None):
+        self.name = name
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.host = None
+        if lock_dir and (rate or max_concurrency):
+            if fcntl is None:
+                print("当前平台不支持文件锁，跨进程调度已禁用，限制只在进程内生效")
+            else:
+                self.host = HostLimiter(os.path.join(lock_dir, name), rate, max_concurrency)
+        self.bucket = TokenBucket(rate) if rate and self.host is None else None
+        self.active = bool(rate or max_concurrency)
+        self.inflight = 0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._job_inflight = {}
+        self._job_served = {}
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def _waiting_counts(self) -> dict:
+        counts = {}
+        for ticket in self._waiting:
+            counts[ticket.rank] = counts.get(ticket.rank, 0) + 1
+        return counts
+
+    def _head(self) -> _Ticket:
+        return min(self._waiting, key=lambda t: (t.rank, self._job_inflight.get(t.job, 0),
+                                                 self._job_served.get(t.job, -1), t.seq))
+
+    def _notify(self):
+        """
+        持有 _cond 时调用：唤醒所有同步和异步等待的请求重新检查是否可以放行
+        """
+        self._cond.notify_all()
+        for ticket in self._waiting:
+            if ticket.wakeup is not None:
+                loop, event = ticket.wakeup
+                loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self) -> _Ticket:
+        with self._cond:
+            ticket = _Ticket(current_priority(), _job.get(), next(self._seq))
+            self._waiting.append(ticket)
+            return ticket
+
+    def _try_grant(self, ticket: _Ticket):
+        """
+        持有 _cond 时调用，返回 (是否放行, 再次尝试前的等待秒数，None 表示等待通知)
+        """
+        if self._head() is not ticket:
+            return False, None
+        if self.host is not None:
+            wait = self.host.try_acquire(ticket.rank, self._waiting_counts())
+            if wait:
+                return False, wait
+        else:
+            if self.max_concurrency and self.inflight >= self.max_concurrency:
+                return False, None
+            if self.bucket is not None:
+                wait = self.bucket.take()
+                if wait:
+                    return False, wait
+        self._waiting.remove(ticket)
+        self.inflight += 1
+        self._job_inflight[ticket.job] = self._job_inflight.get(ticket.job, 0) + 1
+        self._job_served[ticket.job] = ticket.seq
+        # 下一个排在最前的请求可能已经可以放行
+        self._notify()
+        return True, None
+
+    def _cancel(self, ticket: _Ticket):
+        with self._cond:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                if self.host is not None:
+                    self.host.update_waiting(self._waiting_counts())
+                self._notify()
+
+    def _record(self, ticket: _Ticket):
+        metrics.record("queue", backend=self.name, priority=ticket.priority,
+                       wait_ms=round((time.monotonic() - ticket.enqueued) * 1000, 1))
+
+    def acquire(self, timeout: float = None) -> _Ticket:
+        """
+        排队直到获得一个名额
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            名额凭证，请求结束后传给 release；没有任何限制时返回None
+
+        Raises:
+            QueueTimeout: 等待超过 timeout
+        """
+        if not self.active:
+            return None
+        ticket = self._enqueue()
+        limit = None if timeout is None else time.monotonic() + timeout
+        try:
+            with self._cond:
+                while True:
+                    granted, wait = self._try_grant(ticket)
+                    if granted:
+                        break
+                    if limit is not None:
+                        left = limit - time.monotonic()
+                        if left <= 0:
+                            raise QueueTimeout(f"{self.name} 请求排队超时")
+                        wait = left if wait is None else min(wait, left)
+                    self._cond.wait(wait)
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        self._record(ticket)
+        return ticket
+
+    async def aacquire(self, timeout: float = None) -> _Ticket:
+        """
+        acquire 的异步版本，等待时不阻塞事件循环
+        """
+        if not self.active:
+            return None
+        ticket = self._enqueue()
+        event = asyncio.Event()
+        ticket.wakeup = (asyncio.get_running_loop(), event)
+        limit = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                with self._cond:
+                    granted, wait = self._try_grant(ticket)
+                    # 在持有锁时清除事件，之后的放行和归还都会重新设置它，不会错过通知
+                    event.clear()
+                if granted:
+                    break
+                if limit is not None:
+                    left = limit - time.monotonic()
+                    if left <= 0:
+                        raise QueueTimeout(f"{self.name} 请求排队超时")
+                    wait = left if wait is None else min(wait, left)
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        self._record(ticket)
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        """
+        归还名额
+        """
+        if ticket is None:
+            return
+        with self._cond:
+            self.inflight -= 1
+            remaining = self._job_inflight.get(ticket.job, 0) - 1
+            if remaining > 0:
+                self._job_inflight[ticket.job] = remaining
+            else:
+                self._job_inflight.pop(ticket.job, None)
+            if not self._waiting:
+                # 没有排队的任务时清理轮转记录，长时间运行的服务不会无限累积任务标识
+                self._job_served.clear()
+            if self.host is not None:
+                self.host.release(self._waiting_counts())
+            self._notify()
+
+    @contextmanager
+    def slot(self, timeout: float = None):
+        """
+        在 with 块内占用一个名额
+        """
+        ticket = self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, timeout: float = None):
+        """
+        slot 的异步版本
+        """
+        ticket = await self.aacquire(timeout)
+        try:
+            yield
+        finally:
+            self.release(ticket)
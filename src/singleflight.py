@@ -0,0 +1,158 @@
+# 请求合并（single-flight）：同时发起的相同请求只调用一次后端，所有调用方共享这一次的结果
+#
+# 与持久化缓存不同，这里只合并正在进行中的请求，请求结束后立即释放，不保存任何结果。
+import asyncio
+import threading
+import src.config as config
+import src.metrics as metrics
+import src.resilience as resilience
+
+
+# leader 被取消时写入共享 future 的结果，等待者收到后重新发起请求
+_LEADER_CANCELLED = object()
+
+
+class _Call:
+    """
+    一次进行中的同步调用
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    按请求键合并并发调用
+
+    第一个到达的调用（leader）执行实际请求，同一请求键的后续调用等待它完成并得到相同的结果或异常。
+    同步调用按线程合并；异步调用在同一事件循环内合并。
+
+    Args:
+        name: 名称，用于指标（llm、tts）
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def _on_coalesced(self):
+        metrics.record("coalesced", backend=self.name)
+
+    def do(self, key: str, fn, *args, **kwargs):
+        """
+        执行 fn(*args, **kwargs)，已有相同 key 的调用在进行中时等待并复用其结果
+
+        Raises:
+            fn 抛出的异常（等待中的调用同样收到该异常）；等待超过任务截止时间时抛出 DeadlineExceeded
+        """
+        if not config.SINGLE_FLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            self._on_coalesced()
+            if not call.done.wait(resilience.remaining()):
+                raise resilience.DeadlineExceeded(f"{self.name} 等待相同请求的结果时超过截止时间")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn, *args, **kwargs):
+        """
+        do 的异步版本，fn 返回协程
+
+        leader 被取消时只有它自己收到 CancelledError，等待中的调用重新竞争，其中一个成为新的 leader 执行请求。
+        """
+        if not config.SINGLE_FLIGHT_ENABLED:
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        while True:
+            with self._lock:
+                future = self._async_calls.get(loop_key)
+                leader = future is None
+                if leader:
+                    future = self._async_calls[loop_key] = loop.create_future()
+                    self.calls += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                break
+            self._on_coalesced()
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), resilience.remaining())
+            except asyncio.TimeoutError:
+                raise resilience.DeadlineExceeded(f"{self.name} 等待相同请求的结果时超过截止时间")
+            if result is not _LEADER_CANCELLED:
+                return result
+
+        try:
+            result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # 不取消共享的 future：通知等待者重新发起请求
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[loop_key]
+
+    def stats(self) -> dict:
+        """
+        返回实际执行和被合并的调用次数
+        """
+        total = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / total, 4) if total else None
+        }
+
+
+_lock = threading.Lock()
+_groups = {}
+
+
+def get_group(name: str) -> SingleFlight:
+    """
+    返回进程内共享的请求合并组，同一后端的所有客户端实例共用一个
+
+    Args:
+        name: llm 或 tts
+    """
+    with _lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
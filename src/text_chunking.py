@@ -0,0 +1,129 @@
+# 文本切分工具：按句子和段落边界切分长文本，支持中文和中英混排
+import re
+
+# 句末标点（含紧随其后的引号、括号）；英文句号只在其后是空白或行尾时算句末，避免切开 1.5、example.com
+_SENTENCE_END = re.compile(r'([。！？!?；;]+[”’」』）)"\']*|\.+[”’」』）)"\']*(?=\s|$))')
+
+# 超长句子硬切前优先选择的切分位置：空白和逗号、顿号之后
+_SOFT_BREAK = re.compile(r'[\s，,、]')
+
+
+def split_sentences(text: str) -> list:
+    """
+    按句末标点和换行将文本切分为句子
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        句子列表（保留句末标点，去除空白句子）；句子之间的空白保留在前一个句子末尾，
+        同一行的句子直接拼接即可还原原文，每行首尾的空白会被去除
+    """
+    sentences = []
+    for line in text.split("\n"):
+        parts = _SENTENCE_END.split(line.strip())
+        line_sentences = []
+        # split 后奇数位置为标点，与前面的句子内容合并
+        for i in range(0, len(parts), 2):
+            content = parts[i]
+            sentence = content.lstrip()
+            if line_sentences:
+                line_sentences[-1] += content[:len(content) - len(sentence)]
+            sentence += parts[i + 1] if i + 1 < len(parts) else ""
+            if sentence.strip():
+                line_sentences.append(sentence)
+        sentences.extend(line_sentences)
+    return sentences
+
+
+def _cut_point(sentence: str, max_chars: int) -> int:
+    """
+    超长句子的切分位置：max_chars 以内最后一个空白或逗号之后，找不到时按字符硬切
+    """
+    breaks = [m.end() for m in _SOFT_BREAK.finditer(sentence, 0, max_chars)]
+    return breaks[-1] if breaks and breaks[-1] > 0 else max_chars
+
+
+def chunk_text(text: str, max_chars: int = 300) -> list:
+    """
+    将文本切分为不超过 max_chars 的片段，优先在段落和句子边界处切分
+
+    Args:
+        text: 原始文本
+        max_chars: 每个片段的最大字符数
+
+    Returns:
+        文本片段列表，顺序与原文一致
+    """
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        # 新段落与上一段之间保留换行，短段落可以合并进同一片段
+        separator = "\n" if current else ""
+        for sentence in split_sentences(paragraph):
+            # 单个句子超长时在空白或逗号处切开，没有时按字符硬切
+            while len(sentence) > max_chars:
+                if current:
+                    chunks.append(current.rstrip())
+                    current = ""
+                cut = _cut_point(sentence, max_chars)
+                chunks.append(sentence[:cut].rstrip())
+                sentence = sentence[cut:].lstrip()
+            if current and len(current.rstrip()) + len(separator) + len(sentence.rstrip()) > max_chars:
+                chunks.append(current.rstrip())
+                current = ""
+                separator = ""
+            current += separator + sentence
+            separator = ""
+    if current.strip():
+        chunks.append(current.rstrip())
+    return chunks
+
+
+# Markdown 标题行
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+
+
+def split_sections(text: str, max_chars: int = 600) -> list:
+    """
+    按 Markdown 标题和段落切分长文本，用于分段并发润色
+
+    标题单独成段且不需要润色；同一标题下的相邻段落合并，合并后不超过 max_chars。
+    所有片段按顺序用两个换行拼接即可还原原文结构。
+
+    Args:
+        text: 原始文本
+        max_chars: 每个待润色片段的最大字符数（单个段落超长时单独成为一个片段）
+
+    Returns:
+        片段列表，每项为 {"text": 片段文本, "polish": 是否需要润色, "headings": 所属的标题路径}
+    """
+    sections = []
+    headings = []
+    current = []
+    current_size = 0
+
+    def flush():
+        nonlocal current, current_size
+        if current:
+            sections.append({"text": "\n\n".join(current), "polish": True, "headings": list(headings)})
+        current = []
+        current_size = 0
+
+    for block in re.split(r"\n\s*\n", text.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        match = _HEADING.match(block)
+        if match and "\n" not in block:
+            flush()
+            level = len(match.group(1))
+            headings = headings[:level - 1] + [match.group(2)]
+            sections.append({"text": block, "polish": False, "headings": list(headings)})
+            continue
+        if current and current_size + 2 + len(block) > max_chars:
+            flush()
+        current.append(block)
+        current_size += len(block) + (2 if current_size else 0)
+    flush()
+    return sections
@@ -1,33 +1,405 @@
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import re
+import json
+import time
+import asyncio
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, AsyncOpenAI
+import src.config as config
+import src.metrics as metrics
+import src.resilience as resilience
+from src.singleflight import get_group
+from src.cache import LLMCache, request_key, shared_llm_cache
+from src.text_chunking import split_sections, split_sentences
 
-# 加载环境变量
-load_dotenv()
+# 已通过连通性检查的服务地址，同一进程内每个地址只检查一次
+_checked_endpoints = set()
+_check_lock = threading.Lock()
 
-class TextProcessor:
+
+class LLMGenerationError(RuntimeError):
+    """
+    模型未能生成内容：请求失败（重试后仍失败、熔断、超过截止时间）或返回了空内容
+    """
+
+
+def _require_text(text: str, what: str) -> str:
+    """
+    检查模型回复非空，返回去掉首尾空白的文本
+    """
+    text = (text or "").strip()
+    if not text:
+        raise LLMGenerationError(f"{what}：模型返回了空内容")
+    return text
+
+
+class StreamStats:
+    """
+    单次流式请求的统计信息：首token延迟和生成速度
+    """
+    
     def __init__(self):
+        self.started_at = time.time()
+        self.first_token_at = None
+        self.finished_at = None
+        self.completion_tokens = 0
+        self.prompt_tokens = None
+    
+    def on_delta(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.time()
+        self.completion_tokens += 1
+    
+    def finish(self, usage=None):
+        self.finished_at = time.time()
+        # 服务端返回了用量统计时以服务端为准，否则按收到的增量数估算token数
+        if usage is not None:
+            self.prompt_tokens = usage.prompt_tokens
+            self.completion_tokens = usage.completion_tokens
+    
+    @property
+    def time_to_first_token_ms(self):
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started_at) * 1000
+    
+    @property
+    def tokens_per_second(self):
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return self.completion_tokens / elapsed if elapsed > 0 else None
+    
+    def as_dict(self) -> dict:
+        return {
+            "time_to_first_token_ms": self.time_to_first_token_ms,
+            "tokens_per_second": self.tokens_per_second,
+            "completion_tokens": self.completion_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "total_ms": (self.finished_at - self.started_at) * 1000 if self.finished_at else None
+        }
+
+
+# 大纲模式下各长度的目标总字数，引言和结论各占约1/8，其余平均分给正文章节
+_OUTLINE_CHARS = {"short": 300, "medium": 700, "long": 1400}
+# 大纲中的正文章节行：Markdown 二/三级标题、编号或列表项
+_OUTLINE_LINE = re.compile(r"^\s*(?:#{2,3}\s+|\d+[.、)）]\s*|[-*]\s+)(.+?)\s*$")
+
+
+def parse_outline(text: str, topic: str) -> dict:
+    """
+    解析模型返回的大纲，优先按 JSON 解析，失败时按 Markdown 标题或编号列表解析
+    
+    Args:
+        text: 模型回复
+        topic: 博客主题，大纲没有标题时用作标题
+    
+    Returns:
+        {"title": 标题, "intro": 引言要点, "sections": [{"heading": 小标题, "points": 内容要点}], "conclusion": 结论要点}
+    
+    Raises:
+        ValueError: 无法解析出至少两个正文章节
+    """
+    outline = None
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
         try:
-            self.client = OpenAI(base_url=os.getenv("OPENAI_API_URL"), api_key='ollama')
-            self.model = os.getenv("OPENAI_MODEL", "qwen2:0.5b")
-            self.client.models.list()
-            print(f"Successfully connected to OLLM service, using model: {self.model}")
-        except Exception as e:
-            raise ConnectionError(f"LLM service connection failed: {e}")
+            outline = json.loads(text[start:end + 1])
+        except ValueError:
+            outline = None
+    
+    if isinstance(outline, dict) and isinstance(outline.get("sections"), list):
+        sections = [
+            {"heading": str(s.get("heading", "")).strip(), "points": str(s.get("points", "")).strip()}
+            for s in outline["sections"] if isinstance(s, dict) and str(s.get("heading", "")).strip()
+        ]
+        title = str(outline.get("title") or "").strip()
+        intro = str(outline.get("intro") or "").strip()
+        conclusion = str(outline.get("conclusion") or "").strip()
+    else:
+        title, intro, conclusion, sections = "", "", "", []
+        for line in text.splitlines():
+            if line.startswith("# ") and not title:
+                title = line[2:].strip()
+                continue
+            match = _OUTLINE_LINE.match(line)
+            if match:
+                heading, _, points = match.group(1).replace("**", "").partition("：")
+                sections.append({"heading": heading.strip(), "points": points.strip()})
+    
+    if len(sections) < 2:
+        raise ValueError(f"无法从模型回复中解析出大纲：{text[:100]}")
+    return {"title": title or topic, "intro": intro, "sections": sections, "conclusion": conclusion}
+
+
+class TextProcessor:
+    def __init__(self, base_url: str = None, model: str = None, max_concurrency: int = None, cache: LLMCache = None,
+                 health_check: str = None):
+        self.temperature = 0.7
+        # 模型回复缓存，默认按 config.LLM_CACHE_* 配置创建
+        if cache is None and config.LLM_CACHE_ENABLED:
+            cache = shared_llm_cache()
+        self.cache = cache
+        # 限制同时发往模型服务的请求数，None 表示不限制
+        self.limiter = threading.BoundedSemaphore(max_concurrency) if max_concurrency else nullcontext()
+        self.max_concurrency = max_concurrency
+        self._async_limiter = None
+        # 重试由 resilience 层统一处理，关闭 SDK 自带的重试
+        self.client = OpenAI(base_url=base_url or os.getenv("OPENAI_API_URL"), api_key='ollama', max_retries=0)
+        # 异步客户端与同步客户端指向同一服务，供 a 开头的异步方法使用
+        self.async_client = AsyncOpenAI(base_url=base_url or os.getenv("OPENAI_API_URL"), api_key='ollama', max_retries=0)
+        # 进程内共享的模型服务调用入口：重试、限流和熔断
+        self.backend = resilience.get_backend("llm")
+        # 同时发起的相同请求只调用一次模型服务
+        self.flight = get_group("llm")
+        self.model = model or os.getenv("OPENAI_MODEL", "qwen2:0.5b")
+        
+        # 连通性检查默认推迟到第一次请求前，并按服务地址缓存结果
+        self.health_check = health_check or config.LLM_HEALTH_CHECK
+        if self.health_check == "eager":
+            self.check_connection()
     
-    def polish_text(self, original_text: str, polish_type: str = "blog") -> str:
+    def check_connection(self):
         """
-        使用OpenAI模型对文本进行润色
+        检查模型服务是否可用，同一服务地址在进程内只检查一次
+        
+        Raises:
+            ConnectionError: 服务不可用
+        """
+        endpoint = str(self.client.base_url)
+        if endpoint in _checked_endpoints:
+            return
+        with _check_lock:
+            if endpoint in _checked_endpoints:
+                return
+            try:
+                self.backend.call(self.client.models.list)
+                print(f"Successfully connected to OLLM service, using model: {self.model}")
+            except Exception as e:
+                raise ConnectionError(f"LLM service connection failed: {e}")
+            _checked_endpoints.add(endpoint)
+    
+    def _ensure_connection(self):
+        if self.health_check != "off":
+            self.check_connection()
+    
+    @property
+    def async_limiter(self):
+        """
+        异步调用使用的并发限制，首次使用时在当前事件循环中创建
+        """
+        if self._async_limiter is None:
+            self._async_limiter = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else nullcontext()
+        return self._async_limiter
+    
+    def _cache_key(self, messages: list, max_tokens: int) -> str:
+        return request_key(model=self.model, messages=messages, temperature=self.temperature, max_tokens=max_tokens)
+    
+    def _cache_get(self, messages: list, max_tokens: int, use_cache: bool):
+        """
+        查询缓存，返回 (缓存键, 缓存内容)；未开启缓存时均为None
+
+        use_cache=False 时只跳过读取，仍返回缓存键，新结果会覆盖旧的缓存内容
+        """
+        if self.cache is None:
+            return None, None
+        key = self._cache_key(messages, max_tokens)
+        return key, self.cache.get(key) if use_cache else None
+    
+    def _cache_set(self, key: str, value: str):
+        if key is not None and value:
+            self.cache.set(key, value)
+    
+    def _request_options(self) -> dict:
+        """
+        设置了任务截止时间时，用剩余时间作为单次请求的超时时间
+        """
+        timeout = resilience.clamp_timeout()
+        return {} if timeout is None else {"timeout": timeout}
+    
+    def _record_usage(self, started: float, usage=None, finish_reason: str = None, stats: StreamStats = None):
+        """
+        上报一次模型请求的耗时和token用量
+        """
+        duration = time.perf_counter() - started
+        if usage is not None:
+            completion_tokens = usage.completion_tokens
+        else:
+            # 服务端未返回用量时，流式请求按收到的增量数估算
+            completion_tokens = stats.completion_tokens if stats is not None else None
+        if stats is not None and stats.tokens_per_second is not None:
+            tokens_per_second = stats.tokens_per_second
+        else:
+            tokens_per_second = completion_tokens / duration if completion_tokens and duration > 0 else None
+        metrics.record(
+            "llm",
+            model=self.model,
+            cached=False,
+            prompt_tokens=usage.prompt_tokens if usage is not None else None,
+            completion_tokens=completion_tokens,
+            duration_ms=round(duration * 1000, 3),
+            time_to_first_token_ms=round(stats.time_to_first_token_ms, 3)
+            if stats is not None and stats.time_to_first_token_ms is not None else None,
+            tokens_per_second=round(tokens_per_second, 2) if tokens_per_second else None,
+            finish_reason=finish_reason
+        )
+    
+    def _complete(self, messages: list, max_tokens: int, use_cache: bool = True) -> str:
+        """
+        以阻塞方式调用模型，返回完整回复
+        
+        相同的 (model, messages, temperature, max_tokens) 命中缓存时直接返回缓存内容，
+        use_cache=False 时跳过缓存读取（仍会写入新结果）
+        """
+        return self._complete_with_reason(messages, max_tokens, use_cache)[0]
+    
+    def _complete_with_reason(self, messages: list, max_tokens: int, use_cache: bool = True) -> tuple:
+        """
+        与 _complete 相同，同时返回 finish_reason（命中缓存时为None）
+        
+        因长度上限被截断（finish_reason 为 length）的回复不写入缓存；
+        并发的相同请求（相同的缓存键）合并为一次模型调用
+        """
+        key, cached = self._cache_get(messages, max_tokens, use_cache)
+        if cached is not None:
+            metrics.record("llm", model=self.model, cached=True)
+            return cached, None
+        
+        self._ensure_connection()
+        started = time.perf_counter()
+        
+        def request():
+            return self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+                **self._request_options()
+            )
+        
+        def complete():
+            # 先取得本客户端的并发名额再进入调度器排队，等待名额时不占用调度器的名额
+            return self._finish_response(started, self.backend.call(request, limiter=self.limiter), key)
+        
+        return self.flight.do(self._cache_key(messages, max_tokens), complete)
+    
+    def _finish_response(self, started: float, response, key: str) -> tuple:
+        """
+        记录用量、写入缓存，返回 (回复文本, finish_reason)
+        """
+        finish_reason = response.choices[0].finish_reason
+        self._record_usage(started, response.usage, finish_reason)
+        text = response.choices[0].message.content.strip()
+        if finish_reason != "length":
+            self._cache_set(key, text)
+        return text, finish_reason
+    
+    async def _acomplete(self, messages: list, max_tokens: int, use_cache: bool = True) -> str:
+        """
+        _complete 的异步版本
+        """
+        return (await self._acomplete_with_reason(messages, max_tokens, use_cache))[0]
+    
+    async def _acomplete_with_reason(self, messages: list, max_tokens: int, use_cache: bool = True) -> tuple:
+        """
+        _complete_with_reason 的异步版本
+        """
+        key, cached = self._cache_get(messages, max_tokens, use_cache)
+        if cached is not None:
+            metrics.record("llm", model=self.model, cached=True)
+            return cached, None
+        
+        await asyncio.to_thread(self._ensure_connection)
+        started = time.perf_counter()
+        
+        async def request():
+            return await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+                **self._request_options()
+            )
+        
+        async def complete():
+            return self._finish_response(started, await self.backend.acall(request, limiter=self.async_limiter), key)
+        
+        return await self.flight.ado(self._cache_key(messages, max_tokens), complete)
+    
+    def _stream_completion(self, messages: list, max_tokens: int, stats: StreamStats = None, use_cache: bool = True):
+        """
+        以流式方式调用模型，逐个产出文本增量
         
         Args:
-            original_text: 原始文本
-            polish_type: 润色类型，可选值：blog, article, story等
+            messages: 对话消息
+            max_tokens: 最大生成token数
+            stats: 可选的统计对象，用于记录首token延迟和生成速度
+            use_cache: 是否读取缓存，命中时一次性产出缓存内容
             
-        Returns:
-            润色后的文本
+        Yields:
+            模型生成的文本增量
         """
-        # 设计润色提示模板
-        messages = [
+        stats = stats or StreamStats()
+        key, cached = self._cache_get(messages, max_tokens, use_cache)
+        if cached is not None:
+            stats.on_delta()
+            stats.finish()
+            print("[Metric] 命中模型回复缓存")
+            metrics.record("llm", model=self.model, cached=True)
+            yield cached
+            return
+        
+        self._ensure_connection()
+        started = time.perf_counter()
+        usage = None
+        finish_reason = None
+        parts = []
+        # 流式请求在整个读取过程中都占用并发名额
+        with self.limiter:
+            # 只有建立连接阶段可以重试，开始产出增量后再失败无法透明地重来
+            stream = self.backend.call(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+                **self._request_options()
+            )
+        
+            try:
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        stats.on_delta()
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                self.backend.breaker.record_failure()
+                raise
+        
+        stats.finish(usage)
+        self._record_usage(started, usage, finish_reason, stats)
+        if finish_reason != "length":
+            self._cache_set(key, "".join(parts).strip())
+        print('[Metric] 首token延迟为：{}毫秒，生成速度为：{} tokens/s，生成token数：{}'.format(
+            None if stats.time_to_first_token_ms is None else round(stats.time_to_first_token_ms),
+            None if stats.tokens_per_second is None else round(stats.tokens_per_second, 1),
+            stats.completion_tokens))
+    
+    def _polish_messages(self, original_text: str, polish_type: str) -> list:
+        """
+        构造润色请求的提示消息
+        """
+        return [
             {
                 "role": "system",
                 "content": f"你是一位专业的{polish_type}编辑，请将用户提供的文本润色为高质量内容。"
@@ -49,31 +421,309 @@ class TextProcessor:
             }
         ]
         
-        try:
-            # 调用OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            return response.choices[0].message.content.strip()
+    def _use_sections(self, original_text: str) -> bool:
+        """
+        判断是否使用分段润色：POLISH_MODE 为 sections 时总是分段，auto 时超过 POLISH_AUTO_CHARS 才分段
+        """
+        if config.POLISH_MODE == "sections":
+            return True
+        return config.POLISH_MODE == "auto" and len(original_text) > config.POLISH_AUTO_CHARS
+    
+    def polish_text(self, original_text: str, polish_type: str = "blog", use_cache: bool = True, topic: str = None,
+                    stats: dict = None) -> str:
+        """
+        使用OpenAI模型对文本进行润色
         
+        Args:
+            original_text: 原始文本
+            polish_type: 润色类型，可选值：blog, article, story等
+            use_cache: 是否读取缓存，需要重新生成时传入False
+            topic: 文章主题，分段润色时作为上下文提供给模型
+            stats: 可选的字典，分段润色时结束后包含 sections、truncated、splits、fallbacks 统计
+        
+        Returns:
+            润色后的文本
+        
+        Raises:
+            LLMGenerationError: 请求失败（重试后仍失败、熔断、超过截止时间）或模型返回空内容，
+                不会用原文代替润色结果，调用方不应继续保存或合成
+        """
+        try:
+            # 长文本按标题和段落分段并发润色，避免单次请求超出输出长度上限
+            if self._use_sections(original_text):
+                text = self.polish_long_text(original_text, polish_type, topic, use_cache, stats)
+            else:
+                # 设计润色提示模板
+                messages = self._polish_messages(original_text, polish_type)
+                
+                # 调用OpenAI API
+                text = self._complete(messages, max_tokens=1000, use_cache=use_cache)
         except Exception as e:
-            print(f"文本润色失败: {str(e)}")
-            return original_text
+            raise LLMGenerationError(f"无法润色文本: {str(e)}") from e
+        return _require_text(text, "无法润色文本")
     
-    def generate_blog_from_topic(self, topic: str, length: str = "medium") -> str:
+    async def apolish_text(self, original_text: str, polish_type: str = "blog", use_cache: bool = True, topic: str = None,
+                           stats: dict = None) -> str:
         """
-        根据主题生成博客内容
+        polish_text 的异步版本
+        """
+        try:
+            if self._use_sections(original_text):
+                text = await self.apolish_long_text(original_text, polish_type, topic, use_cache, stats)
+            else:
+                messages = self._polish_messages(original_text, polish_type)
+                text = await self._acomplete(messages, max_tokens=1000, use_cache=use_cache)
+        except Exception as e:
+            raise LLMGenerationError(f"无法润色文本: {str(e)}") from e
+        return _require_text(text, "无法润色文本")
+    
+    def stream_polish_text(self, original_text: str, polish_type: str = "blog", stats: StreamStats = None, use_cache: bool = True,
+                           topic: str = None, section_stats: dict = None):
+        """
+        流式润色文本，模型每生成一段内容就立即产出
         
         Args:
-            topic: 博客主题
-            length: 博客长度，可选值：short, medium, long
+            original_text: 原始文本
+            polish_type: 润色类型，可选值：blog, article, story等
+            stats: 可选的统计对象，用于记录首token延迟和生成速度
+            use_cache: 是否读取缓存，需要重新生成时传入False
+            topic: 文章主题，分段润色时作为上下文提供给模型
+            section_stats: 可选的字典，分段润色时结束后包含 sections、truncated、splits、fallbacks 统计
             
+        Yields:
+            润色后文本的增量；分段润色时每个片段完成后按顺序整段产出
+        """
+        if self._use_sections(original_text):
+            stats = stats or StreamStats()
+            for i, section in enumerate(self.iter_polish_sections(original_text, polish_type, topic, use_cache, section_stats)):
+                stats.on_delta()
+                yield section if i == 0 else "\n\n" + section
+            stats.finish()
+            return
+        
+        messages = self._polish_messages(original_text, polish_type)
+        yield from self._stream_completion(messages, max_tokens=1000, stats=stats, use_cache=use_cache)
+    
+    def _section_messages(self, text: str, polish_type: str, context: dict) -> list:
+        """
+        构造分段润色请求的提示消息，附带主题和所在章节等上下文
+        """
+        hints = []
+        if context.get("topic"):
+            hints.append(f"文章主题：{context['topic']}")
+        if context.get("headings"):
+            hints.append(f"所在章节：{' > '.join(context['headings'])}")
+        if context.get("next_heading"):
+            hints.append(f"下一章节：{context['next_heading']}")
+        hints = "\n".join(hints)
+        
+        return [
+            {
+                "role": "system",
+                "content": f"你是一位专业的{polish_type}编辑，请将用户提供的文本润色为高质量内容。"
+            },
+            {
+                "role": "user",
+                "content": f"""以下是一篇长文中的一个片段，请将其润色为高质量的{polish_type}内容，要求：
+1. 语言流畅自然，符合中文表达习惯
+2. 保持原文核心意思和段落划分不变
+3. 只输出润色后的片段本身，不要添加标题、开场白或总结
+4. 与所在章节的上下文保持连贯
+
+{hints}
+
+原始文本：
+{text}
+
+润色后的文本：
+"""
+            }
+        ]
+    
+    def _section_plan(self, original_text: str, topic: str = None) -> list:
+        """
+        切分长文本并为每个待润色片段附上上下文
+        
         Returns:
-            生成的博客内容
+            [(片段, 上下文)]，上下文为None的片段（标题）原样保留
+        """
+        sections = split_sections(original_text, config.POLISH_SECTION_CHARS)
+        plan = []
+        for i, section in enumerate(sections):
+            if not section["polish"]:
+                plan.append((section, None))
+                continue
+            next_heading = next((s["headings"][-1] for s in sections[i + 1:] if not s["polish"]), None)
+            plan.append((section, {"topic": topic, "headings": section["headings"], "next_heading": next_heading}))
+        return plan
+    
+    def _split_for_retry(self, text: str) -> tuple:
+        """
+        片段被截断时一分为二：多个段落按段落切分，单个段落按句子切分
+        
+        Returns:
+            (两半文本, 拼接分隔符)，无法再切分时返回 (None, None)
+        """
+        paragraphs = text.split("\n\n")
+        if len(paragraphs) > 1:
+            middle = len(paragraphs) // 2
+            return ("\n\n".join(paragraphs[:middle]), "\n\n".join(paragraphs[middle:])), "\n\n"
+        sentences = split_sentences(text)
+        if len(sentences) > 1:
+            middle = len(sentences) // 2
+            return ("".join(sentences[:middle]), "".join(sentences[middle:])), ""
+        return None, None
+    
+    def _is_truncated(self, original: str, polished: str, finish_reason: str) -> bool:
+        """
+        回复因长度上限被截断，或明显短于原文时视为不完整
+        """
+        return finish_reason == "length" or len(polished) < len(original) * config.POLISH_MIN_LENGTH_RATIO
+    
+    def _polish_section(self, text: str, polish_type: str, context: dict, use_cache: bool, stats: dict) -> str:
+        """
+        润色单个片段；结果不完整时切成两半分别重试，无法再切分时保留原文
+        """
+        messages = self._section_messages(text, polish_type, context)
+        polished, finish_reason = self._complete_with_reason(messages, config.POLISH_SECTION_MAX_TOKENS, use_cache)
+        if not self._is_truncated(text, polished, finish_reason):
+            return polished
+        
+        stats["truncated"] += 1
+        halves, separator = self._split_for_retry(text)
+        if halves is None:
+            stats["fallbacks"] += 1
+            print("片段润色结果不完整且无法继续切分，保留原文")
+            return text
+        stats["splits"] += 1
+        return separator.join(self._polish_section(half, polish_type, context, use_cache, stats) for half in halves)
+    
+    async def _apolish_section(self, text: str, polish_type: str, context: dict, use_cache: bool, stats: dict) -> str:
+        """
+        _polish_section 的异步版本
+        """
+        messages = self._section_messages(text, polish_type, context)
+        polished, finish_reason = await self._acomplete_with_reason(messages, config.POLISH_SECTION_MAX_TOKENS, use_cache)
+        if not self._is_truncated(text, polished, finish_reason):
+            return polished
+        
+        stats["truncated"] += 1
+        halves, separator = self._split_for_retry(text)
+        if halves is None:
+            stats["fallbacks"] += 1
+            print("片段润色结果不完整且无法继续切分，保留原文")
+            return text
+        stats["splits"] += 1
+        parts = await asyncio.gather(*[self._apolish_section(half, polish_type, context, use_cache, stats) for half in halves])
+        return separator.join(parts)
+    
+    def polish_section(self, text: str, polish_type: str = "blog", topic: str = None, headings: list = None,
+                       use_cache: bool = True, stats: dict = None) -> str:
+        """
+        润色长文中的单个片段，结果不完整时自动拆分重试
+        
+        与 polish_text 不同，请求失败时直接抛出异常，调用方可以区分润色结果和原文。
+        
+        Args:
+            text: 片段文本
+            polish_type: 润色类型
+            topic: 文章主题
+            headings: 片段所在的标题路径
+            use_cache: 是否读取缓存
+            stats: 可选的字典，累计 truncated、splits、fallbacks 统计
+        
+        Returns:
+            润色后的片段
+        """
+        context = {"topic": topic, "headings": headings or []}
+        section_stats = {"truncated": 0, "splits": 0, "fallbacks": 0}
+        polished = self._polish_section(text, polish_type, context, use_cache, section_stats)
+        if stats is not None:
+            for name, value in section_stats.items():
+                stats[name] = stats.get(name, 0) + value
+        return polished
+    
+    def _new_section_stats(self, plan: list) -> dict:
+        return {"sections": sum(1 for _, context in plan if context is not None), "truncated": 0, "splits": 0, "fallbacks": 0}
+    
+    def _report_sections(self, stats: dict, started: float):
+        print('[Metric] 分段润色：{}段，截断{}次，拆分重试{}次，保留原文{}次，总耗时{:.0f}毫秒'.format(
+            stats["sections"], stats["truncated"], stats["splits"], stats["fallbacks"], (time.time() - started) * 1000))
+    
+    def iter_polish_sections(self, original_text: str, polish_type: str = "blog", topic: str = None, use_cache: bool = True,
+                             stats: dict = None):
+        """
+        按标题和段落切分长文本并发润色，按原文顺序逐个产出润色后的片段
+        
+        Args:
+            original_text: 原始文本
+            polish_type: 润色类型
+            topic: 文章主题，作为上下文提供给模型
+            use_cache: 是否读取缓存
+            stats: 可选的字典，结束后包含 sections、truncated、splits、fallbacks 统计
+        
+        Yields:
+            润色后的片段（标题原样产出），片段之间应以两个换行拼接
+        """
+        plan = self._section_plan(original_text, topic)
+        section_stats = self._new_section_stats(plan)
+        started = time.time()
+        
+        executor = ThreadPoolExecutor(max_workers=config.POLISH_SECTION_WORKERS)
+        polish = metrics.bind(self._polish_section)
+        futures = [
+            None if context is None else executor.submit(polish, section["text"], polish_type, context, use_cache, section_stats)
+            for section, context in plan
+        ]
+        try:
+            for (section, _), future in zip(plan, futures):
+                yield section["text"] if future is None else future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        self._report_sections(section_stats, started)
+        if stats is not None:
+            stats.update(section_stats)
+    
+    def polish_long_text(self, original_text: str, polish_type: str = "blog", topic: str = None, use_cache: bool = True,
+                         stats: dict = None) -> str:
+        """
+        分段并发润色长文本，片段结果按原文顺序拼接
+        
+        每个片段单独请求，输出长度上限为 POLISH_SECTION_MAX_TOKENS；回复被截断或明显短于原文时，
+        该片段拆成两半重新润色，无法再拆分时保留原文，保证输出不会被静默截断。
+        
+        Args:
+            参数同 iter_polish_sections
+        
+        Returns:
+            润色后的完整文本
+        """
+        return "\n\n".join(self.iter_polish_sections(original_text, polish_type, topic, use_cache, stats))
+    
+    async def apolish_long_text(self, original_text: str, polish_type: str = "blog", topic: str = None, use_cache: bool = True,
+                                stats: dict = None) -> str:
+        """
+        polish_long_text 的异步版本，各片段在同一事件循环中并发请求
+        """
+        plan = self._section_plan(original_text, topic)
+        section_stats = self._new_section_stats(plan)
+        started = time.time()
+        
+        async def polish(section: dict, context: dict) -> str:
+            if context is None:
+                return section["text"]
+            return await self._apolish_section(section["text"], polish_type, context, use_cache, section_stats)
+        
+        parts = await asyncio.gather(*[polish(section, context) for section, context in plan])
+        self._report_sections(section_stats, started)
+        if stats is not None:
+            stats.update(section_stats)
+        return "\n\n".join(parts)
+    
+    def _blog_messages(self, topic: str, length: str) -> list:
+        """
+        构造博客生成请求的提示消息
         """
         # 根据长度设置生成要求
         length_map = {
@@ -82,7 +732,7 @@ class TextProcessor:
             "long": "约1000字以上"
         }
         
-        messages = [
+        return [
             {
                 "role": "system",
                 "content": "你是一位专业的博客作家，擅长根据主题生成高质量的博客内容。"
@@ -106,20 +756,226 @@ class TextProcessor:
             }
         ]
         
+    def generate_blog_from_topic(self, topic: str, length: str = "medium", use_cache: bool = True) -> str:
+        """
+        根据主题生成博客内容
+        
+        Args:
+            topic: 博客主题
+            length: 博客长度，可选值：short, medium, long
+            use_cache: 是否读取缓存，需要重新生成时传入False
+        
+        Returns:
+            生成的博客内容
+        
+        Raises:
+            LLMGenerationError: 请求失败或模型返回空内容，调用方不应继续润色或合成
+        """
+        messages = self._blog_messages(topic, length)
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
-            return response.choices[0].message.content.strip()
+            text = self._complete(messages, max_tokens=2000, use_cache=use_cache)
+        except Exception as e:
+            raise LLMGenerationError(f"无法生成关于'{topic}'的博客内容: {str(e)}") from e
+        return _require_text(text, f"无法生成关于'{topic}'的博客内容")
+    
+    async def agenerate_blog_from_topic(self, topic: str, length: str = "medium", use_cache: bool = True) -> str:
+        """
+        generate_blog_from_topic 的异步版本
+        """
+        messages = self._blog_messages(topic, length)
         
+        try:
+            text = await self._acomplete(messages, max_tokens=2000, use_cache=use_cache)
         except Exception as e:
-            print(f"博客生成失败: {str(e)}")
-            return f"无法生成关于'{topic}'的博客内容，请重试。"
+            raise LLMGenerationError(f"无法生成关于'{topic}'的博客内容: {str(e)}") from e
+        return _require_text(text, f"无法生成关于'{topic}'的博客内容")
 
+    def stream_generate_blog_from_topic(self, topic: str, length: str = "medium", stats: StreamStats = None, use_cache: bool = True):
+        """
+        流式生成博客内容，模型每生成一段内容就立即产出
+        
+        Args:
+            topic: 博客主题
+            length: 博客长度，可选值：short, medium, long
+            stats: 可选的统计对象，用于记录首token延迟和生成速度
+            use_cache: 是否读取缓存，需要重新生成时传入False
+        
+        Yields:
+            博客内容的增量
+        
+        Raises:
+            LLMGenerationError: 请求失败或模型没有生成任何内容
+        """
+        messages = self._blog_messages(topic, length)
+        produced = False
+        try:
+            for delta in self._stream_completion(messages, max_tokens=2000, stats=stats, use_cache=use_cache):
+                produced = produced or bool(delta.strip())
+                yield delta
+        except Exception as e:
+            raise LLMGenerationError(f"无法生成关于'{topic}'的博客内容: {str(e)}") from e
+        if not produced:
+            raise LLMGenerationError(f"无法生成关于'{topic}'的博客内容：模型返回了空内容")
+
+
+    def _outline_messages(self, topic: str, length: str) -> list:
+        """
+        构造大纲请求的提示消息
+        """
+        return [
+            {
+                "role": "system",
+                "content": "你是一位专业的博客作家，擅长为博客规划清晰的结构。"
+            },
+            {
+                "role": "user",
+                "content": f"""请为以下主题的博客（全文约{_OUTLINE_CHARS.get(length, _OUTLINE_CHARS["medium"])}字）列出大纲：
+
+主题：{topic}
+
+要求：
+1. 包含标题、引言要点、{config.OUTLINE_SECTIONS}个正文章节和结论要点
+2. 每个正文章节给出小标题和一句话的内容要点，章节之间不要重复
+3. 只输出JSON，不要输出其他内容，格式如下：
+{{"title": "博客标题", "intro": "引言要点", "sections": [{{"heading": "章节小标题", "points": "内容要点"}}], "conclusion": "结论要点"}}
+
+大纲：
+"""
+            }
+        ]
+    
+    def generate_outline(self, topic: str, length: str = "long", use_cache: bool = True) -> dict:
+        """
+        生成博客大纲
+        
+        Args:
+            topic: 博客主题
+            length: 博客长度
+            use_cache: 是否读取缓存
+        
+        Returns:
+            parse_outline 返回的大纲
+        
+        Raises:
+            请求失败时的异常；回复无法解析为大纲时抛出 ValueError
+        """
+        text = self._complete(self._outline_messages(topic, length), config.OUTLINE_MAX_TOKENS, use_cache)
+        return parse_outline(text, topic)
+    
+    async def agenerate_outline(self, topic: str, length: str = "long", use_cache: bool = True) -> dict:
+        """
+        generate_outline 的异步版本
+        """
+        text = await self._acomplete(self._outline_messages(topic, length), config.OUTLINE_MAX_TOKENS, use_cache)
+        return parse_outline(text, topic)
+    
+    @staticmethod
+    def outline_parts(outline: dict) -> list:
+        """
+        大纲中需要分别生成的部分：引言、各正文章节、结论
+        
+        Returns:
+            [{"kind": intro/section/conclusion, "heading": 小标题, "points": 内容要点}]
+        """
+        return (
+            [{"kind": "intro", "heading": "引言", "points": outline["intro"]}]
+            + [{"kind": "section", **section} for section in outline["sections"]]
+            + [{"kind": "conclusion", "heading": "结语", "points": outline["conclusion"]}]
+        )
+    
+    def _outline_section_messages(self, topic: str, outline: dict, index: int, length: str) -> list:
+        """
+        构造大纲中单个部分的生成请求，附带完整大纲保证各部分衔接
+        """
+        parts = self.outline_parts(outline)
+        part = parts[index]
+        total = _OUTLINE_CHARS.get(length, _OUTLINE_CHARS["medium"])
+        chars = total // 8 if part["kind"] != "section" else total * 3 // 4 // max(len(parts) - 2, 1)
+        outline_text = "\n".join(
+            f"{i}. {p['heading']}：{p['points']}" if p["points"] else f"{i}. {p['heading']}" for i, p in enumerate(parts, 1)
+        )
+        
+        return [
+            {
+                "role": "system",
+                "content": "你是一位专业的博客作家，擅长根据主题生成高质量的博客内容。"
+            },
+            {
+                "role": "user",
+                "content": f"""你正在撰写一篇博客中的一部分，请只写这一部分的正文。
+
+主题：{topic}
+博客标题：{outline['title']}
+完整大纲：
+{outline_text}
+
+本部分：{part['heading']}{'（' + part['points'] + '）' if part['points'] else ''}
+篇幅：约{chars}字
+
+要求：
+1. 语言流畅自然，符合中文表达习惯
+2. 紧扣本部分的要点，不要重复其他部分的内容
+3. 不要输出标题，不要写开场白或总结其他部分
+
+正文：
+"""
+            }
+        ]
+    
+    def generate_outline_section(self, topic: str, outline: dict, index: int, length: str = "long",
+                                 use_cache: bool = True) -> str:
+        """
+        生成大纲中的一个部分，各部分互不依赖，可以并发生成
+        
+        Args:
+            topic: 博客主题
+            outline: generate_outline 返回的大纲
+            index: outline_parts(outline) 中的序号
+            length: 博客长度
+            use_cache: 是否读取缓存
+        
+        Returns:
+            该部分的正文
+        
+        Raises:
+            LLMGenerationError: 请求失败或模型返回空内容
+        """
+        messages = self._outline_section_messages(topic, outline, index, length)
+        heading = self.outline_parts(outline)[index]["heading"]
+        try:
+            text = self._complete(messages, config.OUTLINE_SECTION_MAX_TOKENS, use_cache)
+        except Exception as e:
+            raise LLMGenerationError(f"无法生成“{heading}”部分: {str(e)}") from e
+        return _require_text(text, f"无法生成“{heading}”部分")
+    
+    async def agenerate_outline_section(self, topic: str, outline: dict, index: int, length: str = "long",
+                                        use_cache: bool = True) -> str:
+        """
+        generate_outline_section 的异步版本
+        """
+        messages = self._outline_section_messages(topic, outline, index, length)
+        heading = self.outline_parts(outline)[index]["heading"]
+        try:
+            text = await self._acomplete(messages, config.OUTLINE_SECTION_MAX_TOKENS, use_cache)
+        except Exception as e:
+            raise LLMGenerationError(f"无法生成“{heading}”部分: {str(e)}") from e
+        return _require_text(text, f"无法生成“{heading}”部分")
+    
+    def assemble_outline(self, outline: dict, texts: list) -> str:
+        """
+        按大纲顺序拼接各部分：标题、引言、带小标题的正文章节和结语
+        
+        Args:
+            outline: 大纲
+            texts: 与 outline_parts(outline) 一一对应的正文
+        """
+        blocks = [f"# {outline['title']}"]
+        for part, text in zip(self.outline_parts(outline), texts):
+            if part["kind"] != "intro":
+                blocks.append(f"## {part['heading']}")
+            blocks.append(text)
+        return "\n\n".join(blocks)
 
 if __name__ == "__main__":
     processor = TextProcessor()
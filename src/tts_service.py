@@ -1,13 +1,87 @@
 import os
+import time
+import shutil
+import asyncio
+import hashlib
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 import dashscope
-from dashscope.audio.tts_v2 import SpeechSynthesizer
-from dotenv import load_dotenv
+from dashscope.audio.tts_v2 import SpeechSynthesizer, ResultCallback, AudioFormat
+import src.config as config
+import src.metrics as metrics
+import src.resilience as resilience
+from src.singleflight import get_group
+from src.text_chunking import chunk_text
+from src.audio_utils import AudioStitcher, audio_duration, file_extension
+from src.artifacts import atomic_write
+from src.cache import AudioCache, request_key, shared_audio_cache
+
+
+def parse_audio_format(value) -> AudioFormat:
+    """
+    解析合成器输出格式
+    
+    Args:
+        value: AudioFormat 或其成员名（不区分大小写），如 "MP3_22050HZ_MONO_256KBPS"
+    
+    Raises:
+        ValueError: 不支持的格式
+    """
+    if isinstance(value, AudioFormat):
+        return value
+    try:
+        return AudioFormat[str(value).strip().upper()]
+    except KeyError:
+        raise ValueError(f"不支持的音频格式：{value}，可选值：{', '.join(f.name for f in AudioFormat)}") from None
+
+
+class StreamingCallback(ResultCallback):
+    """
+    流式合成回调：每收到一个音频分片就交给 sink 处理
+    """
+    
+    def __init__(self, sink):
+        self.sink = sink
+        self.done = threading.Event()
+        self.error = None
+        self.bytes_received = 0
+        self.started_at = time.time()
+        self.first_chunk_at = None
+    
+    def on_data(self, data: bytes) -> None:
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.time()
+        try:
+            self.sink(data)
+            self.bytes_received += len(data)
+        except Exception as e:
+            # sink 写入失败时记录错误并结束等待，避免调用方一直阻塞
+            self.error = f"写入音频分片失败: {str(e)}"
+            self.done.set()
+    
+    def on_complete(self) -> None:
+        self.done.set()
+    
+    def on_error(self, message) -> None:
+        self.error = str(message)
+        self.done.set()
+    
+    def on_close(self) -> None:
+        self.done.set()
+    
+    def first_byte_delay(self):
+        """
+        首字节延迟（毫秒），尚未收到数据时返回None
+        """
+        if self.first_chunk_at is None:
+            return None
+        return (self.first_chunk_at - self.started_at) * 1000
 
-# 加载环境变量
-load_dotenv()
 
 class TTSService:
-    def __init__(self):
+    def __init__(self, synthesizer_factory=None, chunk_size: int = None, max_workers: int = None, max_concurrency: int = None,
+                 cache: AudioCache = None, audio_format=None):
         # 配置dashscope API
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
         dashscope.api_key = self.api_key
@@ -15,28 +89,125 @@ class TTSService:
         # 设置模型和音色
         self.model = os.getenv("DASHSCOPE_MODEL", "cosyvoice-v2")
         self.voice = os.getenv("DASHSCOPE_VOICE", "longxiaochun_v2")
+        # 合成器输出格式（编码、采样率），与模型、音色一起决定音频缓存键；默认读取 config.TTS_AUDIO_FORMAT
+        self.audio_format = parse_audio_format(audio_format or config.TTS_AUDIO_FORMAT)
+        # 与实际音频内容一致的文件扩展名
+        self.extension = file_extension(self.audio_format)
     
-    def text_to_speech(self, text: str, output_file: str = "output.mp3") -> bool:
+        # 合成器工厂，默认使用dashscope的SpeechSynthesizer，可替换为本地模拟实现
+        self.synthesizer_factory = synthesizer_factory or SpeechSynthesizer
+        
+        # 分段并行合成策略，0 表示不分段
+        if chunk_size is None:
+            chunk_size = config.TTS_CHUNK_SIZE if config.TTS_CHUNKING else 0
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or config.TTS_MAX_WORKERS
+        
+        # 限制同时发往语音合成服务的请求数，None 表示不限制
+        self.limiter = threading.BoundedSemaphore(max_concurrency) if max_concurrency else nullcontext()
+        self.max_concurrency = max_concurrency
+        self._async_limiter = None
+        # 进程内共享的语音合成服务调用入口：重试、限流和熔断
+        self.backend = resilience.get_backend("tts")
+        # 同时发起的相同合成请求只调用一次语音合成服务
+        self.flight = get_group("tts")
+    
+        # 音频缓存，默认按 config.TTS_CACHE_* 配置创建
+        if cache is None and config.TTS_CACHE_ENABLED:
+            cache = shared_audio_cache()
+        self.cache = cache
+    
+    def audio_key(self, text: str) -> str:
+        """
+        音频缓存键：文本哈希 + 模型 + 音色 + 格式
+        """
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return request_key(text_hash=text_hash, model=self.model, voice=self.voice, format=self.audio_format.name)
+    
+    def _record_synthesis(self, mode: str, synthesizer, started: float, audio: bytes = None, size: int = None,
+                          retries: int = 0, first_byte_ms: float = None):
+        """
+        上报一次语音合成请求的首包延迟、音频大小和时长
+        """
+        metrics.record(
+            "tts",
+            mode=mode,
+            cached=False,
+            first_package_delay_ms=synthesizer.get_first_package_delay(),
+            first_byte_ms=round(first_byte_ms, 3) if first_byte_ms is not None else None,
+            bytes=len(audio) if audio is not None else size,
+            audio_seconds=audio_duration(audio, self.audio_format) if audio else None,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+            retries=retries
+        )
+    
+    def text_to_speech(self, text: str, output_file: str = None, stream: bool = None, use_cache: bool = True) -> bool:
         """
         将文本转换为语音并保存到文件
         
         Args:
             text: 要转换的文本
-            output_file: 输出音频文件路径
+            output_file: 输出音频文件路径，扩展名应与 self.extension 一致，默认为 output<扩展名>
+            stream: 是否使用流式合成，默认读取 config.TTS_STREAMING
+            use_cache: 是否读取音频缓存，需要重新合成时传入False
             
         Returns:
             成功返回True，失败返回False
         """
+        output_file = output_file or f"output{self.extension}"
+        if os.path.splitext(output_file)[1].lower() != self.extension:
+            print(f"警告：音频格式为 {self.audio_format.name}，输出文件 {output_file} 的扩展名应为 {self.extension}")
+        key = self.audio_key(text) if self.cache is not None else None
+        if key is not None and use_cache and self.cache.fetch(key, output_file):
+            print(f"命中音频缓存，音频文件已保存至: {output_file}")
+            metrics.record("tts", mode="file", cached=True, bytes=os.path.getsize(output_file))
+            return True
+        
+        def synthesize():
+            success = self._text_to_speech(text, output_file, stream, use_cache)
+            if success and key is not None:
+                self.cache.put_file(key, output_file)
+            return output_file if success else None
+        
+        # 并发的相同文本只合成一次，其他调用方复制合成好的文件；结果是文件路径，与 synthesize_chunk 的字节结果分开合并
+        produced = self.flight.do("file:" + self.audio_key(text), synthesize)
+        if produced is None:
+            return False
+        if produced != output_file:
+            atomic_write(output_file, lambda tmp: shutil.copyfile(produced, tmp))
+            print(f"与进行中的相同请求合并，音频文件已保存至: {output_file}")
+        return True
+    
+    def _text_to_speech(self, text: str, output_file: str, stream: bool = None, use_cache: bool = True) -> bool:
+        """
+        按配置选择分段并行、流式或整段合成
+        """
+        if stream is None:
+            stream = config.TTS_STREAMING
+        if self.chunk_size and len(text) > self.chunk_size:
+            return self.chunked_text_to_speech(text, output_file, use_cache)
+        if stream:
+            return self.stream_to_file(text, output_file)
+        
         try:
-            # 每次调用时创建新的SpeechSynthesizer实例
-            synthesizer = SpeechSynthesizer(model=self.model, voice=self.voice)
+            def request():
+                # 每次调用时创建新的SpeechSynthesizer实例
+                synthesizer = self.synthesizer_factory(model=self.model, voice=self.voice, format=self.audio_format)
             
-            # 调用dashscope API进行语音合成
-            audio = synthesizer.call(text)
+                # 调用dashscope API进行语音合成
+                audio = synthesizer.call(text)
+                if not audio:
+                    raise RuntimeError("未返回音频数据")
+                return synthesizer, audio
+            
+            started = time.perf_counter()
+            # 先取得本服务的并发名额再进入调度器排队，等待名额时不占用调度器的名额
+            synthesizer, audio = self.backend.call(request, limiter=self.limiter)
+            self._record_synthesis("single", synthesizer, started, audio)
             
-            # 保存音频文件
-            with open(output_file, "wb") as f:
-                f.write(audio)
+            # 保存音频文件（PCM 封装为 WAV）
+            with AudioStitcher(output_file, self.audio_format) as stitcher:
+                stitcher.append(audio)
             
             # 打印首包延迟信息
             print('[Metric] requestId为：{}，首包延迟为：{}毫秒'.format(
@@ -50,6 +221,172 @@ class TTSService:
             print(f"语音合成失败: {str(e)}")
             return False
     
+    async def atext_to_speech(self, text: str, output_file: str = None, stream: bool = None, use_cache: bool = True) -> bool:
+        """
+        text_to_speech 的异步版本
+        
+        dashscope 合成器基于线程和 WebSocket 回调实现，这里在线程池中执行同步调用；
+        等待并发名额时不占用线程，大量任务排队也不会耗尽线程池。
+        """
+        if self._async_limiter is None:
+            self._async_limiter = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else nullcontext()
+        async with self._async_limiter:
+            return await asyncio.to_thread(self.text_to_speech, text, output_file, stream, use_cache)
+    
+    def stream_to_sink(self, text: str, sink, timeout: float = None) -> int:
+        """
+        流式合成语音，音频分片到达后立即交给 sink 处理
+        
+        Args:
+            text: 要转换的文本
+            sink: 接收音频分片的可调用对象，签名为 sink(data: bytes)
+            timeout: 等待合成完成的超时时间（秒），默认读取 config.TTS_STREAM_TIMEOUT
+        
+        Returns:
+            收到的音频字节数
+        
+        Raises:
+            RuntimeError: 合成失败或超时
+        """
+        if timeout is None:
+            timeout = config.TTS_STREAM_TIMEOUT
+        timeout = resilience.clamp_timeout(timeout)
+        
+        callback = StreamingCallback(sink)
+        synthesizer = self.synthesizer_factory(model=self.model, voice=self.voice, format=self.audio_format,
+                                               callback=callback)
+        
+        def request():
+            # 设置回调后 call 立即返回，音频通过 on_data 推送
+            synthesizer.call(text)
+            finished = callback.done.wait(timeout)
+            
+            if not finished:
+                raise RuntimeError(f"流式语音合成超时（{timeout:.0f}秒）")
+            if callback.error:
+                raise RuntimeError(callback.error)
+        
+        # 音频分片已经交给 sink，失败后不能透明重试，只参与熔断统计
+        started = time.perf_counter()
+        self.backend.call(request, retries=0, limiter=self.limiter)
+        self._record_synthesis("stream", synthesizer, started, size=callback.bytes_received,
+                               first_byte_ms=callback.first_byte_delay())
+        
+        print('[Metric] requestId为：{}，首包延迟为：{}毫秒，首字节落盘延迟为：{}毫秒，音频大小：{}字节'.format(
+            synthesizer.get_last_request_id(),
+            synthesizer.get_first_package_delay(),
+            callback.first_byte_delay(),
+            callback.bytes_received))
+        
+        return callback.bytes_received
+    
+    def stream_to_file(self, text: str, output_file: str = "output.mp3") -> bool:
+        """
+        流式合成语音并边接收边写入文件
+        
+        Args:
+            text: 要转换的文本
+            output_file: 输出音频文件路径
+        
+        Returns:
+            成功返回True，失败返回False
+        """
+        try:
+            # 边接收边写入临时文件，合成完成后才重命名为 output_file，失败时不会留下写了一半的音频
+            with AudioStitcher(output_file, self.audio_format) as stitcher:
+                self.stream_to_sink(text, stitcher.write)
+            
+            print(f"语音合成成功，音频文件已保存至: {output_file}")
+            return True
+        
+        except Exception as e:
+            print(f"语音合成失败: {str(e)}")
+            return False
+    
+    def synthesize_chunk(self, text: str, use_cache: bool = True) -> bytes:
+        """
+        合成单个文本片段，失败时按 resilience 层的策略（指数退避+随机抖动）单独重试
+        
+        Args:
+            text: 文本片段
+            use_cache: 是否读取音频缓存
+        
+        Returns:
+            该片段的完整音频数据
+        """
+        key = self.audio_key(text) if self.cache is not None else None
+        if key is not None and use_cache:
+            cached = self.cache.get_bytes(key)
+            if cached is not None:
+                metrics.record("tts", mode="chunk", cached=True, bytes=len(cached),
+                               audio_seconds=audio_duration(cached, self.audio_format))
+                return cached
+        
+        attempts = 0
+        
+        def request():
+            nonlocal attempts
+            attempts += 1
+            synthesizer = self.synthesizer_factory(model=self.model, voice=self.voice, format=self.audio_format)
+            audio = synthesizer.call(text)
+            if not audio:
+                raise RuntimeError("未返回音频数据")
+            return synthesizer, audio
+        
+        def synthesize():
+            started = time.perf_counter()
+            try:
+                synthesizer, audio = self.backend.call(request, limiter=self.limiter)
+            except Exception:
+                metrics.record("tts", mode="chunk", cached=False, error=True, retries=max(attempts - 1, 0))
+                raise
+            self._record_synthesis("chunk", synthesizer, started, audio, retries=attempts - 1)
+            if key is not None:
+                self.cache.put_bytes(key, audio)
+            return audio
+        
+        return self.flight.do("chunk:" + self.audio_key(text), synthesize)
+    
+    def chunked_text_to_speech(self, text: str, output_file: str = "output.mp3", use_cache: bool = True) -> bool:
+        """
+        将长文本按句子和段落切分后并发合成，并按原文顺序拼接为一个音频文件
+        
+        Args:
+            text: 要转换的文本
+            output_file: 输出音频文件路径
+            use_cache: 是否读取片段级音频缓存
+        
+        Returns:
+            成功返回True，失败返回False
+        """
+        chunks = chunk_text(text, self.chunk_size)
+        started = time.time()
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        synthesize = metrics.bind(self.synthesize_chunk)
+        futures = [executor.submit(synthesize, chunk, use_cache) for chunk in chunks]
+        try:
+            # 按顺序等待结果，前面的片段一完成就写入文件，写入后立即释放该片段
+            with AudioStitcher(output_file, self.audio_format) as stitcher:
+                for i, future in enumerate(futures):
+                    stitcher.append(future.result())
+                    futures[i] = None
+            
+            print('[Metric] 分段合成：{}段，并发数{}，总耗时{:.0f}毫秒，音频大小：{}字节'.format(
+                len(chunks), self.max_workers, (time.time() - started) * 1000, stitcher.bytes_written))
+            print(f"语音合成成功，音频文件已保存至: {output_file}")
+            return True
+        
+        except Exception as e:
+            print(f"语音合成失败: {str(e)}")
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+            return False
+        
+        finally:
+            executor.shutdown(wait=False)
+    
     def batch_text_to_speech(self, text_list: list, output_dir: str = "output") -> list:
         """
         批量将文本转换为语音
@@ -67,7 +404,7 @@ class TTSService:
         output_files = []
         
         for i, text in enumerate(text_list):
-            output_file = os.path.join(output_dir, f"audio_{i+1}.mp3")
+            output_file = os.path.join(output_dir, f"audio_{i+1}{self.extension}")
             if self.text_to_speech(text, output_file):
                 output_files.append(output_file)
         
@@ -0,0 +1,93 @@
+import time
+import asyncio
+import threading
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.batch import BatchRunner
+from langgraph.workflow import BlogWorkflow
+from src.cache import LLMCache
+from src.text_processing import TextProcessor
+from src.tts_service import TTSService
+from benchmarks.stubs import StubLLMServer, FakeSpeechSynthesizer
+
+
+class RecordingWorkflow:
+    """
+    记录执行过哪些线程ID、以及同一线程ID是否被并发执行的工作流替身
+    """
+
+    def __init__(self):
+        self.text_processor = type("TextProcessor", (), {"cache": None})()
+        self.runs = []
+        self.active = set()
+        self.overlapped = False
+        self._lock = threading.Lock()
+
+    def _enter(self, thread_id: str):
+        with self._lock:
+            self.runs.append(thread_id)
+            self.overlapped |= thread_id in self.active
+            self.active.add(thread_id)
+
+    def _exit(self, thread_id: str, job: dict) -> dict:
+        with self._lock:
+            self.active.discard(thread_id)
+        return {"metadata": {}, "job_id": thread_id, "blog_file": f"{job['topic']}.md", "audio_file": None}
+
+    def run(self, job: dict, thread_id: str, resume: bool) -> dict:
+        self._enter(thread_id)
+        time.sleep(0.05)
+        return self._exit(thread_id, job)
+
+    async def arun(self, job: dict, thread_id: str, resume: bool) -> dict:
+        self._enter(thread_id)
+        await asyncio.sleep(0.05)
+        return self._exit(thread_id, job)
+
+
+JOBS = [
+    {"topic": "a", "length": "short", "with_tts": False},
+    {"topic": "b", "length": "short", "with_tts": False},
+    {"topic": "a", "length": "short", "with_tts": False},
+]
+
+
+def _check(report: dict, workflow: RecordingWorkflow):
+    assert len(workflow.runs) == 2
+    assert not workflow.overlapped
+    assert [job["status"] for job in report["jobs"]] == ["succeeded", "succeeded", "skipped"]
+    assert report["jobs"][2]["duplicate_of"] == 0
+    assert report["jobs"][2]["blog_file"] == report["jobs"][0]["blog_file"]
+    assert (report["succeeded"], report["skipped"], report["failed"]) == (2, 1, 0)
+
+
+def test_run_executes_identical_jobs_once():
+    workflow = RecordingWorkflow()
+    report = BatchRunner(max_jobs=3, workflow=workflow).run(JOBS)
+    _check(report, workflow)
+
+
+def test_arun_executes_identical_jobs_once():
+    workflow = RecordingWorkflow()
+    report = asyncio.run(BatchRunner(max_jobs=3, workflow=workflow).arun(JOBS))
+    _check(report, workflow)
+
+
+def test_use_cache_false_regenerates_completed_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    job = {"topic": "缓存", "length": "short", "with_tts": False, "polish_type": "blog", "mode": "sequential"}
+    with StubLLMServer(first_token_delay=0, tokens_per_second=100000) as server:
+        text_processor = TextProcessor(base_url=server.base_url, cache=LLMCache(str(tmp_path / "llm.sqlite")),
+                                       health_check="off")
+        workflow = BlogWorkflow(text_processor, TTSService(synthesizer_factory=FakeSpeechSynthesizer),
+                                checkpointer=InMemorySaver())
+        first = BatchRunner(max_jobs=1, workflow=workflow).run([job])
+        requests = server.request_count
+        again = BatchRunner(max_jobs=1, workflow=workflow).run([job])
+        fresh = BatchRunner(max_jobs=1, workflow=workflow).run([{**job, "use_cache": False}])
+
+    assert first["jobs"][0]["status"] == "succeeded"
+    assert again["jobs"][0]["status"] == "skipped"
+    # 不使用缓存时不沿用已完成的检查点，重新请求模型并写入新的输出目录
+    assert fresh["jobs"][0]["status"] == "succeeded"
+    assert server.request_count == requests * 2
+    assert fresh["jobs"][0]["blog_file"] != first["jobs"][0]["blog_file"]
@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+from conftest import ROOT
+
+# 用替换后的 load_dotenv 模拟 .env 中的配置，检查 src.config 读取配置之前已经加载 .env
+_SCRIPT = """
+import os
+import dotenv
+
+def fake_load_dotenv(*args, **kwargs):
+    os.environ.setdefault("TTS_CHUNK_SIZE", "123")
+    os.environ.setdefault("TTS_STREAMING", "true")
+    return True
+
+dotenv.load_dotenv = fake_load_dotenv
+import src.config as config
+print(config.TTS_CHUNK_SIZE, config.TTS_STREAMING)
+"""
+
+
+def test_config_reads_dotenv_before_getenv():
+    env = {k: v for k, v in os.environ.items() if k not in ("TTS_CHUNK_SIZE", "TTS_STREAMING")}
+    output = subprocess.run([sys.executable, "-c", _SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["123", "True"]
+
+
+def test_incremental_reprocessing_is_opt_in():
+    # 未设置 BLOG_INCREMENTAL 时处理已有博客仍整篇润色，不改变菜单和目录批量处理的输出
+    script = "import dotenv\ndotenv.load_dotenv = lambda *a, **k: False\nimport src.config as config\nprint(config.BLOG_INCREMENTAL)"
+    env = {k: v for k, v in os.environ.items() if k != "BLOG_INCREMENTAL"}
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["False"]
+
+
+def test_auto_polish_keeps_medium_blogs_whole():
+    # 默认配置下 medium 长度（约500-800字）的博客整篇润色，只有更长的文本才分段
+    script = ("import dotenv\ndotenv.load_dotenv = lambda *a, **k: False\n"
+              "from src.text_processing import TextProcessor\n"
+              "print(TextProcessor._use_sections(None, '字' * 800), TextProcessor._use_sections(None, '字' * 3000))")
+    env = {k: v for k, v in os.environ.items() if not k.startswith("POLISH_")}
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.split()[-2:] == ["False", "True"]
@@ -0,0 +1,19 @@
+from src.cache import LLMCache
+from src.text_processing import TextProcessor
+from benchmarks.stubs import StubLLMServer
+
+MESSAGES = [{"role": "user", "content": "写一段关于缓存的文字"}]
+
+
+def test_use_cache_false_skips_read_but_refreshes_entry(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm_cache.sqlite"))
+    with StubLLMServer(first_token_delay=0, tokens_per_second=100000) as server:
+        processor = TextProcessor(base_url=server.base_url, cache=cache, health_check="off")
+        fresh = processor._complete(MESSAGES, 200)
+        key = processor._cache_key(MESSAGES, 200)
+        assert cache.get(key) == fresh
+
+        cache.set(key, "过期的回复")
+        assert processor._complete(MESSAGES, 200) == "过期的回复"
+        assert processor._complete(MESSAGES, 200, use_cache=False) == fresh
+        assert cache.get(key) == fresh
@@ -0,0 +1,34 @@
+from src.pipeline import ParagraphPipeline
+
+
+class StubTextProcessor:
+    def __init__(self):
+        self.calls = []
+
+    def polish_text(self, text: str, polish_type: str, use_cache: bool = True) -> str:
+        self.calls.append(use_cache)
+        return text
+
+
+class StubTTSService:
+    max_workers = 2
+    chunk_size = 0
+    audio_format = None
+
+    def __init__(self):
+        self.calls = []
+
+    def synthesize_chunk(self, text: str, use_cache: bool = True) -> bytes:
+        self.calls.append(use_cache)
+        return text.encode("utf-8")
+
+
+def test_use_cache_false_reaches_polish_and_tts(tmp_path):
+    text_processor, tts_service = StubTextProcessor(), StubTTSService()
+    pipeline = ParagraphPipeline(text_processor, tts_service, use_cache=False)
+    pipeline.feed("第一段。\n\n第二段。")
+    result = pipeline.finish(str(tmp_path / "audio.mp3"))
+
+    assert result["polished_text"] == "第一段。\n\n第二段。"
+    assert text_processor.calls == [False, False]
+    assert tts_service.calls == [False, False]
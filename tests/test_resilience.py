@@ -0,0 +1,77 @@
+import time
+import asyncio
+import threading
+import pytest
+import src.resilience as resilience
+
+
+def _fail():
+    raise RuntimeError("服务不可用")
+
+
+def _open_breaker(backend: resilience.Backend):
+    with pytest.raises(RuntimeError):
+        backend.call(_fail)
+    assert backend.breaker.state == "open"
+    time.sleep(backend.breaker.reset_timeout * 2)
+
+
+def test_breaker_recovers_after_successful_probe():
+    backend = resilience.Backend("test", max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    _open_breaker(backend)
+    assert backend.call(lambda: "ok") == "ok"
+    assert backend.breaker.state == "closed"
+
+
+def test_breaker_reopens_after_failed_probe():
+    backend = resilience.Backend("test", max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    _open_breaker(backend)
+    with pytest.raises(RuntimeError):
+        backend.call(_fail)
+    assert backend.breaker.state == "open"
+    with pytest.raises(resilience.CircuitOpenError):
+        backend.call(lambda: "ok")
+
+
+def test_cancelled_probe_releases_half_open_breaker():
+    backend = resilience.Backend("test", max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    _open_breaker(backend)
+
+    async def main():
+        probe = asyncio.create_task(backend.acall(asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+
+        return await backend.acall(ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert backend.breaker.state == "closed"
+
+
+def test_probe_timing_out_in_queue_releases_half_open_breaker():
+    backend = resilience.Backend("test", max_retries=0, failure_threshold=1, reset_timeout=0.05, max_concurrency=1)
+    _open_breaker(backend)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_slot():
+        with backend.scheduler.slot():
+            holding.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    holding.wait(5)
+    try:
+        with resilience.deadline(0.05):
+            with pytest.raises(resilience.DeadlineExceeded):
+                backend.call(lambda: "ok")
+    finally:
+        release.set()
+        holder.join(5)
+    assert backend.call(lambda: "ok") == "ok"
+    assert backend.breaker.state == "closed"
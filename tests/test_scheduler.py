@@ -0,0 +1,54 @@
+import time
+import asyncio
+import threading
+import src.resilience as resilience
+import src.scheduler as scheduler
+
+
+def test_client_limiter_is_taken_before_queueing():
+    backend = resilience.Backend("test", max_retries=0, max_concurrency=1)
+    # 批量请求所在客户端的并发名额已被占满
+    limiter = threading.BoundedSemaphore(1)
+    limiter.acquire()
+    results = []
+
+    def batch():
+        with scheduler.scheduling("batch"):
+            results.append(backend.call(lambda: "batch", limiter=limiter))
+
+    thread = threading.Thread(target=batch)
+    thread.start()
+    time.sleep(0.05)
+    # 等待客户端名额的批量请求不占用调度器名额，交互请求可以立即执行
+    assert backend.scheduler.inflight == 0
+    with scheduler.scheduling("interactive"):
+        assert backend.call(lambda: "interactive", retries=0) == "interactive"
+
+    limiter.release()
+    thread.join(5)
+    assert results == ["batch"]
+
+
+def test_async_waiter_is_woken_by_release():
+    sched = scheduler.Scheduler("test", max_concurrency=1)
+    held = sched.acquire()
+    checks = 0
+    try_grant = sched._try_grant
+
+    def counting_try_grant(ticket):
+        nonlocal checks
+        checks += 1
+        return try_grant(ticket)
+
+    sched._try_grant = counting_try_grant
+
+    async def main():
+        threading.Timer(0.3, sched.release, args=(held,)).start()
+        started = time.monotonic()
+        ticket = await sched.aacquire(timeout=5)
+        sched.release(ticket)
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) < 1
+    # 等待期间不轮询：第一次检查未放行，归还名额后被唤醒再检查一次
+    assert checks <= 3
@@ -0,0 +1,51 @@
+import json
+import asyncio
+from langgraph.service import BlogService, create_app
+
+
+class StubService(BlogService):
+    """
+    不创建工作流的服务替身，记录提交的任务
+    """
+
+    def __init__(self):
+        super().__init__(workflow=object())
+        self.submitted = []
+
+    async def submit(self, job_config: dict):
+        self.submitted.append(job_config)
+        raise AssertionError("超限的请求不应提交")
+
+
+def _post(app, chunks: list, headers: list = None) -> tuple:
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    received, sent = iter(messages), []
+
+    async def receive():
+        return next(received)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/jobs", "headers": headers or []}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"]), sum(1 for _ in received)
+
+
+def test_oversized_body_is_rejected_while_reading():
+    service = StubService()
+    app = create_app(service)
+    # 没有 Content-Length 的分块请求：超过上限后停止读取剩余部分
+    status, payload, unread = _post(app, [b" " * 32 * 1024] * 8)
+    assert status == 413
+    assert "请求体" in payload["error"]
+    assert unread > 0
+    assert service.submitted == []
+
+
+def test_oversized_content_length_is_rejected_before_reading():
+    service = StubService()
+    status, _, unread = _post(create_app(service), [b"{}"], [(b"content-length", str(1024 * 1024).encode())])
+    assert status == 413
+    assert unread == 1
@@ -0,0 +1,80 @@
+import time
+import asyncio
+import threading
+import src.config as config
+from src.singleflight import SingleFlight
+from src.tts_service import TTSService
+from benchmarks.stubs import make_fake_synthesizer_factory
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    follower.start()
+    deadline = time.time() + 5
+    while flight.coalesced == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert results == ["result", "result"]
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.ado("key", work))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(flight.ado("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return results
+
+    assert asyncio.run(main()) == ["result", "result"]
+    # 第一次请求随 leader 取消，等待者中的一个重新发起请求
+    assert len(calls) == 2
+
+
+def test_file_and_chunk_results_are_coalesced_separately(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TTS_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "TTS_STREAMING", False)
+    factory = make_fake_synthesizer_factory(first_package_delay=0.2, chunk_delay=0)
+    service = TTSService(synthesizer_factory=factory)
+    text = "同一段文本同时按文件和按片段合成。"
+    output_file = str(tmp_path / f"out{service.extension}")
+    results = {}
+
+    file_thread = threading.Thread(target=lambda: results.update(file=service.text_to_speech(text, output_file)))
+    chunk_thread = threading.Thread(target=lambda: results.update(chunk=service.synthesize_chunk(text)))
+    file_thread.start()
+    chunk_thread.start()
+    file_thread.join(10)
+    chunk_thread.join(10)
+
+    assert results["file"] is True
+    assert isinstance(results["chunk"], bytes) and results["chunk"]
+    with open(output_file, "rb") as f:
+        assert f.read() == results["chunk"]
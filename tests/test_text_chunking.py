@@ -0,0 +1,20 @@
+from src.text_chunking import chunk_text, split_sentences
+
+
+def test_english_sentences_are_not_cut_mid_word():
+    text = "Hello world. This is a test. Another sentence here. And one more."
+    assert chunk_text(text, 30) == ["Hello world. This is a test.", "Another sentence here.", "And one more."]
+
+
+def test_spacing_between_sentences_is_kept():
+    assert chunk_text("Hello! How are you? Fine; thanks.", 300) == ["Hello! How are you? Fine; thanks."]
+    assert "".join(split_sentences("Pi is 3.14. Really? 是的。")) == "Pi is 3.14. Really? 是的。"
+    # 小数点后不是空白，不作为句末
+    assert split_sentences("Version 1.5 is out.") == ["Version 1.5 is out."]
+
+
+def test_long_sentence_breaks_at_whitespace_or_comma():
+    assert chunk_text("aaaaaaaaaa " + "b" * 12, 20) == ["aaaaaaaaaa", "b" * 12]
+    assert chunk_text("一二三四五六七，八九十一二三", 10) == ["一二三四五六七，", "八九十一二三"]
+    # 没有空白和逗号时仍按字符硬切
+    assert chunk_text("x" * 25, 10) == ["x" * 10, "x" * 10, "x" * 5]
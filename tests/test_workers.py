@@ -0,0 +1,52 @@
+import os
+import asyncio
+from langgraph.workers import ProcessBatchRunner
+
+CRASH_TOPIC = "crash"
+
+
+class _StubTextProcessor:
+    cache = None
+
+    def _ensure_connection(self):
+        pass
+
+
+class StubWorkflow:
+    """
+    不调用后端的工作流替身；标题为 CRASH_TOPIC 的任务一开始执行就结束工作进程
+    """
+    text_processor = _StubTextProcessor()
+
+    def run(self, job: dict, thread_id: str, resume: bool) -> dict:
+        if job["topic"] == CRASH_TOPIC:
+            os._exit(1)
+        return {"metadata": {}, "job_id": thread_id, "blog_file": f"{job['topic']}.md", "audio_file": None}
+
+
+def stub_workflow() -> StubWorkflow:
+    return StubWorkflow()
+
+
+def _runner(**kwargs) -> ProcessBatchRunner:
+    return ProcessBatchRunner(workflow_factory=stub_workflow, factory_args=(), **kwargs)
+
+
+def test_crashing_job_is_retried_then_failed_without_hanging():
+    jobs = [{"topic": topic, "with_tts": False} for topic in ("a", CRASH_TOPIC, "b", "c")]
+    report = _runner(processes=2, job_retries=1).run(jobs)
+
+    statuses = {job["topic"]: job["status"] for job in report["jobs"]}
+    assert statuses == {"a": "succeeded", CRASH_TOPIC: "failed", "b": "succeeded", "c": "succeeded"}
+    assert "异常退出" in report["jobs"][1]["error"]
+    # 第一次崩溃后重试一次，两次崩溃各重启一次工作进程
+    assert report["worker_restarts"] == 2
+
+
+def test_arun_and_duplicates():
+    jobs = [{"topic": "a", "with_tts": False}, {"topic": "a", "with_tts": False}]
+    report = asyncio.run(_runner(processes=1).arun(jobs))
+
+    assert [job["status"] for job in report["jobs"]] == ["succeeded", "skipped"]
+    assert report["jobs"][1]["duplicate_of"] == 0
+    assert report["processes"] == 1
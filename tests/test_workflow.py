@@ -0,0 +1,84 @@
+import json
+import asyncio
+import pytest
+import src.resilience as resilience
+from src.cache import LLMCache
+from src.text_processing import TextProcessor, LLMGenerationError
+from src.tts_service import TTSService
+from langgraph.workflow import BlogWorkflow
+from benchmarks.stubs import StubLLMServer, FakeSpeechSynthesizer
+
+JOB = {"topic": "熔断", "length": "short", "with_tts": True, "polish_type": "blog", "mode": "sequential"}
+
+
+class DraftTextProcessor(TextProcessor):
+    """
+    生成固定草稿，只有润色请求经过后端
+    """
+
+    def generate_blog_from_topic(self, topic: str, length: str = "medium", use_cache: bool = True) -> str:
+        return "这是一篇草稿。"
+
+    async def agenerate_blog_from_topic(self, topic: str, length: str = "medium", use_cache: bool = True) -> str:
+        return "这是一篇草稿。"
+
+
+class CountingSynthesizer(FakeSpeechSynthesizer):
+    first_package_delay = 0
+    calls = 0
+
+    def call(self, text, *args, **kwargs):
+        CountingSynthesizer.calls += 1
+        return super().call(text, *args, **kwargs)
+
+
+def _open_breaker_processor(base_url: str, tmp_path) -> TextProcessor:
+    processor = DraftTextProcessor(base_url=base_url, cache=LLMCache(str(tmp_path / "llm.sqlite")), health_check="off")
+    processor.backend = resilience.Backend("llm", max_retries=0, failure_threshold=1, reset_timeout=60)
+    processor.backend.breaker.record_failure()
+    return processor
+
+
+def _check_failed_at_polish(result: dict):
+    assert result["error"].startswith("文本润色失败")
+    assert result["metadata"]["failed_node"] == "polish_text"
+    assert not result.get("blog_file")
+    assert CountingSynthesizer.calls == 0
+
+
+def test_polish_failure_routes_to_handle_failure(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    CountingSynthesizer.calls = 0
+    with StubLLMServer(first_token_delay=0, tokens_per_second=100000) as server:
+        processor = _open_breaker_processor(server.base_url, tmp_path)
+        with pytest.raises(LLMGenerationError) as failure:
+            processor.polish_text("这是一篇草稿。")
+        assert isinstance(failure.value.__cause__, resilience.CircuitOpenError)
+
+        workflow = BlogWorkflow(processor, TTSService(synthesizer_factory=CountingSynthesizer), checkpointer=False)
+        _check_failed_at_polish(workflow.run(JOB))
+        _check_failed_at_polish(asyncio.run(workflow.arun(JOB)))
+
+
+def test_section_fallback_is_recorded_and_breaker_errors_propagate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("src.config.POLISH_MODE", "sections")
+    # 每个片段的回复都视为不完整，单句片段无法再拆分，只能保留原文
+    monkeypatch.setattr("src.config.POLISH_MIN_LENGTH_RATIO", 100)
+    job = {**JOB, "with_tts": False}
+    with StubLLMServer(first_token_delay=0, tokens_per_second=100000) as server:
+        processor = DraftTextProcessor(base_url=server.base_url, cache=LLMCache(str(tmp_path / "llm.sqlite")),
+                                       health_check="off")
+        processor.backend = resilience.Backend("llm", max_retries=0, failure_threshold=1, reset_timeout=60)
+        workflow = BlogWorkflow(processor, TTSService(synthesizer_factory=CountingSynthesizer), checkpointer=False)
+        for result in (workflow.run(job), asyncio.run(workflow.arun(job))):
+            assert not result.get("error")
+            assert result["metadata"]["polish_sections"]["fallbacks"] == 1
+            with open(tmp_path / "results" / result["job_id"] / "manifest.json", encoding="utf-8") as f:
+                assert json.load(f)["polish_sections"]["fallbacks"] == 1
+
+        # 熔断打开时分段润色同样失败，不会把原文当作润色结果
+        processor.backend.breaker.record_failure()
+        with pytest.raises(LLMGenerationError) as failure:
+            processor.polish_text("这是另一篇草稿。")
+        assert isinstance(failure.value.__cause__, resilience.CircuitOpenError)